@@ -0,0 +1 @@
+"""Módulo de la API HTTP de consultas de solo lectura."""
@@ -0,0 +1,341 @@
+"""
+Módulo de la API HTTP de consultas.
+Sirve la base de datos de libros en modo solo lectura sin que los consumidores
+abran el archivo directamente: paginación por id (keyset), ETag basado en la
+versión de los datos y caché LRU de respuestas que se invalida con cada commit.
+"""
+
+import json
+import queue
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qsl, quote, unquote, urlsplit
+
+from config import (
+    API_HOST,
+    API_PORT,
+    API_PAGE_SIZE,
+    API_MAX_PAGE_SIZE,
+    API_CACHE_SIZE,
+    API_READ_CONNECTIONS
+)
+from database.db_manager import DatabaseManager
+from database.schema import register_functions
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Columnas de libros devueltas por la API
+BOOK_COLUMNS = (
+    'id', 'titulo', 'precio', 'disponibilidad', 'rating', 'url_imagen', 'descripcion',
+    'upc', 'categoria', 'url_detalle', 'fecha_extraccion', 'unidades'
+)
+
+BOOKS_PATH = '/libros'
+
+
+def _parse_int(params: Dict[str, str], name: str, minimum: int, maximum: Optional[int] = None) -> Optional[int]:
+    """
+    Lee un parámetro entero de la consulta.
+    
+    Args:
+        params: Parámetros de la consulta
+        name: Nombre del parámetro
+        minimum: Valor mínimo permitido
+        maximum: Valor máximo permitido (opcional)
+    
+    Returns:
+        Valor del parámetro o None si no viene
+    
+    Raises:
+        ValueError: Si el valor no es un entero dentro del rango
+    """
+    if name not in params:
+        return None
+    try:
+        value = int(params[name])
+    except ValueError:
+        raise ValueError(f"'{name}' debe ser un número entero")
+    if value < minimum:
+        raise ValueError(f"'{name}' debe ser mayor o igual que {minimum}")
+    if maximum is not None and value > maximum:
+        raise ValueError(f"'{name}' debe ser menor o igual que {maximum}")
+    return value
+
+
+def _parse_float(params: Dict[str, str], name: str) -> Optional[float]:
+    """
+    Lee un parámetro decimal de la consulta.
+    
+    Args:
+        params: Parámetros de la consulta
+        name: Nombre del parámetro
+    
+    Returns:
+        Valor del parámetro o None si no viene
+    
+    Raises:
+        ValueError: Si el valor no es un número
+    """
+    if name not in params:
+        return None
+    try:
+        return float(params[name])
+    except ValueError:
+        raise ValueError(f"'{name}' debe ser un número")
+
+
+class BookQueryService:
+    """Consultas de solo lectura sobre libros con caché LRU invalidada por versión."""
+    
+    def __init__(
+        self,
+        db_manager: DatabaseManager,
+        connections: int = API_READ_CONNECTIONS,
+        cache_size: int = API_CACHE_SIZE
+    ):
+        """
+        Inicializa el servicio de consultas.
+        
+        Args:
+            db_manager: Gestor de base de datos (crea el schema y los triggers de versión)
+            connections: Conexiones de solo lectura reutilizadas entre peticiones
+            cache_size: Número máximo de respuestas en la caché
+        """
+        self.db_path = db_manager.db_path
+        self.cache_size = cache_size
+        self.cache: OrderedDict = OrderedDict()
+        self.cache_version: Optional[int] = None
+        self.cache_lock = threading.Lock()
+        self.pool: queue.Queue = queue.Queue()
+        for _ in range(max(1, connections)):
+            self.pool.put(self._connect())
+    
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Abre una conexión de solo lectura a la base de datos.
+        
+        Returns:
+            Conexión SQLite en modo solo lectura
+        """
+        conn = sqlite3.connect(
+            f"file:{quote(self.db_path)}?mode=ro", uri=True, check_same_thread=False
+        )
+        conn.row_factory = sqlite3.Row
+        register_functions(conn)
+        conn.execute("PRAGMA query_only = ON")
+        return conn
+    
+    @contextmanager
+    def snapshot(self):
+        """
+        Toma una conexión del pool y abre una transacción de lectura, de modo que
+        la versión y los datos consultados corresponden al mismo commit.
+        
+        Yields:
+            Tupla (conexión, versión de los datos)
+        """
+        conn = self.pool.get()
+        try:
+            conn.execute("BEGIN")
+            try:
+                version = conn.execute("SELECT version FROM version_datos WHERE id = 1").fetchone()[0]
+                yield conn, version
+            finally:
+                conn.execute("COMMIT")
+        finally:
+            self.pool.put(conn)
+    
+    def close(self) -> None:
+        """Cierra las conexiones del pool."""
+        while not self.pool.empty():
+            self.pool.get_nowait().close()
+    
+    def cached(self, key: Tuple, version: int, producer: Callable[[], Tuple[int, Dict]]) -> Tuple[int, Dict]:
+        """
+        Obtiene una respuesta de la caché o la genera. Si la versión de los datos
+        cambió desde la última respuesta guardada, se vacía la caché completa.
+        
+        Args:
+            key: Clave de la petición (ruta y parámetros normalizados)
+            version: Versión de los datos de la transacción actual
+            producer: Función que genera (estado HTTP, cuerpo) si no está en caché
+        
+        Returns:
+            Tupla (estado HTTP, cuerpo)
+        """
+        with self.cache_lock:
+            if version != self.cache_version:
+                self.cache.clear()
+                self.cache_version = version
+            if key in self.cache:
+                self.cache.move_to_end(key)
+                return self.cache[key]
+        
+        response = producer()
+        
+        with self.cache_lock:
+            if version == self.cache_version:
+                self.cache[key] = response
+                if len(self.cache) > self.cache_size:
+                    self.cache.popitem(last=False)
+        return response
+    
+    def list_books(self, conn: sqlite3.Connection, params: Dict[str, str]) -> Tuple[int, Dict]:
+        """
+        Lista libros filtrados, paginando por id: 'despues' es el último id de la
+        página anterior, así que cada página cuesta lo mismo sin importar su posición.
+        
+        Args:
+            conn: Conexión de la transacción actual
+            params: Filtros (categoria, rating, precio_min, precio_max), limite y despues
+        
+        Returns:
+            Tupla (200, {'libros': [...], 'siguiente': id o None})
+        
+        Raises:
+            ValueError: Si algún parámetro no es válido
+        """
+        limit = _parse_int(params, 'limite', 1, API_MAX_PAGE_SIZE) or API_PAGE_SIZE
+        after_id = _parse_int(params, 'despues', 0) or 0
+        rating = _parse_int(params, 'rating', 1, 5)
+        min_price = _parse_float(params, 'precio_min')
+        max_price = _parse_float(params, 'precio_max')
+        
+        conditions = ["id > ?"]
+        values = [after_id]
+        if 'categoria' in params:
+            conditions.append("categoria = ?")
+            values.append(params['categoria'])
+        if rating is not None:
+            conditions.append("rating = ?")
+            values.append(rating)
+        if min_price is not None:
+            conditions.append("precio >= ?")
+            values.append(min_price)
+        if max_price is not None:
+            conditions.append("precio <= ?")
+            values.append(max_price)
+        values.append(limit + 1)
+        
+        rows = conn.execute(
+            f"SELECT {', '.join(BOOK_COLUMNS)} FROM libros "
+            f"WHERE {' AND '.join(conditions)} ORDER BY id LIMIT ?",
+            values
+        ).fetchall()
+        books = [dict(row) for row in rows[:limit]]
+        next_id = books[-1]['id'] if len(rows) > limit else None
+        return 200, {'libros': books, 'siguiente': next_id}
+    
+    def get_book(self, conn: sqlite3.Connection, upc: str) -> Tuple[int, Dict]:
+        """
+        Obtiene un libro por su UPC.
+        
+        Args:
+            conn: Conexión de la transacción actual
+            upc: Código UPC del libro
+        
+        Returns:
+            Tupla (200, libro) o (404, error)
+        """
+        row = conn.execute(
+            f"SELECT {', '.join(BOOK_COLUMNS)} FROM libros WHERE upc = ?", (upc,)
+        ).fetchone()
+        if row is None:
+            return 404, {'error': f"Libro no encontrado (UPC: {upc})"}
+        return 200, dict(row)
+    
+    def handle(self, path: str, params: Dict[str, str], if_none_match: Optional[str] = None) -> Tuple[int, Optional[Dict], str]:
+        """
+        Resuelve una petición GET.
+        
+        Args:
+            path: Ruta de la petición
+            params: Parámetros de la consulta
+            if_none_match: Cabecera If-None-Match de la petición (opcional)
+        
+        Returns:
+            Tupla (estado HTTP, cuerpo o None si es 304, ETag)
+        """
+        with self.snapshot() as (conn, version):
+            etag = f'"{version}"'
+            key = (path, tuple(sorted(params.items())))
+            if path == BOOKS_PATH:
+                producer = lambda: self.list_books(conn, params)
+            elif path.startswith(BOOKS_PATH + '/') and len(path) > len(BOOKS_PATH) + 1:
+                upc = unquote(path[len(BOOKS_PATH) + 1:])
+                producer = lambda: self.get_book(conn, upc)
+            else:
+                return 404, {'error': f"Ruta no encontrada: {path}"}, etag
+            
+            try:
+                status, body = self.cached(key, version, producer)
+            except ValueError as e:
+                return 400, {'error': str(e)}, etag
+            
+            # El ETag solo se compara con rutas y parámetros válidos: una ruta
+            # desconocida o un parámetro inválido responden 404/400 aunque coincida
+            if status == 200 and if_none_match == etag:
+                return 304, None, etag
+            return status, body, etag
+
+
+class QueryRequestHandler(BaseHTTPRequestHandler):
+    """Manejador HTTP de la API; el servicio se asigna en la clase creada por create_server."""
+    
+    service: BookQueryService = None
+    
+    def do_GET(self) -> None:
+        """Atiende una petición GET."""
+        url = urlsplit(self.path)
+        params = dict(parse_qsl(url.query))
+        path = url.path.rstrip('/') or '/'
+        
+        try:
+            status, body, etag = self.service.handle(path, params, self.headers.get('If-None-Match'))
+        except sqlite3.Error as e:
+            logger.error(f"Error de base de datos en la API ({self.path}): {e}")
+            status, body, etag = 503, {'error': "Base de datos no disponible"}, None
+        
+        self.send_response(status)
+        if etag:
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'no-cache')
+        if body is None:
+            self.end_headers()
+            return
+        
+        payload = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+    
+    def log_message(self, format: str, *args) -> None:
+        """Envía el log de accesos al logger del proyecto."""
+        logger.debug(f"{self.address_string()} - {format % args}")
+
+
+def create_server(db_manager: DatabaseManager, host: str = API_HOST, port: int = API_PORT) -> ThreadingHTTPServer:
+    """
+    Crea el servidor HTTP de la API (un hilo por petición).
+    
+    Args:
+        db_manager: Gestor de base de datos
+        host: Dirección en la que escuchar
+        port: Puerto en el que escuchar (0 = puerto libre)
+    
+    Returns:
+        Servidor listo para serve_forever(); su atributo 'service' es el BookQueryService
+    """
+    service = BookQueryService(db_manager)
+    handler = type('BoundQueryRequestHandler', (QueryRequestHandler,), {'service': service})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.service = service
+    logger.info(f"API de consultas escuchando en http://{host}:{server.server_address[1]}")
+    return server
@@ -85,16 +85,35 @@ def check_project_structure():
         'main.py',
         'requirements.txt',
         'README.md',
+        'api/__init__.py',
+        'api/server.py',
         'database/__init__.py',
+        'database/book_writer.py',
         'database/db_manager.py',
+        'database/merge.py',
+        'database/near_duplicates.py',
+        'database/page_archive.py',
+        'database/schema.py',
+        'database/snapshots.py',
+        'models/__init__.py',
+        'models/book.py',
         'scraper/__init__.py',
+        'scraper/backfill.py',
         'scraper/book_scraper.py',
+        'scraper/element_lookup.py',
+        'scraper/html_parser.py',
+        'scraper/parse_pool.py',
+        'scraper/reparse.py',
+        'scraper/scheduler.py',
         'utils/__init__.py',
         'utils/logger.py',
+        'utils/profiler.py',
     ]
     
     required_dirs = [
+        'api',
         'database',
+        'models',
         'scraper',
         'utils',
         'logs',
@@ -10,6 +10,26 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DATA_DIR = os.path.join(BASE_DIR, 'data')
 LOGS_DIR = os.path.join(BASE_DIR, 'logs')
 DB_PATH = os.path.join(DATA_DIR, 'libros.db')
+ARCHIVE_DB_PATH = os.path.join(DATA_DIR, 'paginas.db')
+
+# Modo WAL de la base de datos: lecturas concurrentes sin bloquear al crawler
+DB_WAL_MODE = True
+
+# Snapshots consistentes de la base de datos (API de backup online de SQLite)
+SNAPSHOT_DIR = os.path.join(DATA_DIR, 'snapshots')
+SNAPSHOT_KEEP = 24  # Snapshots conservados (los más antiguos se eliminan)
+SNAPSHOT_PAGES_PER_STEP = 256  # Páginas copiadas por paso del backup
+SNAPSHOT_STEP_PAUSE = 0.005  # Segundos de pausa entre pasos para no bloquear al crawler
+SNAPSHOT_MAX_RESTARTS = 3  # Reinicios por escrituras concurrentes antes de copiar en un solo paso
+
+# Esquema compacto de la tabla libros (la vista 'libros' mantiene las columnas originales)
+COMPRESS_DESCRIPTIONS = False  # Comprimir descripciones con zlib (requiere funciones SQL propias para leer la vista)
+DESCRIPTION_COMPRESSION_LEVEL = 6  # Nivel de compresión zlib de las descripciones (1-9)
+VACUUM_AFTER_MIGRATION = True  # Compactar el archivo tras migrar al esquema compacto
+
+# Historial de ejecuciones (tabla ejecuciones) y retención
+RUN_RETENTION_DAYS = 90  # Días de historial conservados por --retencion (ejecuciones y páginas archivadas)
+RUN_HISTORY_LIMIT = 20  # Ejecuciones mostradas por --ejecuciones
 
 # Configuración del scraper
 BASE_URL = 'https://books.toscrape.com'
@@ -28,12 +48,69 @@ CHROMIUM_DRIVER_PATH = '/usr/bin/chromedriver'  # Path típico en Linux
 # Configuración de delays y rate limiting
 REQUEST_DELAY = 2  # Segundos entre requests
 PAGE_LOAD_TIMEOUT = 10  # Timeout para carga de páginas
-IMPLICIT_WAIT = 5  # Espera implícita para elementos
+IMPLICIT_WAIT = 0  # Sin espera implícita: un elemento ausente se reporta de inmediato
+ELEMENT_TIMEOUT = 5  # Timeout de las esperas explícitas por selector
 
 # Configuración de Selenium
 HEADLESS_MODE = True  # Ejecutar navegador en modo headless
 WINDOW_SIZE = "1920,1080"
 
+# Perfil de navegador ligero: solo se necesita el HTML de cada página
+LEAN_BROWSER = True  # Bloquear imágenes, hojas de estilo y fuentes
+PAGE_LOAD_STRATEGY = 'eager'  # 'normal', 'eager' (DOMContentLoaded) o 'none'
+BLOCKED_URL_PATTERNS = [
+    '*.jpg', '*.jpeg', '*.png', '*.gif', '*.webp', '*.svg', '*.ico',
+    '*.css',
+    '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot'
+]
+
+# Configuración del escritor de base de datos en segundo plano
+WRITER_BATCH_SIZE = 100  # Libros por commit como máximo
+WRITER_FLUSH_INTERVAL = 1.0  # Segundos máximos antes de hacer commit de un grupo
+WRITER_QUEUE_SIZE = 1000  # Capacidad de la cola del escritor
+
+# Configuración del parseo en procesos separados
+PARSE_WORKERS = min(4, os.cpu_count() or 1)  # Procesos de parseo como máximo (0 = en el proceso principal)
+PARSE_POOL_MIN_PAGES = 20  # Páginas a parsear a partir de las cuales compensa iniciar procesos
+PARSE_MAX_PENDING = 2 * max(1, PARSE_WORKERS)  # Páginas descargadas pendientes de parsear (backpressure)
+
+# Configuración del archivo de páginas (re-parseo sin red)
+ARCHIVE_PAGES = True  # Guardar el HTML de cada página descargada
+ARCHIVE_COMPRESSION_LEVEL = 6  # Nivel de compresión zlib (1-9)
+
+# Configuración del modo daemon (recrawl continuo)
+DAEMON_INTERVAL = 3600  # Segundos entre el inicio de dos ciclos
+DAEMON_REQUEST_BUDGET = 50  # Máximo de páginas descargadas por ciclo
+DAEMON_LISTING_PAGES = 1  # Páginas de listado por ciclo para descubrir libros nuevos
+RECRAWL_MIN_AGE_HOURS = 24  # Antigüedad mínima para volver a verificar un libro
+
+# Configuración del backfill de detalles
+BACKFILL_MAX_BOOKS = 200  # Máximo de libros completados por ejecución
+BACKFILL_BATCH_SIZE = 20  # Libros por lote (una transacción por lote)
+BACKFILL_WORKERS = 2  # Navegadores en paralelo
+BACKFILL_LISTING_PAGES = 50  # Páginas de listado para reconstruir URLs de detalle faltantes
+
+# Configuración de la detección de casi duplicados (MinHash + LSH)
+NEAR_DUP_ENABLED = True  # Mantener el índice de firmas al insertar libros
+NEAR_DUP_CHECK_ON_INSERT = True  # Registrar en el log los posibles casi duplicados al insertar
+NEAR_DUP_NUM_PERM = 64  # Funciones hash por firma MinHash (cambiarlo obliga a reconstruir el índice)
+NEAR_DUP_BANDS = 16  # Bandas LSH (NEAR_DUP_NUM_PERM / NEAR_DUP_BANDS filas por banda)
+NEAR_DUP_THRESHOLD = 0.8  # Similitud de Jaccard estimada mínima para reportar un par
+
+# Configuración de la API de consultas (solo lectura)
+API_HOST = '127.0.0.1'
+API_PORT = 8080
+API_PAGE_SIZE = 50  # Libros por página por defecto
+API_MAX_PAGE_SIZE = 500  # Máximo de libros por página
+API_CACHE_SIZE = 256  # Respuestas guardadas en la caché LRU
+API_READ_CONNECTIONS = 4  # Conexiones de solo lectura reutilizadas entre peticiones
+
+# Configuración del perfilado (main.py --perfil)
+PROFILE_STAGES = ('get_page', 'parse_listing', 'parse_details', 'insert_book')  # Etapas del modo 'etapas'
+PROFILE_SAMPLE_INTERVAL = 0.005  # Segundos entre muestras de pilas (0 = sin muestreo)
+PROFILE_TRACEMALLOC_FRAMES = 10  # Frames guardados por asignación en tracemalloc
+PROFILE_TOP_ALLOCATORS = 25  # Líneas del informe de principales asignaciones
+
 # Configuración de logging
 LOG_FILE = os.path.join(LOGS_DIR, 'scraper.log')
 LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
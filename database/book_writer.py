@@ -0,0 +1,248 @@
+"""
+Módulo de escritura en segundo plano.
+Un hilo dedicado es dueño de la conexión SQLite, recibe libros por una cola acotada
+y los guarda en grupos (por tamaño o ventana de tiempo) con un único commit por grupo,
+de modo que el scraping y la persistencia se solapan.
+"""
+
+import queue
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Union
+
+from config import WRITER_BATCH_SIZE, WRITER_FLUSH_INTERVAL, WRITER_QUEUE_SIZE
+from database.db_manager import DatabaseManager, INSERT_DUPLICATE, UPSERT_ERROR, UPSERT_INSERTED
+from database.schema import register_functions
+from models.book import Book
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Marcador de cierre del hilo escritor
+_STOP = object()
+
+# Callback con el resultado de cada libro: (libro, UPSERT_INSERTED | INSERT_DUPLICATE | UPSERT_ERROR)
+OutcomeCallback = Callable[[Union[Book, Dict], str], None]
+
+# Segundos entre comprobaciones de que el hilo escritor sigue vivo al esperarlo
+_ALIVE_CHECK_INTERVAL = 0.5
+
+
+class _FlushRequest:
+    """Barrera: se completa cuando todo lo encolado antes ha sido guardado."""
+    
+    __slots__ = ('done',)
+    
+    def __init__(self):
+        self.done = threading.Event()
+
+
+class BookWriter:
+    """Escritor de libros en un hilo dedicado con group commit."""
+    
+    def __init__(
+        self,
+        db_manager: DatabaseManager,
+        batch_size: int = WRITER_BATCH_SIZE,
+        flush_interval: float = WRITER_FLUSH_INTERVAL,
+        queue_size: int = WRITER_QUEUE_SIZE,
+        on_outcome: Optional[OutcomeCallback] = None
+    ):
+        """
+        Inicializa el escritor e inicia su hilo.
+        
+        Args:
+            db_manager: Gestor de base de datos (aporta la ruta y la lógica de inserción)
+            batch_size: Libros por commit como máximo
+            flush_interval: Segundos máximos que un libro espera antes del commit
+            queue_size: Capacidad de la cola (submit bloquea si está llena)
+            on_outcome: Callback que recibe cada libro con su resultado tras el commit de
+                su grupo, en el orden de envío. Se llama desde el hilo escritor; un error
+                en el callback detiene el escritor como cualquier otro error
+        """
+        self.db_manager = db_manager
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.on_outcome = on_outcome
+        self.stats = {UPSERT_INSERTED: 0, INSERT_DUPLICATE: 0, UPSERT_ERROR: 0}
+        # Libros insertados con descripción, UPC y categoría. Los libros no se retienen
+        # (así la memoria no crece con el catálogo): el resultado de cada uno se entrega
+        # a on_outcome y aquí solo quedan los contadores
+        self.with_details = 0
+        self.commits = 0
+        # Error que detuvo el hilo escritor; se relanza en submit/flush/close
+        self.error: Optional[BaseException] = None
+        self.thread = threading.Thread(target=self._run, name='book-writer', daemon=True)
+        self.thread.start()
+    
+    def submit(self, book: Union[Book, Dict]) -> None:
+        """
+        Encola un libro para guardarlo. Bloquea si la cola está llena.
+        
+        Args:
+            book: Registro Book o diccionario con los datos del libro
+        
+        Raises:
+            Exception: El error que detuvo el hilo escritor
+        """
+        self._put(book)
+    
+    def submit_many(self, books: Iterable[Union[Book, Dict]]) -> None:
+        """
+        Encola varios libros para guardarlos.
+        
+        Args:
+            books: Registros Book o diccionarios con los datos de los libros
+        
+        Raises:
+            Exception: El error que detuvo el hilo escritor
+        """
+        for book in books:
+            self._put(book)
+    
+    def flush(self) -> None:
+        """
+        Bloquea hasta que todos los libros encolados hasta ahora estén guardados.
+        
+        Raises:
+            Exception: El error que detuvo el hilo escritor
+        """
+        request = _FlushRequest()
+        self._put(request)
+        while not request.done.wait(_ALIVE_CHECK_INTERVAL):
+            self._check_alive()
+    
+    def close(self) -> Dict[str, int]:
+        """
+        Guarda lo pendiente, detiene el hilo y cierra la conexión.
+        
+        Returns:
+            Contadores por resultado (insertado, duplicado, error)
+        
+        Raises:
+            Exception: El error que detuvo el hilo escritor
+        """
+        if self.thread.is_alive():
+            self._put(_STOP)
+            self.thread.join()
+        if self.error is not None:
+            raise self.error
+        return dict(self.stats)
+    
+    def __enter__(self) -> 'BookWriter':
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+    
+    def _check_alive(self) -> None:
+        """
+        Comprueba que el hilo escritor sigue procesando la cola.
+        
+        Raises:
+            Exception: El error que detuvo el hilo escritor
+            RuntimeError: Si el escritor ya está cerrado
+        """
+        if self.error is not None:
+            raise self.error
+        if not self.thread.is_alive():
+            raise RuntimeError("El escritor de libros está cerrado")
+    
+    def _put(self, item) -> None:
+        """
+        Encola un elemento sin quedar bloqueado si el hilo escritor se detuvo
+        con la cola llena.
+        
+        Args:
+            item: Libro, barrera o marcador de cierre
+        """
+        while True:
+            self._check_alive()
+            try:
+                self.queue.put(item, timeout=_ALIVE_CHECK_INTERVAL)
+                return
+            except queue.Full:
+                continue
+    
+    def _run(self) -> None:
+        """Bucle del hilo escritor: agrupa libros y hace un commit por grupo."""
+        conn = None
+        try:
+            conn = sqlite3.connect(self.db_manager.db_path)
+            conn.row_factory = sqlite3.Row
+            register_functions(conn)
+            while True:
+                batch: List[Union[Book, Dict]] = []
+                barriers: List[_FlushRequest] = []
+                stop = False
+                
+                # Esperar el primer elemento sin límite de tiempo
+                item = self.queue.get()
+                deadline = time.monotonic() + self.flush_interval
+                while True:
+                    if item is _STOP:
+                        stop = True
+                    elif isinstance(item, _FlushRequest):
+                        barriers.append(item)
+                    else:
+                        batch.append(item)
+                    
+                    if stop or barriers or len(batch) >= self.batch_size:
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = self.queue.get(timeout=remaining)
+                    except queue.Empty:
+                        break
+                
+                if batch:
+                    self._write(conn, batch)
+                for barrier in barriers:
+                    barrier.done.set()
+                if stop:
+                    break
+        except Exception as e:
+            # Los hilos que esperan al escritor lo detectan y relanzan el error
+            logger.error(f"El escritor de libros se detuvo por un error: {e}", exc_info=True)
+            self.error = e
+        finally:
+            if conn:
+                conn.close()
+    
+    def _write(self, conn: sqlite3.Connection, batch: List[Union[Book, Dict]]) -> None:
+        """
+        Guarda un grupo en una transacción. Si el grupo falla, reintenta libro a libro
+        para atribuir el error solo a los registros que lo causan.
+        
+        Args:
+            conn: Conexión propia del hilo escritor
+            batch: Libros a guardar
+        """
+        try:
+            outcomes = self.db_manager.insert_batch(conn.cursor(), batch)
+            conn.commit()
+            self.commits += 1
+        except sqlite3.Error as e:
+            conn.rollback()
+            logger.warning(f"Error en el grupo de {len(batch)} libros, reintentando uno a uno: {e}")
+            outcomes = []
+            for book in batch:
+                try:
+                    outcomes.extend(self.db_manager.insert_batch(conn.cursor(), [book]))
+                    conn.commit()
+                    self.commits += 1
+                except sqlite3.Error as book_error:
+                    conn.rollback()
+                    logger.error(f"Error al insertar libro '{book.get('titulo')}': {book_error}")
+                    outcomes.append(UPSERT_ERROR)
+        
+        for book, outcome in zip(batch, outcomes):
+            self.stats[outcome] += 1
+            if outcome == UPSERT_INSERTED and book.get('descripcion') and book.get('upc') and book.get('categoria'):
+                self.with_details += 1
+            if self.on_outcome:
+                self.on_outcome(book, outcome)
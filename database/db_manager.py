@@ -3,14 +3,236 @@ Módulo de gestión de base de datos SQLite.
 Maneja la creación del schema, inserción de datos y detección de duplicados.
 """
 
+import json
+import os
 import sqlite3
-from typing import Dict, Optional
+import time
+from typing import Dict, Iterable, List, Optional, Tuple, Union
 from contextlib import contextmanager
-from config import DB_PATH
+from config import (
+    DB_PATH,
+    DB_WAL_MODE,
+    SNAPSHOT_DIR,
+    SNAPSHOT_KEEP,
+    SNAPSHOT_PAGES_PER_STEP,
+    SNAPSHOT_STEP_PAUSE,
+    SNAPSHOT_MAX_RESTARTS,
+    COMPRESS_DESCRIPTIONS,
+    VACUUM_AFTER_MIGRATION,
+    RUN_HISTORY_LIMIT,
+    RUN_RETENTION_DAYS,
+    NEAR_DUP_CHECK_ON_INSERT,
+    NEAR_DUP_ENABLED
+)
+from database.near_duplicates import NearDuplicateIndex
+from database.snapshots import rotate_snapshots, snapshot_path, write_checksum
+from database.schema import (
+    SCHEMA_VERSION,
+    STORAGE_TABLE,
+    create_compact_schema,
+    migrate_to_compact,
+    register_functions,
+    schema_version,
+    set_description_compression,
+    upgrade_compact_schema
+)
+from models.book import BOOK_FIELDS, Book
 from utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+# Los libros insertados quedan vinculados a la ejecución en curso (último valor)
+INSERT_BOOK_SQL = f"""
+INSERT INTO libros ({', '.join(BOOK_FIELDS)}, ejecucion_id)
+VALUES ({', '.join('?' for _ in BOOK_FIELDS)}, ?)
+"""
+
+# Columnas de seguimiento de recrawl agregadas a bases de datos existentes
+TRACKING_COLUMNS = {
+    'url_detalle': 'TEXT',
+    'fecha_verificacion': 'TIMESTAMP',
+    'cambios': 'INTEGER NOT NULL DEFAULT 0'
+}
+
+# Campos cuyo cambio cuenta como modificación del libro en un recrawl
+CONTENT_FIELDS = tuple(field for field in BOOK_FIELDS if field != 'url_detalle')
+
+# Columnas de libros_datos cuya modificación no cambia la versión de los datos
+UNVERSIONED_COLUMNS = ('id', 'fecha_verificacion')
+
+# Resultados posibles de upsert_book
+UPSERT_INSERTED = 'insertado'
+UPSERT_UPDATED = 'actualizado'
+UPSERT_UNCHANGED = 'sin_cambios'
+UPSERT_ERROR = 'error'
+INSERT_DUPLICATE = 'duplicado'
+
+# Estados de una ejecución registrada en la tabla ejecuciones
+RUN_RUNNING = 'en_curso'
+RUN_COMPLETED = 'completada'
+RUN_FAILED = 'fallida'
+RUN_INTERRUPTED = 'interrumpida'
+
+# Contadores de la tabla ejecuciones y claves de estadísticas equivalentes
+RUN_COUNTERS = ('paginas', 'extraidos', 'insertados', 'actualizados', 'sin_cambios', 'duplicados', 'errores')
+RUN_COUNTER_ALIASES = {
+    UPSERT_INSERTED: 'insertados',
+    UPSERT_UPDATED: 'actualizados',
+    UPSERT_UNCHANGED: 'sin_cambios',
+    INSERT_DUPLICATE: 'duplicados',
+    UPSERT_ERROR: 'errores'
+}
+
+
+def book_row(book_data: Union[Book, Dict]) -> Tuple:
+    """
+    Convierte un libro (Book o diccionario) en la fila del INSERT.
+    
+    Args:
+        book_data: Registro Book o diccionario con los datos del libro
+    
+    Returns:
+        Tupla con los valores en el orden de BOOK_FIELDS
+    """
+    if isinstance(book_data, Book):
+        return book_data.to_row()
+    return tuple(book_data.get(field) for field in BOOK_FIELDS)
+
+
+def _summary_add_sql(row: str) -> str:
+    """
+    Genera el SQL que suma una fila de libros al resumen de su categoría.
+    
+    Args:
+        row: Alias de la fila de libros_datos dentro del trigger ('NEW' u 'OLD')
+    
+    Returns:
+        Sentencias SQL para usar dentro de un trigger
+    """
+    categoria = f"COALESCE((SELECT nombre FROM categorias WHERE id = {row}.categoria_id), '')"
+    precio = f"({row}.precio_peniques / 100.0)"
+    en_stock = f"COALESCE((SELECT texto FROM disponibilidades WHERE id = {row}.disponibilidad_id) LIKE 'In stock%', 0)"
+    return f"""
+        INSERT OR IGNORE INTO resumen_categorias (categoria) VALUES ({categoria});
+        UPDATE resumen_categorias SET
+            total = total + 1,
+            con_precio = con_precio + ({row}.precio_peniques IS NOT NULL),
+            suma_precio = suma_precio + COALESCE({precio}, 0),
+            precio_min = CASE
+                WHEN {row}.precio_peniques IS NOT NULL AND (precio_min IS NULL OR {precio} < precio_min)
+                THEN {precio} ELSE precio_min END,
+            precio_max = CASE
+                WHEN {row}.precio_peniques IS NOT NULL AND (precio_max IS NULL OR {precio} > precio_max)
+                THEN {precio} ELSE precio_max END,
+            rating_1 = rating_1 + ({row}.rating IS 1),
+            rating_2 = rating_2 + ({row}.rating IS 2),
+            rating_3 = rating_3 + ({row}.rating IS 3),
+            rating_4 = rating_4 + ({row}.rating IS 4),
+            rating_5 = rating_5 + ({row}.rating IS 5),
+            en_stock = en_stock + {en_stock}
+        WHERE categoria = {categoria};
+    """
+
+
+def _summary_remove_sql(row: str) -> str:
+    """
+    Genera el SQL que resta una fila de libros del resumen de su categoría.
+    Si la fila era el mínimo o máximo de precio, se recalculan usando el índice
+    (categoria_id, precio_peniques), por lo que el coste no depende del tamaño de la tabla.
+    
+    Args:
+        row: Alias de la fila de libros_datos dentro del trigger ('NEW' u 'OLD')
+    
+    Returns:
+        Sentencias SQL para usar dentro de un trigger
+    """
+    categoria = f"COALESCE((SELECT nombre FROM categorias WHERE id = {row}.categoria_id), '')"
+    precio = f"({row}.precio_peniques / 100.0)"
+    en_stock = f"COALESCE((SELECT texto FROM disponibilidades WHERE id = {row}.disponibilidad_id) LIKE 'In stock%', 0)"
+    return f"""
+        UPDATE resumen_categorias SET
+            total = total - 1,
+            con_precio = con_precio - ({row}.precio_peniques IS NOT NULL),
+            suma_precio = suma_precio - COALESCE({precio}, 0),
+            rating_1 = rating_1 - ({row}.rating IS 1),
+            rating_2 = rating_2 - ({row}.rating IS 2),
+            rating_3 = rating_3 - ({row}.rating IS 3),
+            rating_4 = rating_4 - ({row}.rating IS 4),
+            rating_5 = rating_5 - ({row}.rating IS 5),
+            en_stock = en_stock - {en_stock}
+        WHERE categoria = {categoria};
+        UPDATE resumen_categorias SET
+            precio_min = (SELECT MIN(precio_peniques) FROM {STORAGE_TABLE} WHERE categoria_id IS {row}.categoria_id) / 100.0,
+            precio_max = (SELECT MAX(precio_peniques) FROM {STORAGE_TABLE} WHERE categoria_id IS {row}.categoria_id) / 100.0
+        WHERE categoria = {categoria}
+          AND {row}.precio_peniques IS NOT NULL
+          AND ({precio} <= precio_min OR {precio} >= precio_max);
+        DELETE FROM resumen_categorias
+        WHERE categoria = {categoria} AND total <= 0;
+    """
+
+
+def data_version(cursor: sqlite3.Cursor) -> int:
+    """
+    Lee el contador de versión de los datos. Cada fila de libros insertada,
+    modificada o eliminada lo incrementa en uno, así que la diferencia entre dos
+    lecturas cuenta las filas afectadas (cursor.rowcount no sirve con la vista).
+    Las actualizaciones que no cambian ningún valor, o solo fecha_verificacion, no cuentan.
+    
+    Args:
+        cursor: Cursor de la conexión activa
+    
+    Returns:
+        Versión actual de los datos
+    """
+    cursor.execute("SELECT version FROM version_datos WHERE id = 1")
+    return cursor.fetchone()[0]
+
+
+class _BackupRestarted(Exception):
+    """El backup online se reinició demasiadas veces por escrituras concurrentes."""
+
+
+def _backup(source: sqlite3.Connection, target_path: str, pages_per_step: int, step_pause: float) -> int:
+    """
+    Copia una base de datos con la API de backup online, por pasos.
+    SQLite reinicia la copia si otra conexión modifica el origen entre pasos.
+    
+    Args:
+        source: Conexión a la base de datos de origen
+        target_path: Ruta del archivo de destino
+        pages_per_step: Páginas copiadas por paso (-1 = todas en un paso)
+        step_pause: Segundos de pausa entre pasos
+    
+    Returns:
+        Número de pasos realizados
+    
+    Raises:
+        _BackupRestarted: Si la copia se reinició SNAPSHOT_MAX_RESTARTS veces
+    """
+    steps = 0
+    restarts = 0
+    last_remaining = None
+    
+    def progress(status: int, remaining: int, total: int) -> None:
+        """Cuenta los pasos, detecta reinicios y cede el turno al crawler."""
+        nonlocal steps, restarts, last_remaining
+        steps += 1
+        if last_remaining is not None and remaining > last_remaining:
+            restarts += 1
+            if restarts >= SNAPSHOT_MAX_RESTARTS:
+                raise _BackupRestarted()
+        last_remaining = remaining
+        if remaining and step_pause > 0:
+            time.sleep(step_pause)
+    
+    target = sqlite3.connect(target_path)
+    try:
+        source.backup(target, pages=pages_per_step, progress=progress)
+    finally:
+        target.close()
+    return steps
+
 
 class DatabaseManager:
     """Gestor de base de datos SQLite para almacenar información de libros."""
@@ -23,7 +245,16 @@ class DatabaseManager:
             db_path: Ruta al archivo de base de datos SQLite
         """
         self.db_path = db_path
+        if DB_WAL_MODE:
+            self.enable_wal()
         self.create_table()
+        self.create_summary_tables()
+        self.create_version_table()
+        self.create_run_table()
+        # Ejecución en curso: los libros insertados o modificados se vinculan a ella
+        self.run_id: Optional[int] = None
+        self._run_started: Optional[float] = None
+        self.near_duplicates = NearDuplicateIndex(self) if NEAR_DUP_ENABLED else None
     
     @contextmanager
     def get_connection(self):
@@ -37,6 +268,7 @@ class DatabaseManager:
         try:
             conn = sqlite3.connect(self.db_path)
             conn.row_factory = sqlite3.Row
+            register_functions(conn)
             yield conn
             conn.commit()
         except sqlite3.Error as e:
@@ -48,32 +280,480 @@ class DatabaseManager:
             if conn:
                 conn.close()
     
+    def enable_wal(self) -> None:
+        """
+        Activa el modo WAL (persistente en el archivo): los lectores, como la API
+        de consultas, no bloquean al crawler ni el crawler a los lectores.
+        """
+        try:
+            with self.get_connection() as conn:
+                mode = conn.execute("PRAGMA journal_mode=WAL").fetchone()[0]
+                if mode != 'wal':
+                    logger.warning(f"No se pudo activar el modo WAL (modo actual: {mode})")
+        except sqlite3.Error as e:
+            logger.error(f"Error al activar el modo WAL: {e}")
+            raise
+    
     def create_table(self) -> None:
-        """Crea la tabla de libros si no existe."""
-        create_table_sql = """
-        CREATE TABLE IF NOT EXISTS libros (
+        """
+        Crea o actualiza el esquema de libros.
+        Una base de datos vacía se crea directamente con el esquema compacto; una
+        con la tabla libros original se migra (conservando los ids) y, si
+        VACUUM_AFTER_MIGRATION está activo, se compacta el archivo.
+        """
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                version = schema_version(cursor)
+                
+                if version == 0:
+                    create_compact_schema(cursor, COMPRESS_DESCRIPTIONS)
+                    logger.info("Esquema compacto de libros creado")
+                elif version == 1:
+                    # Migrar bases de datos creadas antes de las columnas de seguimiento
+                    cursor.execute("PRAGMA table_info(libros)")
+                    existing_columns = {row['name'] for row in cursor.fetchall()}
+                    for column, column_type in TRACKING_COLUMNS.items():
+                        if column not in existing_columns:
+                            cursor.execute(f"ALTER TABLE libros ADD COLUMN {column} {column_type}")
+                            logger.info(f"Columna '{column}' agregada a la tabla 'libros'")
+                    
+                    cursor.execute("BEGIN")
+                    migrated = migrate_to_compact(cursor, COMPRESS_DESCRIPTIONS)
+                    logger.info(f"Tabla 'libros' migrada al esquema compacto: {migrated} libros")
+                else:
+                    if upgrade_compact_schema(cursor, version):
+                        logger.info(f"Esquema de libros actualizado de la versión {version} a la {SCHEMA_VERSION}")
+                    converted = set_description_compression(cursor, COMPRESS_DESCRIPTIONS)
+                    if converted is not None:
+                        logger.info(f"Compresión de descripciones ajustada: {converted} descripciones convertidas")
+                logger.info("Tabla 'libros' verificada/creada exitosamente")
+            
+            if version == 1 and VACUUM_AFTER_MIGRATION:
+                with self.get_connection() as conn:
+                    conn.execute("VACUUM")
+                logger.info("Base de datos compactada tras la migración")
+        except sqlite3.Error as e:
+            logger.error(f"Error al crear la tabla: {e}")
+            raise
+    
+    def create_summary_tables(self) -> None:
+        """
+        Crea las tablas de resumen por categoría y los triggers que las mantienen.
+        Los triggers actualizan el resumen de forma incremental en cada INSERT,
+        UPDATE o DELETE sobre libros. Si la tabla de resumen no existía y ya hay
+        libros, se realiza un recálculo completo inicial.
+        """
+        create_summary_sql = """
+        CREATE TABLE IF NOT EXISTS resumen_categorias (
+            categoria TEXT PRIMARY KEY,  -- '' para libros sin categoría
+            total INTEGER NOT NULL DEFAULT 0,
+            con_precio INTEGER NOT NULL DEFAULT 0,
+            suma_precio REAL NOT NULL DEFAULT 0,
+            precio_min REAL,
+            precio_max REAL,
+            rating_1 INTEGER NOT NULL DEFAULT 0,
+            rating_2 INTEGER NOT NULL DEFAULT 0,
+            rating_3 INTEGER NOT NULL DEFAULT 0,
+            rating_4 INTEGER NOT NULL DEFAULT 0,
+            rating_5 INTEGER NOT NULL DEFAULT 0,
+            en_stock INTEGER NOT NULL DEFAULT 0
+        );
+        """
+        
+        triggers_sql = f"""
+        CREATE TRIGGER IF NOT EXISTS trg_resumen_insert AFTER INSERT ON {STORAGE_TABLE}
+        BEGIN
+            {_summary_add_sql('NEW')}
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_resumen_delete AFTER DELETE ON {STORAGE_TABLE}
+        BEGIN
+            {_summary_remove_sql('OLD')}
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_resumen_update
+        AFTER UPDATE OF precio_peniques, disponibilidad_id, rating, categoria_id ON {STORAGE_TABLE}
+        WHEN OLD.precio_peniques IS NOT NEW.precio_peniques
+          OR OLD.disponibilidad_id IS NOT NEW.disponibilidad_id
+          OR OLD.rating IS NOT NEW.rating
+          OR OLD.categoria_id IS NOT NEW.categoria_id
+        BEGIN
+            {_summary_remove_sql('OLD')}
+            {_summary_add_sql('NEW')}
+        END;
+        """
+        
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'resumen_categorias'"
+                )
+                summary_existed = cursor.fetchone() is not None
+                cursor.executescript(create_summary_sql + triggers_sql)
+            
+            if not summary_existed and self.get_book_count() > 0:
+                logger.info("Tabla de resumen nueva con libros existentes, recalculando...")
+                self.rebuild_summaries()
+            logger.info("Tablas de resumen verificadas/creadas exitosamente")
+        except sqlite3.Error as e:
+            logger.error(f"Error al crear las tablas de resumen: {e}")
+            raise
+    
+    def create_version_table(self) -> None:
+        """
+        Crea el contador de versión de los datos y los triggers que lo incrementan
+        en cada INSERT, UPDATE o DELETE sobre libros. Los lectores lo usan para
+        saber, con una sola consulta, si los datos cambiaron (ETag y caché de la API).
+        Un recrawl que solo verifica el libro (fecha_verificacion) no cambia la versión.
+        El trigger de UPDATE se recrea siempre, para que las bases de datos existentes
+        tomen la condición actual.
+        """
+        try:
+            with self.get_connection() as conn:
+                columns = [
+                    row[1] for row in conn.execute(f"PRAGMA table_info({STORAGE_TABLE})")
+                    if row[1] not in UNVERSIONED_COLUMNS
+                ]
+                changed = ' OR '.join(f"OLD.{column} IS NOT NEW.{column}" for column in columns)
+                create_version_sql = f"""
+                CREATE TABLE IF NOT EXISTS version_datos (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    version INTEGER NOT NULL
+                );
+                INSERT OR IGNORE INTO version_datos (id, version) VALUES (1, 0);
+                CREATE TRIGGER IF NOT EXISTS trg_version_insert AFTER INSERT ON {STORAGE_TABLE}
+                BEGIN
+                    UPDATE version_datos SET version = version + 1 WHERE id = 1;
+                END;
+                CREATE TRIGGER IF NOT EXISTS trg_version_delete AFTER DELETE ON {STORAGE_TABLE}
+                BEGIN
+                    UPDATE version_datos SET version = version + 1 WHERE id = 1;
+                END;
+                DROP TRIGGER IF EXISTS trg_version_update;
+                CREATE TRIGGER trg_version_update AFTER UPDATE ON {STORAGE_TABLE}
+                WHEN {changed}
+                BEGIN
+                    UPDATE version_datos SET version = version + 1 WHERE id = 1;
+                END;
+                """
+                conn.executescript(create_version_sql)
+        except sqlite3.Error as e:
+            logger.error(f"Error al crear la tabla de versión de datos: {e}")
+            raise
+    
+    def get_data_version(self) -> int:
+        """
+        Obtiene la versión actual de los datos de libros.
+        
+        Returns:
+            Contador de modificaciones confirmadas sobre libros
+        """
+        try:
+            with self.get_connection() as conn:
+                return data_version(conn.cursor())
+        except sqlite3.Error as e:
+            logger.error(f"Error al obtener la versión de los datos: {e}")
+            return 0
+    
+    def create_run_table(self) -> None:
+        """
+        Crea la tabla de ejecuciones: parámetros, tiempos, contadores y rendimiento
+        de cada ejecución (scraping, daemon, backfill, re-parseo o fusión).
+        """
+        create_run_sql = """
+        CREATE TABLE IF NOT EXISTS ejecuciones (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
-            titulo TEXT NOT NULL,
-            precio DECIMAL(10,2),
-            disponibilidad TEXT,
-            rating INTEGER,
-            url_imagen TEXT,
-            descripcion TEXT,
-            upc TEXT UNIQUE,
-            categoria TEXT,
-            fecha_extraccion TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            modo TEXT NOT NULL,
+            parametros TEXT,  -- JSON con los parámetros de la ejecución
+            inicio TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            fin TIMESTAMP,
+            duracion REAL,  -- Segundos
+            estado TEXT NOT NULL,
+            paginas INTEGER NOT NULL DEFAULT 0,
+            extraidos INTEGER NOT NULL DEFAULT 0,
+            insertados INTEGER NOT NULL DEFAULT 0,
+            actualizados INTEGER NOT NULL DEFAULT 0,
+            sin_cambios INTEGER NOT NULL DEFAULT 0,
+            duplicados INTEGER NOT NULL DEFAULT 0,
+            errores INTEGER NOT NULL DEFAULT 0,
+            libros_por_segundo REAL
         );
+        CREATE INDEX IF NOT EXISTS idx_ejecuciones_inicio ON ejecuciones (inicio);
+        """
+        
+        try:
+            with self.get_connection() as conn:
+                conn.executescript(create_run_sql)
+        except sqlite3.Error as e:
+            logger.error(f"Error al crear la tabla de ejecuciones: {e}")
+            raise
+    
+    def start_run(self, modo: str, parametros: Optional[Dict] = None) -> Optional[int]:
         """
+        Registra el inicio de una ejecución. Hasta finish_run(), los libros
+        insertados o modificados por este gestor quedan vinculados a ella.
         
+        Args:
+            modo: Tipo de ejecución ('scraping', 'daemon', 'backfill', ...)
+            parametros: Parámetros de la ejecución (se guardan como JSON)
+        
+        Returns:
+            Id de la ejecución, o None si no se pudo registrar
+        """
         try:
             with self.get_connection() as conn:
                 cursor = conn.cursor()
-                cursor.execute(create_table_sql)
-                logger.info("Tabla 'libros' verificada/creada exitosamente")
+                cursor.execute(
+                    "INSERT INTO ejecuciones (modo, parametros, estado) VALUES (?, ?, ?)",
+                    (modo, json.dumps(parametros or {}, ensure_ascii=False, sort_keys=True), RUN_RUNNING)
+                )
+                self.run_id = cursor.lastrowid
         except sqlite3.Error as e:
-            logger.error(f"Error al crear la tabla: {e}")
+            # Un fallo del historial no debe impedir la ejecución
+            logger.error(f"Error al registrar el inicio de la ejecución: {e}")
+            self.run_id = None
+        self._run_started = time.monotonic()
+        logger.info(f"Ejecución {self.run_id} iniciada ({modo})")
+        return self.run_id
+    
+    def finish_run(self, stats: Optional[Dict] = None, estado: str = RUN_COMPLETED) -> Optional[Dict]:
+        """
+        Registra el final de la ejecución en curso con sus contadores y rendimiento.
+        Acepta las claves de RUN_COUNTERS y los resultados de upsert_book/insert_batch
+        (UPSERT_INSERTED, INSERT_DUPLICATE, ...); el resto de claves se ignoran. Si no
+        se indica 'extraidos', es la suma de los resultados.
+        
+        Args:
+            stats: Estadísticas de la ejecución
+            estado: RUN_COMPLETED, RUN_FAILED o RUN_INTERRUPTED
+        
+        Returns:
+            Diccionario con la fila de la ejecución, o None si no había ejecución en curso
+        """
+        if self._run_started is None:
+            return None
+        
+        counters = dict.fromkeys(RUN_COUNTERS, 0)
+        for key, value in (stats or {}).items():
+            column = RUN_COUNTER_ALIASES.get(key, key)
+            if column in counters:
+                counters[column] += value
+        if not (stats or {}).get('extraidos'):
+            counters['extraidos'] = sum(counters[column] for column in RUN_COUNTER_ALIASES.values())
+        
+        duration = time.monotonic() - self._run_started
+        throughput = counters['extraidos'] / duration if duration > 0 else None
+        run_id = self.run_id
+        self.run_id = None
+        self._run_started = None
+        
+        if run_id is None:
+            return None
+        try:
+            with self.get_connection() as conn:
+                assignments = ', '.join(f"{column} = ?" for column in counters)
+                conn.execute(
+                    f"""
+                    UPDATE ejecuciones SET fin = CURRENT_TIMESTAMP, duracion = ?, estado = ?,
+                        libros_por_segundo = ?, {assignments}
+                    WHERE id = ?
+                    """,
+                    (duration, estado, throughput, *counters.values(), run_id)
+                )
+                row = conn.execute("SELECT * FROM ejecuciones WHERE id = ?", (run_id,)).fetchone()
+        except sqlite3.Error as e:
+            logger.error(f"Error al registrar el final de la ejecución {run_id}: {e}")
+            return None
+        
+        logger.info(
+            f"Ejecución {run_id} {estado} en {duration:.1f}s: {counters['extraidos']} libros "
+            f"({throughput or 0:.2f} libros/s), {counters['insertados']} insertados, "
+            f"{counters['actualizados']} actualizados, {counters['errores']} errores"
+        )
+        return dict(row)
+    
+    @contextmanager
+    def track_run(self, modo: str, parametros: Optional[Dict] = None, stats: Optional[Dict] = None):
+        """
+        Context manager que registra una ejecución completa. El diccionario de
+        estadísticas se rellena durante la ejecución y se guarda al salir; una
+        excepción marca la ejecución como fallida (o interrumpida, si es
+        KeyboardInterrupt) conservando los contadores parciales.
+        
+        Args:
+            modo: Tipo de ejecución
+            parametros: Parámetros de la ejecución
+            stats: Diccionario de estadísticas a usar (por defecto, uno vacío)
+        
+        Yields:
+            Diccionario de estadísticas para finish_run()
+        """
+        stats = {} if stats is None else stats
+        self.start_run(modo, parametros)
+        try:
+            yield stats
+        except KeyboardInterrupt:
+            self.finish_run(stats, RUN_INTERRUPTED)
+            raise
+        except BaseException:
+            self.finish_run(stats, RUN_FAILED)
+            raise
+        self.finish_run(stats)
+    
+    def get_runs(self, limit: int = RUN_HISTORY_LIMIT) -> List[Dict]:
+        """
+        Obtiene las ejecuciones más recientes.
+        
+        Args:
+            limit: Número máximo de ejecuciones
+        
+        Returns:
+            Lista de diccionarios (más reciente primero) con parámetros ya decodificados
+        """
+        try:
+            with self.get_connection() as conn:
+                rows = conn.execute("SELECT * FROM ejecuciones ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Error al obtener las ejecuciones: {e}")
+            return []
+        
+        runs = []
+        for row in rows:
+            run = dict(row)
+            run['parametros'] = json.loads(run['parametros'] or '{}')
+            runs.append(run)
+        return runs
+    
+    def rebuild_summaries(self) -> int:
+        """
+        Recalcula desde cero las tablas de resumen a partir de la tabla libros.
+        Se usa para reparar resúmenes inconsistentes (por ejemplo, tras editar
+        la base de datos con triggers deshabilitados).
+        
+        Returns:
+            Número de categorías en el resumen recalculado
+        """
+        rebuild_sql = """
+        INSERT INTO resumen_categorias (
+            categoria, total, con_precio, suma_precio, precio_min, precio_max,
+            rating_1, rating_2, rating_3, rating_4, rating_5, en_stock
+        )
+        SELECT
+            COALESCE(categoria, ''),
+            COUNT(*),
+            COUNT(precio),
+            COALESCE(SUM(precio), 0),
+            MIN(precio),
+            MAX(precio),
+            SUM(rating IS 1),
+            SUM(rating IS 2),
+            SUM(rating IS 3),
+            SUM(rating IS 4),
+            SUM(rating IS 5),
+            SUM(COALESCE(disponibilidad LIKE 'In stock%', 0))
+        FROM libros
+        GROUP BY COALESCE(categoria, '')
+        """
+        
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("DELETE FROM resumen_categorias")
+                cursor.execute(rebuild_sql)
+                cursor.execute("SELECT COUNT(*) FROM resumen_categorias")
+                categories = cursor.fetchone()[0]
+                logger.info(f"Resúmenes recalculados: {categories} categorías")
+                return categories
+        except sqlite3.Error as e:
+            logger.error(f"Error al recalcular resúmenes: {e}")
             raise
     
+    def get_category_summary(self, categoria: Optional[str] = None) -> List[Dict]:
+        """
+        Obtiene el resumen precalculado por categoría.
+        El coste depende del número de categorías, no del número de libros.
+        
+        Args:
+            categoria: Categoría concreta a consultar (opcional, None = todas)
+        
+        Returns:
+            Lista de diccionarios con conteos, precios y distribución de ratings
+        """
+        query = "SELECT * FROM resumen_categorias"
+        params = ()
+        if categoria is not None:
+            query += " WHERE categoria = ?"
+            params = (categoria,)
+        query += " ORDER BY categoria"
+        
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(query, params)
+                summaries = []
+                for row in cursor.fetchall():
+                    summaries.append({
+                        'categoria': row['categoria'] or None,
+                        'total': row['total'],
+                        'precio_promedio': (
+                            row['suma_precio'] / row['con_precio'] if row['con_precio'] else None
+                        ),
+                        'precio_min': row['precio_min'],
+                        'precio_max': row['precio_max'],
+                        'ratings': {
+                            rating: row[f'rating_{rating}'] for rating in range(1, 6)
+                        },
+                        'en_stock': row['en_stock'],
+                        'agotados': row['total'] - row['en_stock']
+                    })
+                return summaries
+        except sqlite3.Error as e:
+            logger.error(f"Error al obtener resumen por categoría: {e}")
+            return []
+    
+    def get_global_summary(self) -> Dict:
+        """
+        Obtiene el resumen global del catálogo agregando los resúmenes por categoría.
+        
+        Returns:
+            Diccionario con total, precios, distribución de ratings y disponibilidad
+        """
+        query = """
+        SELECT
+            COALESCE(SUM(total), 0) AS total,
+            COALESCE(SUM(con_precio), 0) AS con_precio,
+            COALESCE(SUM(suma_precio), 0) AS suma_precio,
+            MIN(precio_min) AS precio_min,
+            MAX(precio_max) AS precio_max,
+            COALESCE(SUM(rating_1), 0) AS rating_1,
+            COALESCE(SUM(rating_2), 0) AS rating_2,
+            COALESCE(SUM(rating_3), 0) AS rating_3,
+            COALESCE(SUM(rating_4), 0) AS rating_4,
+            COALESCE(SUM(rating_5), 0) AS rating_5,
+            COALESCE(SUM(en_stock), 0) AS en_stock
+        FROM resumen_categorias
+        """
+        
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(query)
+                row = cursor.fetchone()
+                return {
+                    'total': row['total'],
+                    'precio_promedio': (
+                        row['suma_precio'] / row['con_precio'] if row['con_precio'] else None
+                    ),
+                    'precio_min': row['precio_min'],
+                    'precio_max': row['precio_max'],
+                    'ratings': {rating: row[f'rating_{rating}'] for rating in range(1, 6)},
+                    'en_stock': row['en_stock'],
+                    'agotados': row['total'] - row['en_stock']
+                }
+        except sqlite3.Error as e:
+            logger.error(f"Error al obtener resumen global: {e}")
+            return {}
+    
     def book_exists(self, upc: Optional[str] = None, titulo: Optional[str] = None) -> bool:
         """
         Verifica si un libro ya existe en la base de datos.
@@ -92,36 +772,77 @@ class DatabaseManager:
         
         try:
             with self.get_connection() as conn:
-                cursor = conn.cursor()
-                
-                # Priorizar validación por UPC si está disponible
-                if upc:
-                    cursor.execute("SELECT 1 FROM libros WHERE upc = ? LIMIT 1", (upc,))
-                    exists = cursor.fetchone() is not None
-                    if exists:
-                        logger.debug(f"Libro encontrado por UPC: {upc}")
-                    return exists
-                
-                # Fallback: validar por título si no hay UPC
-                if titulo:
-                    cursor.execute("SELECT 1 FROM libros WHERE titulo = ? LIMIT 1", (titulo,))
-                    exists = cursor.fetchone() is not None
-                    if exists:
-                        logger.debug(f"Libro encontrado por título: {titulo}")
-                    return exists
-                
-                return False
+                return self._book_exists(conn.cursor(), upc=upc, titulo=titulo)
         except sqlite3.Error as e:
             logger.error(f"Error al verificar duplicado (UPC: {upc}, Título: {titulo}): {e}")
             return False
     
-    def insert_book(self, book_data: Dict) -> bool:
+    def _book_exists(self, cursor: sqlite3.Cursor, upc: Optional[str], titulo: Optional[str]) -> bool:
+        """
+        Verifica duplicados usando un cursor ya abierto (UPC primero, título como fallback).
+        
+        Args:
+            cursor: Cursor de la conexión activa
+            upc: Código UPC del libro (opcional)
+            titulo: Título del libro (opcional)
+        
+        Returns:
+            True si el libro existe, False en caso contrario
+        """
+        # Priorizar validación por UPC si está disponible
+        if upc:
+            cursor.execute("SELECT 1 FROM libros WHERE upc = ? LIMIT 1", (upc,))
+            exists = cursor.fetchone() is not None
+            if exists:
+                logger.debug(f"Libro encontrado por UPC: {upc}")
+            return exists
+        
+        # Fallback: validar por título si no hay UPC
+        if titulo:
+            cursor.execute("SELECT 1 FROM libros WHERE titulo = ? LIMIT 1", (titulo,))
+            exists = cursor.fetchone() is not None
+            if exists:
+                logger.debug(f"Libro encontrado por título: {titulo}")
+            return exists
+        
+        return False
+    
+    def _check_near_duplicates(self, cursor: sqlite3.Cursor, book_data: Union[Book, Dict]) -> None:
+        """
+        Registra en el log los libros casi duplicados del que se va a insertar.
+        Es solo un aviso: el libro se inserta igualmente.
+        
+        Args:
+            cursor: Cursor de la conexión activa
+            book_data: Registro Book o diccionario con los datos del libro
+        """
+        if not self.near_duplicates or not NEAR_DUP_CHECK_ON_INSERT:
+            return
+        
+        titulo = book_data.get('titulo')
+        for match in self.near_duplicates.find_similar(cursor, titulo, book_data.get('descripcion')):
+            logger.warning(
+                f"Posible casi duplicado de '{titulo}': '{match['titulo']}' "
+                f"(id {match['id']}, {match['campo']}, similitud {match['similitud']:.2f})"
+            )
+    
+    def _index_near_duplicates(self, cursor: sqlite3.Cursor) -> None:
+        """
+        Indexa los libros insertados o modificados en la transacción actual.
+        
+        Args:
+            cursor: Cursor de la conexión activa
+        """
+        if self.near_duplicates:
+            self.near_duplicates.index_pending(cursor)
+    
+    def insert_book(self, book_data: Union[Book, Dict]) -> bool:
         """
         Inserta un libro en la base de datos si no existe.
         Valida duplicados por UPC si está disponible, o por título como fallback.
         
         Args:
-            book_data: Diccionario con los datos del libro
+            book_data: Registro Book o diccionario con los datos del libro
         
         Returns:
             True si se insertó correctamente, False si ya existía o hubo error
@@ -142,24 +863,12 @@ class DatabaseManager:
                 logger.info(f"Libro duplicado (por título), omitiendo: {titulo}")
             return False
         
-        insert_sql = """
-        INSERT INTO libros (titulo, precio, disponibilidad, rating, url_imagen, descripcion, upc, categoria)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """
-        
         try:
             with self.get_connection() as conn:
                 cursor = conn.cursor()
-                cursor.execute(insert_sql, (
-                    book_data.get('titulo'),
-                    book_data.get('precio'),
-                    book_data.get('disponibilidad'),
-                    book_data.get('rating'),
-                    book_data.get('url_imagen'),
-                    book_data.get('descripcion'),
-                    book_data.get('upc'),
-                    book_data.get('categoria')
-                ))
+                self._check_near_duplicates(cursor, book_data)
+                cursor.execute(INSERT_BOOK_SQL, book_row(book_data) + (self.run_id,))
+                self._index_near_duplicates(cursor)
                 logger.info(f"Libro insertado exitosamente: {book_data.get('titulo')}")
                 return True
         except sqlite3.IntegrityError as e:
@@ -169,6 +878,348 @@ class DatabaseManager:
             logger.error(f"Error al insertar libro en la base de datos: {e}")
             return False
     
+    def insert_books(self, books: Iterable[Union[Book, Dict]]) -> List[bool]:
+        """
+        Inserta un lote de libros en una única transacción usando executemany.
+        Aplica la misma validación de duplicados que insert_book, incluyendo
+        duplicados dentro del propio lote.
+        
+        Args:
+            books: Registros Book o diccionarios con los datos de los libros
+        
+        Returns:
+            Lista con True/False por libro (True si se insertó)
+        """
+        books = list(books)
+        try:
+            with self.get_connection() as conn:
+                outcomes = self.insert_batch(conn.cursor(), books)
+                return [outcome == UPSERT_INSERTED for outcome in outcomes]
+        except sqlite3.Error as e:
+            logger.error(f"Error al insertar lote de libros: {e}")
+            return [False] * len(books)
+    
+    def insert_batch(self, cursor: sqlite3.Cursor, books: List[Union[Book, Dict]]) -> List[str]:
+        """
+        Inserta un lote de libros con un cursor ya abierto, sin hacer commit.
+        Lo usan insert_books y el escritor en segundo plano (group commit).
+        
+        Args:
+            cursor: Cursor de la conexión activa
+            books: Registros Book o diccionarios con los datos de los libros
+        
+        Returns:
+            Resultado por libro: UPSERT_INSERTED, INSERT_DUPLICATE o UPSERT_ERROR
+        
+        Raises:
+            sqlite3.Error: Si falla la inserción del lote
+        """
+        outcomes = []
+        rows = []
+        seen_upcs = set()
+        seen_titles = set()
+        
+        for book_data in books:
+            upc = book_data.get('upc')
+            titulo = book_data.get('titulo')
+            
+            if not titulo:
+                logger.error("No se puede insertar libro sin título")
+                outcomes.append(UPSERT_ERROR)
+                continue
+            
+            in_batch = upc in seen_upcs if upc else titulo in seen_titles
+            if in_batch or self._book_exists(cursor, upc=upc, titulo=titulo):
+                logger.info(f"Libro duplicado, omitiendo: {titulo}")
+                outcomes.append(INSERT_DUPLICATE)
+                continue
+            
+            if upc:
+                seen_upcs.add(upc)
+            seen_titles.add(titulo)
+            self._check_near_duplicates(cursor, book_data)
+            rows.append(book_row(book_data) + (self.run_id,))
+            outcomes.append(UPSERT_INSERTED)
+        
+        cursor.executemany(INSERT_BOOK_SQL, rows)
+        self._index_near_duplicates(cursor)
+        logger.info(f"Lote insertado: {len(rows)} libros nuevos de {len(outcomes)}")
+        return outcomes
+    
+    def upsert_book(self, book_data: Union[Book, Dict], verified_at: Optional[str] = None) -> str:
+        """
+        Inserta un libro nuevo o actualiza el existente (mismo UPC, o mismo título sin UPC).
+        Un libro con UPC también completa la fila con su mismo título guardada sin UPC.
+        Solo se sobrescriben los campos que vienen informados, de modo que un recrawl
+        básico no borra los detalles. Si algún campo cambia se incrementa 'cambios' y se
+        actualiza 'fecha_extraccion'; 'fecha_verificacion' pasa a la fecha de descarga
+        si es más reciente que la guardada.
+        
+        Args:
+            book_data: Registro Book o diccionario con los datos del libro
+            verified_at: Fecha de descarga de los datos (por defecto, el momento actual)
+        
+        Returns:
+            UPSERT_INSERTED, UPSERT_UPDATED, UPSERT_UNCHANGED o UPSERT_ERROR
+        """
+        try:
+            with self.get_connection() as conn:
+                return self.upsert_batch(conn.cursor(), [book_data], verified_at)[0]
+        except sqlite3.Error as e:
+            logger.error(f"Error al guardar libro '{book_data.get('titulo')}': {e}")
+            return UPSERT_ERROR
+    
+    def upsert_batch(
+        self,
+        cursor: sqlite3.Cursor,
+        books: Iterable[Union[Book, Dict]],
+        verified_at: Optional[str] = None
+    ) -> List[str]:
+        """
+        Inserta o actualiza un lote de libros con un cursor ya abierto, sin hacer commit
+        (mismas reglas que upsert_book). Lo usa el re-parseo para guardar todo el archivo
+        en una sola transacción. Un error en un libro solo afecta a ese libro.
+        
+        Args:
+            cursor: Cursor de la conexión activa
+            books: Registros Book o diccionarios con los datos de los libros
+            verified_at: Fecha de descarga de los datos (por defecto, el momento actual)
+        
+        Returns:
+            Resultado por libro: UPSERT_INSERTED, UPSERT_UPDATED, UPSERT_UNCHANGED o UPSERT_ERROR
+        """
+        outcomes = []
+        for book_data in books:
+            try:
+                outcomes.append(self._upsert(cursor, book_data, verified_at))
+            except sqlite3.Error as e:
+                logger.error(f"Error al guardar libro '{book_data.get('titulo')}': {e}")
+                outcomes.append(UPSERT_ERROR)
+        self._index_near_duplicates(cursor)
+        return outcomes
+    
+    def _upsert(self, cursor: sqlite3.Cursor, book_data: Union[Book, Dict], verified_at: Optional[str]) -> str:
+        """
+        Inserta o actualiza un libro con el cursor indicado (ver upsert_book).
+        
+        Args:
+            cursor: Cursor de la conexión activa
+            book_data: Registro Book o diccionario con los datos del libro
+            verified_at: Fecha de descarga de los datos (None = momento actual)
+        
+        Returns:
+            UPSERT_INSERTED, UPSERT_UPDATED, UPSERT_UNCHANGED o UPSERT_ERROR
+        
+        Raises:
+            sqlite3.Error: Si falla la escritura del libro
+        """
+        upc = book_data.get('upc')
+        titulo = book_data.get('titulo')
+        
+        if not titulo:
+            logger.error("No se puede guardar libro sin título")
+            return UPSERT_ERROR
+        
+        row = book_row(book_data)
+        new_values = dict(zip(BOOK_FIELDS, row))
+        
+        existing = None
+        if upc:
+            cursor.execute("SELECT * FROM libros WHERE upc = ? LIMIT 1", (upc,))
+            existing = cursor.fetchone()
+            if existing is None:
+                # El mismo libro puede estar guardado solo con info básica (sin UPC)
+                cursor.execute(
+                    "SELECT * FROM libros WHERE titulo = ? AND upc IS NULL LIMIT 1", (titulo,)
+                )
+                existing = cursor.fetchone()
+        else:
+            cursor.execute("SELECT * FROM libros WHERE titulo = ? LIMIT 1", (titulo,))
+            existing = cursor.fetchone()
+        
+        if existing is None:
+            self._check_near_duplicates(cursor, book_data)
+            cursor.execute(INSERT_BOOK_SQL, row + (self.run_id,))
+            logger.info(f"Libro insertado exitosamente: {titulo}")
+            return UPSERT_INSERTED
+        
+        updates = {
+            field: value for field, value in new_values.items()
+            if value is not None and existing[field] != value
+        }
+        changed = any(field in CONTENT_FIELDS for field in updates)
+        
+        assignments = [f"{field} = ?" for field in updates]
+        params = list(updates.values())
+        # La fecha de verificación nunca retrocede: re-parsear un archivo antiguo no
+        # debe hacer que un libro verificado después vuelva a parecer pendiente
+        assignments.append(
+            "fecha_verificacion = MAX(COALESCE(fecha_verificacion, ''), COALESCE(?, CURRENT_TIMESTAMP))"
+        )
+        params.append(verified_at)
+        if changed:
+            assignments.append("cambios = cambios + 1")
+            assignments.append("fecha_extraccion = COALESCE(?, CURRENT_TIMESTAMP)")
+            params.append(verified_at)
+        if updates and self.run_id is not None:
+            assignments.append("ejecucion_id = ?")
+            params.append(self.run_id)
+        params.append(existing['id'])
+        
+        cursor.execute(f"UPDATE libros SET {', '.join(assignments)} WHERE id = ?", params)
+        
+        if changed:
+            logger.info(f"Libro actualizado ({', '.join(updates)}): {titulo}")
+            return UPSERT_UPDATED
+        logger.debug(f"Libro sin cambios: {titulo}")
+        return UPSERT_UNCHANGED
+    
+    def get_stale_books(self, limit: int, min_age_hours: float = 0) -> List[Dict]:
+        """
+        Obtiene los libros con mayor prioridad de recrawl.
+        La prioridad es la antigüedad desde la última verificación multiplicada por
+        (1 + cambios), de modo que los libros que cambian a menudo se revisan antes.
+        
+        Args:
+            limit: Número máximo de libros a retornar
+            min_age_hours: Antigüedad mínima (horas) desde la última verificación
+        
+        Returns:
+            Lista de diccionarios con id, titulo, url_detalle, cambios y prioridad
+        """
+        query = """
+        SELECT id, titulo, url_detalle, cambios,
+               (julianday('now') - julianday(COALESCE(fecha_verificacion, fecha_extraccion))) * 24
+                   AS antiguedad_horas
+        FROM libros
+        WHERE url_detalle IS NOT NULL
+          AND (julianday('now') - julianday(COALESCE(fecha_verificacion, fecha_extraccion))) * 24 >= ?
+        ORDER BY antiguedad_horas * (1 + cambios) DESC
+        LIMIT ?
+        """
+        
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(query, (min_age_hours, limit))
+                return [
+                    {
+                        'id': row['id'],
+                        'titulo': row['titulo'],
+                        'url_detalle': row['url_detalle'],
+                        'cambios': row['cambios'],
+                        'prioridad': row['antiguedad_horas'] * (1 + row['cambios'])
+                    }
+                    for row in cursor.fetchall()
+                ]
+        except sqlite3.Error as e:
+            logger.error(f"Error al obtener libros pendientes de recrawl: {e}")
+            return []
+    
+    def get_incomplete_books(self, limit: int) -> List[Dict]:
+        """
+        Obtiene libros a los que les falta descripción, UPC o categoría.
+        Los libros verificados hace menos tiempo quedan al final, para que un libro
+        que falla repetidamente no bloquee el avance del backfill.
+        
+        Args:
+            limit: Número máximo de libros a retornar
+        
+        Returns:
+            Lista de diccionarios con id, titulo y url_detalle
+        """
+        query = """
+        SELECT id, titulo, url_detalle
+        FROM libros
+        WHERE descripcion IS NULL OR upc IS NULL OR categoria IS NULL
+        ORDER BY fecha_verificacion IS NOT NULL, fecha_verificacion, id
+        LIMIT ?
+        """
+        
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(query, (limit,))
+                return [dict(row) for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            logger.error(f"Error al obtener libros incompletos: {e}")
+            return []
+    
+    def set_detail_urls(self, urls_by_id: Dict[int, str]) -> int:
+        """
+        Guarda las URLs de detalle reconstruidas para libros que no la tenían.
+        
+        Args:
+            urls_by_id: Diccionario {id del libro: URL de detalle}
+        
+        Returns:
+            Número de libros actualizados
+        """
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                version = data_version(cursor)
+                cursor.executemany(
+                    "UPDATE libros SET url_detalle = ?, ejecucion_id = COALESCE(?, ejecucion_id) WHERE id = ?",
+                    [(url, self.run_id, book_id) for book_id, url in urls_by_id.items()]
+                )
+                return data_version(cursor) - version
+        except sqlite3.Error as e:
+            logger.error(f"Error al guardar URLs de detalle: {e}")
+            return 0
+    
+    def update_book_details(self, details_by_id: Dict[int, Optional[Dict]]) -> int:
+        """
+        Actualiza en bloque (una transacción) los detalles de varios libros.
+        Solo rellena los campos que vienen informados; un valor None (página no
+        disponible) solo actualiza la fecha de verificación. Si el UPC ya pertenece
+        a otro libro, se guardan el resto de detalles sin el UPC.
+        
+        Args:
+            details_by_id: Diccionario {id del libro: detalles o None}
+        
+        Returns:
+            Número de libros completados con algún detalle
+        """
+        update_sql = """
+        UPDATE OR IGNORE libros SET
+            descripcion = COALESCE(?, descripcion),
+            upc = COALESCE(?, upc),
+            categoria = COALESCE(?, categoria),
+            fecha_verificacion = CURRENT_TIMESTAMP,
+            ejecucion_id = COALESCE(?, ejecucion_id)
+        WHERE id = ?
+        """
+        completed = 0
+        
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                for book_id, details in details_by_id.items():
+                    details = details or {}
+                    descripcion = details.get('descripcion')
+                    upc = details.get('upc')
+                    categoria = details.get('categoria')
+                    
+                    # Solo los libros completados con algún detalle pasan a la ejecución en curso
+                    run_id = self.run_id if descripcion or upc or categoria else None
+                    if upc:
+                        cursor.execute(
+                            f"SELECT 1 FROM {STORAGE_TABLE} WHERE upc = ? AND id != ?", (upc, book_id)
+                        )
+                        if cursor.fetchone() is not None:
+                            logger.warning(f"UPC {upc} ya pertenece a otro libro, se omite para id {book_id}")
+                            upc = None
+                    cursor.execute(update_sql, (descripcion, upc, categoria, run_id, book_id))
+                    
+                    if descripcion or upc or categoria:
+                        completed += 1
+                self._index_near_duplicates(cursor)
+                return completed
+        except sqlite3.Error as e:
+            logger.error(f"Error al actualizar detalles en bloque: {e}")
+            return 0
+    
     def get_book_count(self) -> int:
         """
         Obtiene el número total de libros en la base de datos.
@@ -185,3 +1236,154 @@ class DatabaseManager:
         except sqlite3.Error as e:
             logger.error(f"Error al obtener conteo de libros: {e}")
             return 0
+    
+    def create_snapshot(
+        self,
+        snapshot_dir: str = SNAPSHOT_DIR,
+        keep: int = SNAPSHOT_KEEP,
+        vacuum: bool = False,
+        pages_per_step: int = SNAPSHOT_PAGES_PER_STEP,
+        step_pause: float = SNAPSHOT_STEP_PAUSE
+    ) -> Dict:
+        """
+        Crea una copia consistente de la base de datos mientras el crawler sigue escribiendo.
+        Con la API de backup online se copian 'pages_per_step' páginas por paso con una
+        pausa entre pasos, de modo que el crawler nunca espera más de un paso. Con
+        vacuum=True se usa VACUUM INTO, que genera una copia compactada (sin páginas
+        libres, con tablas e índices contiguos) en una única transacción de lectura.
+        La copia se escribe en un archivo temporal, se verifica, queda en modo de
+        journal DELETE (los consumidores no necesitan el archivo -wal) y se publica
+        con su checksum SHA-256. Después se conservan solo los 'keep' más recientes.
+        
+        Args:
+            snapshot_dir: Directorio de snapshots
+            keep: Número de snapshots a conservar
+            vacuum: Si se genera una copia compactada con VACUUM INTO
+            pages_per_step: Páginas copiadas por paso del backup
+            step_pause: Segundos de pausa entre pasos del backup
+        
+        Returns:
+            Diccionario con ruta, sha256, bytes, pasos y snapshots eliminados
+        """
+        os.makedirs(snapshot_dir, exist_ok=True)
+        path = snapshot_path(snapshot_dir)
+        tmp_path = path + '.tmp'
+        
+        try:
+            source = sqlite3.connect(self.db_path)
+            try:
+                if vacuum:
+                    source.execute("VACUUM INTO ?", (tmp_path,))
+                    steps = 1
+                else:
+                    try:
+                        steps = _backup(source, tmp_path, pages_per_step, step_pause)
+                    except _BackupRestarted:
+                        # Con escrituras continuas el backup por pasos vuelve a empezar una y
+                        # otra vez; en un solo paso la lectura es consistente (en modo WAL
+                        # tampoco bloquea al crawler)
+                        logger.warning(
+                            f"Backup reiniciado {SNAPSHOT_MAX_RESTARTS} veces por escrituras "
+                            f"concurrentes, se copia en un solo paso"
+                        )
+                        os.remove(tmp_path)
+                        steps = _backup(source, tmp_path, -1, 0)
+            finally:
+                source.close()
+            
+            target = sqlite3.connect(tmp_path)
+            try:
+                target.execute("PRAGMA journal_mode=DELETE")
+                result = target.execute("PRAGMA quick_check").fetchone()[0]
+            finally:
+                target.close()
+            if result != 'ok':
+                raise sqlite3.DatabaseError(f"Snapshot inconsistente ({result})")
+            
+            os.replace(tmp_path, path)
+            checksum = write_checksum(path)
+        except (sqlite3.Error, OSError) as e:
+            logger.error(f"Error al crear el snapshot {path}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        
+        removed = rotate_snapshots(snapshot_dir, keep)
+        size = os.path.getsize(path)
+        logger.info(
+            f"Snapshot creado: {path} ({size / 1024:.1f} KiB, {steps} pasos"
+            f"{', compactado' if vacuum else ''}, sha256 {checksum[:12]}...)"
+        )
+        return {
+            'ruta': path,
+            'sha256': checksum,
+            'bytes': size,
+            'pasos': steps,
+            'eliminados': removed
+        }
+    
+    def _file_size(self) -> int:
+        """
+        Calcula el tamaño en disco de la base de datos, incluido el archivo -wal.
+        
+        Returns:
+            Tamaño en bytes
+        """
+        return sum(
+            os.path.getsize(path)
+            for path in (self.db_path, self.db_path + '-wal')
+            if os.path.exists(path)
+        )
+    
+    def prune_history(self, days: int = RUN_RETENTION_DAYS) -> Dict:
+        """
+        Elimina las ejecuciones iniciadas hace más de 'days' días y compacta la base
+        de datos. Los libros conservan sus datos; solo pierden el vínculo con la
+        ejecución eliminada. Después se ejecuta VACUUM (devuelve al sistema las páginas
+        libres), PRAGMA optimize y un checkpoint que trunca el archivo -wal.
+        
+        Args:
+            days: Días de historial conservados
+        
+        Returns:
+            Diccionario con ejecuciones eliminadas, libros desvinculados y bytes antes y después
+        """
+        size_before = self._file_size()
+        cutoff = f"-{days} days"
+        
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                # La ejecución en curso de este gestor nunca se elimina
+                old_runs = """
+                    SELECT id FROM ejecuciones
+                    WHERE inicio < datetime('now', ?) AND id != COALESCE(?, 0)
+                """
+                version = data_version(cursor)
+                cursor.execute(
+                    f"UPDATE {STORAGE_TABLE} SET ejecucion_id = NULL WHERE ejecucion_id IN ({old_runs})",
+                    (cutoff, self.run_id)
+                )
+                unlinked = data_version(cursor) - version
+                cursor.execute(f"DELETE FROM ejecuciones WHERE id IN ({old_runs})", (cutoff, self.run_id))
+                removed = cursor.rowcount
+            
+            with self.get_connection() as conn:
+                conn.execute("VACUUM")
+                conn.execute("PRAGMA optimize")
+                conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        except sqlite3.Error as e:
+            logger.error(f"Error al aplicar la retención del historial: {e}")
+            raise
+        
+        size_after = self._file_size()
+        logger.info(
+            f"Retención de {days} días: {removed} ejecuciones eliminadas, {unlinked} libros "
+            f"desvinculados, {size_before / 1024:.1f} KiB -> {size_after / 1024:.1f} KiB"
+        )
+        return {
+            'ejecuciones': removed,
+            'desvinculados': unlinked,
+            'bytes_antes': size_before,
+            'bytes_despues': size_after
+        }
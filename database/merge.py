@@ -0,0 +1,297 @@
+"""
+Módulo de fusión de bases de datos.
+Combina en una base de datos destino las bases generadas por scrapers
+independientes (una por nodo), usando SQL por conjuntos sobre bases adjuntas.
+"""
+
+import os
+import sqlite3
+from typing import Dict, Iterable
+from database.db_manager import DatabaseManager, data_version
+from models.book import BOOK_FIELDS
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Columnas copiadas desde las bases de origen
+MERGE_COLUMNS = BOOK_FIELDS + ('fecha_extraccion', 'fecha_verificacion', 'cambios')
+
+# Valor por defecto de las columnas que pueden faltar en bases antiguas
+_MISSING_DEFAULTS = {'cambios': '0'}
+
+
+def _completeness_sql(alias: str) -> str:
+    """
+    Genera la expresión SQL que cuenta los campos informados de una fila.
+    
+    Args:
+        alias: Alias o nombre de la tabla de la fila
+    
+    Returns:
+        Expresión SQL con el número de campos no nulos
+    """
+    return ' + '.join(f"({alias}.{field} IS NOT NULL)" for field in BOOK_FIELDS)
+
+
+def _is_better_sql(candidate: str, current: str) -> str:
+    """
+    Genera la condición SQL "el candidato es mejor que la fila actual":
+    más campos informados o, a igualdad, extracción más reciente.
+    
+    Args:
+        candidate: Alias de la fila candidata
+        current: Alias de la fila actual
+    
+    Returns:
+        Condición SQL
+    """
+    return f"""(
+        ({_completeness_sql(candidate)}) > ({_completeness_sql(current)})
+        OR (({_completeness_sql(candidate)}) = ({_completeness_sql(current)})
+            AND COALESCE({candidate}.fecha_extraccion, '') > COALESCE({current}.fecha_extraccion, ''))
+    )"""
+
+
+def _merge_where_sql(match_condition: str) -> str:
+    """
+    Genera la condición de las filas que fusiona _merge_update_sql: coinciden con
+    un candidato y este es mejor o rellena algún campo vacío.
+    
+    Args:
+        match_condition: Condición SQL que empareja libros con candidatos (alias f)
+    
+    Returns:
+        Condición SQL
+    """
+    fills_gap = ' OR '.join(
+        f"(libros.{field} IS NULL AND f.{field} IS NOT NULL)" for field in BOOK_FIELDS
+    )
+    return f"{match_condition} AND ({_is_better_sql('f', 'libros')} OR {fills_gap})"
+
+
+def _matched_ids_sql(match_condition: str) -> str:
+    """
+    Genera el INSERT que guarda en temp.fusionados los ids que va a modificar
+    _merge_update_sql. Un libro que modifican las dos actualizaciones (por UPC y
+    por título) se cuenta una sola vez.
+    
+    Args:
+        match_condition: Condición SQL que empareja libros con candidatos (alias f)
+    
+    Returns:
+        Sentencia SQL
+    """
+    return f"""
+    INSERT OR IGNORE INTO temp.fusionados (id)
+    SELECT libros.id FROM libros, candidatos AS f
+    WHERE {_merge_where_sql(match_condition)}
+    """
+
+
+def _merge_update_sql(match_condition: str) -> str:
+    """
+    Genera el UPDATE ... FROM que fusiona los candidatos con las filas coincidentes.
+    Si el candidato es mejor, sus valores tienen prioridad; si no, solo rellena los
+    campos vacíos de la fila actual. Las filas sin nada que aportar no se tocan.
+    Las filas actualizadas pasan a la ejecución del parámetro :ejecucion (si no es NULL).
+    
+    Args:
+        match_condition: Condición SQL que empareja libros con candidatos (alias f)
+    
+    Returns:
+        Sentencia SQL
+    """
+    better = _is_better_sql('f', 'libros')
+    assignments = [
+        f"{field} = CASE WHEN {better} THEN COALESCE(f.{field}, libros.{field}) "
+        f"ELSE COALESCE(libros.{field}, f.{field}) END"
+        for field in BOOK_FIELDS
+    ]
+    assignments += [
+        f"fecha_extraccion = CASE WHEN {better} THEN f.fecha_extraccion ELSE libros.fecha_extraccion END",
+        "fecha_verificacion = NULLIF(MAX(COALESCE(libros.fecha_verificacion, ''), "
+        "COALESCE(f.fecha_verificacion, '')), '')",
+        "cambios = MAX(libros.cambios, f.cambios)",
+        "ejecucion_id = COALESCE(:ejecucion, libros.ejecucion_id)"
+    ]
+    return f"""
+    UPDATE libros SET {', '.join(assignments)}
+    FROM candidatos AS f
+    WHERE {_merge_where_sql(match_condition)}
+    """
+
+
+# Libros con el mismo UPC
+_MATCH_BY_UPC = "f.upc IS NOT NULL AND libros.upc = f.upc"
+
+# Libros con el mismo título: cualquier fila si el candidato no tiene UPC (como
+# book_exists), o una fila sin UPC si el candidato tiene un UPC aún no guardado
+_MATCH_BY_TITLE = """
+    libros.titulo = f.titulo
+    AND (
+        f.upc IS NULL
+        OR (libros.upc IS NULL
+            AND NOT EXISTS (SELECT 1 FROM main.libros AS u WHERE u.upc = f.upc))
+    )
+"""
+
+_INSERT_NEW_SQL = f"""
+INSERT INTO libros ({', '.join(MERGE_COLUMNS)}, ejecucion_id)
+SELECT {', '.join(f'f.{column}' for column in MERGE_COLUMNS)}, :ejecucion
+FROM candidatos AS f
+WHERE NOT EXISTS (
+    SELECT 1 FROM main.libros AS t
+    WHERE (f.upc IS NOT NULL AND t.upc = f.upc)
+       OR (t.titulo = f.titulo AND (f.upc IS NULL OR t.upc IS NULL))
+)
+ORDER BY f.fecha_extraccion, f.titulo
+"""
+
+
+def _candidates_sql(source_columns: Iterable[str]) -> str:
+    """
+    Genera el SQL que selecciona la mejor fila de cada libro de la base de origen.
+    Un libro se identifica por UPC o, si no tiene, por título; dentro de cada grupo
+    se queda la fila más completa y, a igualdad, la más reciente.
+    
+    Args:
+        source_columns: Columnas presentes en la tabla libros de origen
+    
+    Returns:
+        Sentencia CREATE TEMP TABLE
+    """
+    source_columns = set(source_columns)
+    select_columns = []
+    for column in MERGE_COLUMNS:
+        if column == 'upc':
+            select_columns.append("NULLIF(upc, '') AS upc")
+        elif column in source_columns:
+            select_columns.append(column)
+        else:
+            select_columns.append(f"{_MISSING_DEFAULTS.get(column, 'NULL')} AS {column}")
+    
+    return f"""
+    CREATE TEMP TABLE candidatos AS
+    SELECT {', '.join(MERGE_COLUMNS)}
+    FROM (
+        SELECT *, ROW_NUMBER() OVER (
+            PARTITION BY COALESCE('upc:' || upc, 'titulo:' || titulo)
+            ORDER BY ({_completeness_sql('origen')}) DESC,
+                     COALESCE(fecha_extraccion, '') DESC
+        ) AS orden
+        FROM (
+            SELECT {', '.join(select_columns)}
+            FROM fuente.libros
+            WHERE titulo IS NOT NULL AND titulo != ''
+        ) AS origen
+    )
+    WHERE orden = 1
+    """
+
+
+def merge_database(db_manager: DatabaseManager, source_path: str) -> Dict[str, int]:
+    """
+    Fusiona una base de datos de origen en la base del gestor, en una transacción.
+    Se adjunta la base de origen y se fusiona con tres sentencias por conjuntos:
+    actualización por UPC, actualización por título e inserción de libros nuevos.
+    
+    Args:
+        db_manager: Gestor de la base de datos destino
+        source_path: Ruta a la base de datos de origen
+    
+    Returns:
+        Diccionario con leidos, insertados, actualizados y omitidos
+    """
+    stats = {'leidos': 0, 'insertados': 0, 'actualizados': 0, 'omitidos': 0}
+    
+    if not os.path.isfile(source_path):
+        logger.error(f"Base de datos de origen no encontrada: {source_path}")
+        return stats
+    if os.path.abspath(source_path) == os.path.abspath(db_manager.db_path):
+        logger.warning(f"La base de origen es la propia base destino, se omite: {source_path}")
+        return stats
+    
+    with db_manager.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("ATTACH DATABASE ? AS fuente", (source_path,))
+        try:
+            cursor.execute("PRAGMA fuente.table_info(libros)")
+            source_columns = [row['name'] for row in cursor.fetchall()]
+            if not source_columns:
+                logger.warning(f"La base {source_path} no tiene tabla 'libros', se omite")
+                return stats
+            
+            cursor.execute("DROP TABLE IF EXISTS temp.candidatos")
+            cursor.execute(_candidates_sql(source_columns))
+            # Un libro sin UPC cuyo título tiene una fila con UPC en el mismo origen
+            # es la versión básica de esa fila: basta con la más completa
+            cursor.execute("""
+                DELETE FROM candidatos
+                WHERE upc IS NULL
+                  AND titulo IN (SELECT titulo FROM candidatos WHERE upc IS NOT NULL)
+            """)
+            cursor.execute("CREATE INDEX temp.idx_candidatos_upc ON candidatos (upc)")
+            cursor.execute("CREATE INDEX temp.idx_candidatos_titulo ON candidatos (titulo)")
+            
+            cursor.execute("SELECT COUNT(*) FROM fuente.libros")
+            stats['leidos'] = cursor.fetchone()[0]
+            cursor.execute("SELECT COUNT(*) FROM candidatos")
+            candidates = cursor.fetchone()[0]
+            
+            # Los ids se recogen antes de cada actualización, con el mismo estado que ella
+            # ve, para contar una sola vez los libros que modifican las dos
+            run = {'ejecucion': db_manager.run_id}
+            cursor.execute("DROP TABLE IF EXISTS temp.fusionados")
+            cursor.execute("CREATE TEMP TABLE fusionados (id INTEGER PRIMARY KEY)")
+            for match_condition in (_MATCH_BY_UPC, _MATCH_BY_TITLE):
+                cursor.execute(_matched_ids_sql(match_condition))
+                cursor.execute(_merge_update_sql(match_condition), run)
+            cursor.execute("SELECT COUNT(*) FROM temp.fusionados")
+            stats['actualizados'] = cursor.fetchone()[0]
+            
+            # 'libros' es una vista: las filas insertadas se cuentan con la versión de datos
+            version = data_version(cursor)
+            cursor.execute(_INSERT_NEW_SQL, run)
+            stats['insertados'] = data_version(cursor) - version
+            stats['omitidos'] = max(0, stats['leidos'] - stats['insertados'] - stats['actualizados'])
+            
+            cursor.execute("DROP TABLE temp.candidatos")
+            cursor.execute("DROP TABLE temp.fusionados")
+            conn.commit()
+            logger.info(
+                f"Fusionada {source_path}: {stats['leidos']} leídos, {candidates} únicos, "
+                f"{stats['insertados']} insertados, {stats['actualizados']} actualizados"
+            )
+            return stats
+        finally:
+            conn.rollback()
+            cursor.execute("DETACH DATABASE fuente")
+
+
+def merge_databases(db_manager: DatabaseManager, source_paths: Iterable[str]) -> Dict[str, int]:
+    """
+    Fusiona varias bases de datos de origen en la base del gestor, una tras otra.
+    Una base que falla no impide fusionar las siguientes.
+    
+    Args:
+        db_manager: Gestor de la base de datos destino
+        source_paths: Rutas a las bases de datos de origen
+    
+    Returns:
+        Diccionario con fuentes, errores, leidos, insertados, actualizados y omitidos
+    """
+    totals = {'fuentes': 0, 'errores': 0, 'leidos': 0, 'insertados': 0, 'actualizados': 0, 'omitidos': 0}
+    
+    for source_path in source_paths:
+        try:
+            stats = merge_database(db_manager, source_path)
+        except sqlite3.Error as e:
+            logger.error(f"Error al fusionar {source_path}: {e}")
+            totals['errores'] += 1
+            continue
+        
+        totals['fuentes'] += 1
+        for key, value in stats.items():
+            totals[key] += value
+    
+    return totals
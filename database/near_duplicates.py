@@ -0,0 +1,426 @@
+"""
+Módulo de detección de libros casi duplicados.
+Mantiene firmas MinHash de título y descripción con bandas LSH en la propia base
+de datos, de modo que buscar casi duplicados cuesta lo mismo sea cual sea el
+tamaño del catálogo y el informe completo escala de forma aproximadamente lineal.
+"""
+
+import hashlib
+import re
+import sqlite3
+import struct
+import unicodedata
+import zlib
+from functools import lru_cache
+from itertools import combinations
+from typing import Dict, FrozenSet, List, Optional, Sequence, Tuple
+from config import NEAR_DUP_BANDS, NEAR_DUP_NUM_PERM, NEAR_DUP_THRESHOLD
+from database.schema import STORAGE_TABLE
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Campos indexados y tamaño de sus shingles: n-gramas de caracteres para el
+# título (corto) y de palabras para la descripción (larga)
+FIELD_TITLE = 'titulo'
+FIELD_DESCRIPTION = 'descripcion'
+SHINGLE_SIZES = {FIELD_TITLE: 3, FIELD_DESCRIPTION: 3}
+
+# Sufijo de serie al final del título, p. ej. "(The Fine Art of Pretending #2)"
+_SERIES_SUFFIX = re.compile(r'\s*\([^()]*#\s*\d+[^()]*\)\s*$')
+_NON_ALNUM = re.compile(r'[^a-z0-9]+')
+
+# Libros indexados en cada pasada de index_pending
+INDEX_CHUNK_SIZE = 500
+
+# Firmas recientes en memoria: la comprobación al insertar y la indexación
+# posterior del mismo libro calculan la firma una sola vez
+SIGNATURE_CACHE_SIZE = 1024
+
+
+def normalize_text(text: str, field: str = FIELD_DESCRIPTION) -> str:
+    """
+    Normaliza un texto para compararlo: minúsculas, sin acentos ni puntuación.
+    En los títulos se elimina además el sufijo de serie.
+    
+    Args:
+        text: Texto original
+        field: Campo al que pertenece el texto
+    
+    Returns:
+        Texto normalizado con palabras separadas por un espacio
+    """
+    if field == FIELD_TITLE:
+        text = _SERIES_SUFFIX.sub('', text)
+    text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('ascii')
+    return _NON_ALNUM.sub(' ', text.lower()).strip()
+
+
+def shingles(text: Optional[str], field: str) -> FrozenSet[str]:
+    """
+    Obtiene el conjunto de shingles de un campo.
+    
+    Args:
+        text: Texto del campo (puede ser None)
+        field: FIELD_TITLE (n-gramas de caracteres) o FIELD_DESCRIPTION (de palabras)
+    
+    Returns:
+        Conjunto de shingles (vacío si no hay texto)
+    """
+    if not text:
+        return frozenset()
+    
+    normalized = normalize_text(text, field)
+    size = SHINGLE_SIZES[field]
+    if field == FIELD_TITLE:
+        units = normalized
+        joiner = ''
+    else:
+        units = normalized.split()
+        joiner = ' '
+    
+    if not units:
+        return frozenset()
+    if len(units) <= size:
+        return frozenset([joiner.join(units)])
+    return frozenset(joiner.join(units[i:i + size]) for i in range(len(units) - size + 1))
+
+
+def minhash_signature(shingle_set: FrozenSet[str], num_perm: int) -> Optional[Tuple[int, ...]]:
+    """
+    Calcula la firma MinHash de un conjunto de shingles.
+    Una sola llamada a SHAKE-128 por shingle produce sus num_perm valores de 32 bits
+    (uno por función hash), y el mínimo por posición se calcula con zip/min en C,
+    evitando el bucle Python de shingles x permutaciones. Es determinista entre
+    ejecuciones y procesos, por lo que las firmas guardadas siguen siendo comparables.
+    
+    Args:
+        shingle_set: Conjunto de shingles
+        num_perm: Número de funciones hash (valores de la firma)
+    
+    Returns:
+        Tupla con el mínimo de cada función hash, o None si el conjunto está vacío
+    """
+    if not shingle_set:
+        return None
+    
+    row_format = f'<{num_perm}I'
+    digest_size = struct.calcsize(row_format)
+    rows = [
+        struct.unpack(row_format, hashlib.shake_128(shingle.encode('utf-8')).digest(digest_size))
+        for shingle in shingle_set
+    ]
+    return tuple(map(min, zip(*rows)))
+
+
+def estimate_similarity(signature_a: Sequence[int], signature_b: Sequence[int]) -> float:
+    """
+    Estima la similitud de Jaccard como la fracción de posiciones iguales de dos firmas.
+    
+    Args:
+        signature_a: Primera firma
+        signature_b: Segunda firma
+    
+    Returns:
+        Similitud estimada entre 0 y 1
+    """
+    if not signature_a or len(signature_a) != len(signature_b):
+        return 0.0
+    matches = sum(1 for a, b in zip(signature_a, signature_b) if a == b)
+    return matches / len(signature_a)
+
+
+class NearDuplicateIndex:
+    """Índice MinHash/LSH de títulos y descripciones guardado junto a la tabla libros."""
+    
+    def __init__(self, db_manager, num_perm: int = NEAR_DUP_NUM_PERM, bands: int = NEAR_DUP_BANDS,
+                 threshold: float = NEAR_DUP_THRESHOLD):
+        """
+        Inicializa el índice y crea sus tablas si no existen.
+        
+        Args:
+            db_manager: Gestor de la base de datos que contiene la tabla libros
+            num_perm: Funciones hash por firma
+            bands: Bandas LSH (num_perm debe ser múltiplo de bands)
+            threshold: Similitud estimada mínima para considerar un casi duplicado
+        """
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) debe ser múltiplo de bands ({bands})")
+        
+        self.db_manager = db_manager
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows_per_band = num_perm // bands
+        self.threshold = threshold
+        self.signature_format = f'<{num_perm}I'
+        self.signatures = lru_cache(maxsize=SIGNATURE_CACHE_SIZE)(self._signatures)
+        self.create_tables()
+    
+    def create_tables(self) -> None:
+        """
+        Crea las tablas de firmas, bandas y libros pendientes de indexar, y los
+        triggers que marcan como pendiente cada libro insertado o modificado.
+        Si la tabla de pendientes no existía, se marcan todos los libros actuales.
+        """
+        create_sql = f"""
+        CREATE TABLE IF NOT EXISTS minhash_firmas (
+            libro_id INTEGER NOT NULL,
+            campo TEXT NOT NULL,
+            firma BLOB NOT NULL,
+            PRIMARY KEY (libro_id, campo)
+        );
+        CREATE TABLE IF NOT EXISTS minhash_bandas (
+            campo TEXT NOT NULL,
+            banda INTEGER NOT NULL,
+            hash INTEGER NOT NULL,
+            libro_id INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_minhash_bandas ON minhash_bandas (campo, banda, hash);
+        CREATE INDEX IF NOT EXISTS idx_minhash_bandas_libro ON minhash_bandas (libro_id);
+        CREATE TRIGGER IF NOT EXISTS trg_minhash_insert AFTER INSERT ON {STORAGE_TABLE}
+        BEGIN
+            INSERT OR IGNORE INTO minhash_pendientes (libro_id) VALUES (NEW.id);
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_minhash_update AFTER UPDATE OF titulo, descripcion ON {STORAGE_TABLE}
+        WHEN OLD.titulo IS NOT NEW.titulo OR OLD.descripcion IS NOT NEW.descripcion
+        BEGIN
+            INSERT OR IGNORE INTO minhash_pendientes (libro_id) VALUES (NEW.id);
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_minhash_delete AFTER DELETE ON {STORAGE_TABLE}
+        BEGIN
+            DELETE FROM minhash_firmas WHERE libro_id = OLD.id;
+            DELETE FROM minhash_bandas WHERE libro_id = OLD.id;
+            DELETE FROM minhash_pendientes WHERE libro_id = OLD.id;
+        END;
+        """
+        
+        try:
+            with self.db_manager.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'minhash_pendientes'"
+                )
+                pending_existed = cursor.fetchone() is not None
+                cursor.execute(
+                    "CREATE TABLE IF NOT EXISTS minhash_pendientes (libro_id INTEGER PRIMARY KEY)"
+                )
+                cursor.executescript(create_sql)
+                
+                if not pending_existed:
+                    cursor.execute("INSERT OR IGNORE INTO minhash_pendientes (libro_id) SELECT id FROM libros")
+                    if cursor.rowcount > 0:
+                        logger.info(f"Índice de casi duplicados nuevo: {cursor.rowcount} libros pendientes")
+            logger.info("Índice de casi duplicados verificado/creado exitosamente")
+        except sqlite3.Error as e:
+            logger.error(f"Error al crear el índice de casi duplicados: {e}")
+            raise
+    
+    def _signatures(self, titulo: Optional[str], descripcion: Optional[str]) -> Dict[str, Tuple[int, ...]]:
+        """
+        Calcula las firmas MinHash de los campos informados de un libro.
+        Se usa a través de self.signatures, que guarda las firmas recientes en caché.
+        
+        Args:
+            titulo: Título del libro
+            descripcion: Descripción del libro
+        
+        Returns:
+            Diccionario {campo: firma} (sin los campos vacíos)
+        """
+        signatures = {}
+        for field, text in ((FIELD_TITLE, titulo), (FIELD_DESCRIPTION, descripcion)):
+            signature = minhash_signature(shingles(text, field), self.num_perm)
+            if signature is not None:
+                signatures[field] = signature
+        return signatures
+    
+    def band_hashes(self, signature: Sequence[int]) -> List[int]:
+        """
+        Divide una firma en bandas y calcula el hash de cada una.
+        
+        Args:
+            signature: Firma MinHash
+        
+        Returns:
+            Lista con un hash por banda
+        """
+        rows = self.rows_per_band
+        return [
+            zlib.crc32(struct.pack(f'<{rows}I', *signature[band * rows:(band + 1) * rows]))
+            for band in range(self.bands)
+        ]
+    
+    def _load_signature(self, blob: bytes) -> Optional[Tuple[int, ...]]:
+        """
+        Decodifica una firma guardada (None si se guardó con otro tamaño de firma).
+        
+        Args:
+            blob: Firma serializada
+        
+        Returns:
+            Firma como tupla de enteros
+        """
+        if len(blob) != struct.calcsize(self.signature_format):
+            return None
+        return struct.unpack(self.signature_format, blob)
+    
+    def index_pending(self, cursor: sqlite3.Cursor) -> int:
+        """
+        Indexa los libros marcados como pendientes por los triggers, con un cursor
+        ya abierto y sin hacer commit. Lo llaman los métodos de inserción de
+        DatabaseManager al final de su transacción.
+        
+        Args:
+            cursor: Cursor de la conexión activa
+        
+        Returns:
+            Número de libros indexados
+        """
+        indexed = 0
+        while True:
+            cursor.execute("""
+                SELECT p.libro_id, l.titulo, l.descripcion
+                FROM minhash_pendientes AS p
+                LEFT JOIN libros AS l ON l.id = p.libro_id
+                LIMIT ?
+            """, (INDEX_CHUNK_SIZE,))
+            pending = cursor.fetchall()
+            if not pending:
+                return indexed
+            
+            ids = [(row[0],) for row in pending]
+            cursor.executemany("DELETE FROM minhash_firmas WHERE libro_id = ?", ids)
+            cursor.executemany("DELETE FROM minhash_bandas WHERE libro_id = ?", ids)
+            
+            signature_rows = []
+            band_rows = []
+            for book_id, titulo, descripcion in pending:
+                for field, signature in self.signatures(titulo, descripcion).items():
+                    signature_rows.append((book_id, field, struct.pack(self.signature_format, *signature)))
+                    band_rows.extend(
+                        (field, band, band_hash, book_id)
+                        for band, band_hash in enumerate(self.band_hashes(signature))
+                    )
+            
+            cursor.executemany(
+                "INSERT INTO minhash_firmas (libro_id, campo, firma) VALUES (?, ?, ?)", signature_rows
+            )
+            cursor.executemany(
+                "INSERT INTO minhash_bandas (campo, banda, hash, libro_id) VALUES (?, ?, ?, ?)", band_rows
+            )
+            cursor.executemany("DELETE FROM minhash_pendientes WHERE libro_id = ?", ids)
+            indexed += len(pending)
+            logger.debug(f"Índice de casi duplicados: {len(pending)} libros indexados")
+    
+    def find_similar(self, cursor: sqlite3.Cursor, titulo: Optional[str], descripcion: Optional[str] = None,
+                     exclude_id: Optional[int] = None) -> List[Dict]:
+        """
+        Busca libros indexados parecidos a un título/descripción. Solo se comparan
+        las firmas de los libros que comparten alguna banda LSH.
+        
+        Args:
+            cursor: Cursor de la conexión activa
+            titulo: Título del libro a buscar
+            descripcion: Descripción del libro a buscar (opcional)
+            exclude_id: Id de libro a excluir (el propio libro)
+        
+        Returns:
+            Lista de diccionarios con id, titulo, campo y similitud, de mayor a menor similitud
+        """
+        matches = {}
+        for field, signature in self.signatures(titulo, descripcion).items():
+            bands = list(enumerate(self.band_hashes(signature)))
+            conditions = ' OR '.join('(b.banda = ? AND b.hash = ?)' for _ in bands)
+            params = [field] + [value for band in bands for value in band]
+            cursor.execute(f"""
+                SELECT DISTINCT f.libro_id, f.firma
+                FROM minhash_bandas AS b
+                JOIN minhash_firmas AS f ON f.libro_id = b.libro_id AND f.campo = b.campo
+                WHERE b.campo = ? AND ({conditions})
+            """, params)
+            
+            for book_id, blob in cursor.fetchall():
+                if book_id == exclude_id:
+                    continue
+                similarity = estimate_similarity(signature, self._load_signature(blob) or ())
+                if similarity >= self.threshold and similarity > matches.get(book_id, (None, 0.0))[1]:
+                    matches[book_id] = (field, similarity)
+        
+        if not matches:
+            return []
+        
+        cursor.execute(
+            f"SELECT id, titulo FROM libros WHERE id IN ({', '.join('?' for _ in matches)})",
+            list(matches)
+        )
+        titles = {row[0]: row[1] for row in cursor.fetchall()}
+        similar = [
+            {'id': book_id, 'titulo': titles.get(book_id), 'campo': field, 'similitud': similarity}
+            for book_id, (field, similarity) in matches.items()
+        ]
+        similar.sort(key=lambda match: match['similitud'], reverse=True)
+        return similar
+    
+    def report(self, threshold: Optional[float] = None) -> List[Dict]:
+        """
+        Genera el informe de pares de casi duplicados de todo el catálogo.
+        Primero indexa los libros pendientes; después solo se comparan los pares
+        que comparten alguna banda LSH, en lugar de todos contra todos.
+        
+        Args:
+            threshold: Similitud estimada mínima (por defecto, la del índice)
+        
+        Returns:
+            Lista de diccionarios con id_a, titulo_a, id_b, titulo_b, campo y similitud
+        """
+        threshold = self.threshold if threshold is None else threshold
+        
+        try:
+            with self.db_manager.get_connection() as conn:
+                cursor = conn.cursor()
+                indexed = self.index_pending(cursor)
+                if indexed:
+                    logger.info(f"Índice de casi duplicados actualizado: {indexed} libros")
+                
+                pairs = {}
+                for field in (FIELD_TITLE, FIELD_DESCRIPTION):
+                    cursor.execute("""
+                        SELECT group_concat(libro_id)
+                        FROM minhash_bandas
+                        WHERE campo = ?
+                        GROUP BY banda, hash
+                        HAVING COUNT(*) > 1
+                    """, (field,))
+                    candidates = set()
+                    for (bucket,) in cursor.fetchall():
+                        ids = sorted(int(book_id) for book_id in bucket.split(','))
+                        candidates.update(combinations(ids, 2))
+                    if not candidates:
+                        continue
+                    
+                    cursor.execute("SELECT libro_id, firma FROM minhash_firmas WHERE campo = ?", (field,))
+                    signatures = {
+                        book_id: self._load_signature(blob) for book_id, blob in cursor.fetchall()
+                    }
+                    for id_a, id_b in candidates:
+                        similarity = estimate_similarity(signatures.get(id_a) or (), signatures.get(id_b) or ())
+                        if similarity >= threshold and similarity > pairs.get((id_a, id_b), (None, 0.0))[1]:
+                            pairs[(id_a, id_b)] = (field, similarity)
+                
+                cursor.execute("SELECT id, titulo FROM libros")
+                titles = {row[0]: row[1] for row in cursor.fetchall()}
+        except sqlite3.Error as e:
+            logger.error(f"Error al generar el informe de casi duplicados: {e}")
+            return []
+        
+        report = [
+            {
+                'id_a': id_a, 'titulo_a': titles.get(id_a),
+                'id_b': id_b, 'titulo_b': titles.get(id_b),
+                'campo': field, 'similitud': similarity
+            }
+            for (id_a, id_b), (field, similarity) in pairs.items()
+        ]
+        report.sort(key=lambda pair: (-pair['similitud'], pair['id_a'], pair['id_b']))
+        logger.info(f"Informe de casi duplicados: {len(report)} pares con similitud >= {threshold}")
+        return report
@@ -0,0 +1,172 @@
+"""
+Módulo de archivo de páginas descargadas.
+Guarda el HTML de cada página comprimido con zlib en una base de datos SQLite
+separada, indexado por URL y fecha de descarga, para poder re-parsear sin red.
+"""
+
+import sqlite3
+import zlib
+from contextlib import contextmanager
+from typing import Iterator, Optional, Tuple
+from config import ARCHIVE_DB_PATH, ARCHIVE_COMPRESSION_LEVEL
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Tipos de página archivada
+PAGE_LISTING = 'listado'
+PAGE_DETAIL = 'detalle'
+
+
+class PageArchive:
+    """Almacén append-only de páginas HTML comprimidas."""
+    
+    def __init__(self, db_path: str = ARCHIVE_DB_PATH):
+        """
+        Inicializa el archivo de páginas.
+        
+        Args:
+            db_path: Ruta al archivo SQLite del archivo de páginas
+        """
+        self.db_path = db_path
+        self.create_table()
+    
+    @contextmanager
+    def get_connection(self):
+        """
+        Context manager para manejar conexiones al archivo de páginas.
+        
+        Yields:
+            Conexión a la base de datos SQLite
+        """
+        conn = None
+        try:
+            conn = sqlite3.connect(self.db_path)
+            yield conn
+            conn.commit()
+        except sqlite3.Error as e:
+            if conn:
+                conn.rollback()
+            logger.error(f"Error en la conexión al archivo de páginas: {e}")
+            raise
+        finally:
+            if conn:
+                conn.close()
+    
+    def create_table(self) -> None:
+        """Crea la tabla de páginas y su índice si no existen."""
+        create_table_sql = """
+        CREATE TABLE IF NOT EXISTS paginas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            url TEXT NOT NULL,
+            tipo TEXT,
+            fecha_descarga TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            html BLOB NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_paginas_url_fecha ON paginas (url, fecha_descarga);
+        """
+        
+        try:
+            with self.get_connection() as conn:
+                # WAL permite que varios scrapers archiven mientras otro proceso re-parsea
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.executescript(create_table_sql)
+        except sqlite3.Error as e:
+            logger.error(f"Error al crear la tabla de páginas: {e}")
+            raise
+    
+    def store(self, url: str, html: str, tipo: Optional[str] = None) -> None:
+        """
+        Archiva una página descargada.
+        
+        Args:
+            url: URL de la página
+            html: Contenido HTML
+            tipo: PAGE_LISTING, PAGE_DETAIL u otro (opcional)
+        """
+        compressed = zlib.compress(html.encode('utf-8'), ARCHIVE_COMPRESSION_LEVEL)
+        try:
+            with self.get_connection() as conn:
+                conn.execute(
+                    "INSERT INTO paginas (url, tipo, html) VALUES (?, ?, ?)",
+                    (url, tipo, compressed)
+                )
+            logger.debug(f"Página archivada ({len(html)} -> {len(compressed)} bytes): {url}")
+        except sqlite3.Error as e:
+            # Un fallo del archivo no debe detener el crawl
+            logger.warning(f"No se pudo archivar la página {url}: {e}")
+    
+    def iter_pages(
+        self,
+        tipo: Optional[str] = None,
+        latest_only: bool = True
+    ) -> Iterator[Tuple[str, str, str, str]]:
+        """
+        Recorre las páginas archivadas en orden de descarga.
+        
+        Args:
+            tipo: Filtrar por tipo de página (opcional)
+            latest_only: Si True, solo la descarga más reciente de cada URL
+        
+        Yields:
+            Tuplas (url, tipo, fecha_descarga, html)
+        """
+        query = "SELECT url, tipo, fecha_descarga, html FROM paginas"
+        conditions = []
+        params = []
+        if latest_only:
+            conditions.append("id IN (SELECT MAX(id) FROM paginas GROUP BY url)")
+        if tipo is not None:
+            conditions.append("tipo = ?")
+            params.append(tipo)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY id"
+        
+        with self.get_connection() as conn:
+            for url, page_type, fetched_at, compressed in conn.execute(query, params):
+                yield url, page_type, fetched_at, zlib.decompress(compressed).decode('utf-8')
+    
+    def get_page_count(self) -> int:
+        """
+        Obtiene el número de páginas archivadas.
+        
+        Returns:
+            Número de descargas archivadas
+        """
+        try:
+            with self.get_connection() as conn:
+                return conn.execute("SELECT COUNT(*) FROM paginas").fetchone()[0]
+        except sqlite3.Error as e:
+            logger.error(f"Error al obtener conteo de páginas archivadas: {e}")
+            return 0
+    
+    def prune(self, days: int) -> int:
+        """
+        Elimina las descargas de hace más de 'days' días, excepto la más reciente de
+        cada URL (la que usa el re-parseo), y compacta el archivo con VACUUM.
+        
+        Args:
+            days: Días de descargas conservados
+        
+        Returns:
+            Número de descargas eliminadas
+        """
+        try:
+            with self.get_connection() as conn:
+                removed = conn.execute(
+                    """
+                    DELETE FROM paginas
+                    WHERE fecha_descarga < datetime('now', ?)
+                      AND id NOT IN (SELECT MAX(id) FROM paginas GROUP BY url)
+                    """,
+                    (f"-{days} days",)
+                ).rowcount
+            with self.get_connection() as conn:
+                conn.execute("VACUUM")
+                conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        except sqlite3.Error as e:
+            logger.error(f"Error al aplicar la retención del archivo de páginas: {e}")
+            raise
+        logger.info(f"Archivo de páginas: {removed} descargas de más de {days} días eliminadas")
+        return removed
@@ -0,0 +1,462 @@
+"""
+Módulo del esquema compacto de libros.
+Los libros se guardan en la tabla 'libros_datos' (precio en peniques, categoría y
+disponibilidad en tablas de búsqueda, URLs sin su prefijo común y descripciones
+opcionalmente comprimidas). La vista 'libros' conserva las columnas originales y
+sus triggers INSTEAD OF permiten seguir escribiendo sobre ella.
+"""
+
+import sqlite3
+import zlib
+from typing import Dict, List, Optional, Union
+from config import BASE_URL, CATALOGUE_URL, DESCRIPTION_COMPRESSION_LEVEL
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Versión del esquema guardada en PRAGMA user_version (1 = tabla libros original,
+# 2 = esquema compacto, 3 = libros vinculados a su ejecución, 4 = unidades en stock)
+SCHEMA_VERSION = 4
+
+# Tabla de almacenamiento detrás de la vista 'libros'
+STORAGE_TABLE = 'libros_datos'
+
+# Prefijos de URL que se guardan una sola vez (se elige el más largo que coincida)
+URL_PREFIXES = (f'{BASE_URL}/media/cache/', f'{CATALOGUE_URL}/', f'{BASE_URL}/')
+
+
+def compress_text(text: Optional[str]) -> Optional[Union[str, bytes]]:
+    """
+    Comprime un texto con zlib si así ocupa menos; si no, lo deja como texto.
+    
+    Args:
+        text: Texto a comprimir
+    
+    Returns:
+        Bytes comprimidos o el texto original
+    """
+    if text is None or isinstance(text, bytes):
+        return text
+    data = text.encode('utf-8')
+    compressed = zlib.compress(data, DESCRIPTION_COMPRESSION_LEVEL)
+    return compressed if len(compressed) < len(data) else text
+
+
+def decompress_text(value: Optional[Union[str, bytes]]) -> Optional[str]:
+    """
+    Descomprime un valor guardado por compress_text.
+    
+    Args:
+        value: Bytes comprimidos o texto
+    
+    Returns:
+        Texto original
+    """
+    if isinstance(value, bytes):
+        return zlib.decompress(value).decode('utf-8')
+    return value
+
+
+def register_functions(conn: sqlite3.Connection) -> None:
+    """
+    Registra en una conexión las funciones SQL que usa la vista con descripciones
+    comprimidas. Toda conexión que lea o escriba la vista debe registrarlas.
+    
+    Args:
+        conn: Conexión SQLite
+    """
+    conn.create_function('comprimir_texto', 1, compress_text, deterministic=True)
+    conn.create_function('descomprimir_texto', 1, decompress_text, deterministic=True)
+
+
+def _url_prefix_id_sql(url: str) -> str:
+    """
+    Genera la expresión SQL con el id del prefijo más largo de una URL.
+    
+    Args:
+        url: Expresión SQL de la URL
+    
+    Returns:
+        Expresión SQL (NULL si ningún prefijo coincide)
+    """
+    return f"""(SELECT id FROM prefijos_url
+        WHERE substr({url}, 1, length(prefijo)) = prefijo
+        ORDER BY length(prefijo) DESC LIMIT 1)"""
+
+
+def _url_suffix_sql(url: str) -> str:
+    """
+    Genera la expresión SQL con la URL sin su prefijo más largo.
+    
+    Args:
+        url: Expresión SQL de la URL
+    
+    Returns:
+        Expresión SQL
+    """
+    return f"""substr({url}, 1 + COALESCE((SELECT length(prefijo) FROM prefijos_url
+        WHERE substr({url}, 1, length(prefijo)) = prefijo
+        ORDER BY length(prefijo) DESC LIMIT 1), 0))"""
+
+
+def _storage_values_sql(row: str, compress: bool) -> Dict[str, str]:
+    """
+    Genera las expresiones que convierten una fila con la forma original
+    (NEW en los triggers, alias en la migración) en columnas de almacenamiento.
+    
+    Args:
+        row: Alias de la fila de origen
+        compress: Si las descripciones se guardan comprimidas
+    
+    Returns:
+        Diccionario {columna de libros_datos: expresión SQL}
+    """
+    descripcion = f"comprimir_texto({row}.descripcion)" if compress else f"{row}.descripcion"
+    return {
+        'titulo': f"{row}.titulo",
+        'precio_peniques': f"CAST(round({row}.precio * 100) AS INTEGER)",
+        'disponibilidad_id': f"(SELECT id FROM disponibilidades WHERE texto = {row}.disponibilidad)",
+        'rating': f"{row}.rating",
+        'url_imagen_prefijo': _url_prefix_id_sql(f"{row}.url_imagen"),
+        'url_imagen': _url_suffix_sql(f"{row}.url_imagen"),
+        'descripcion': descripcion,
+        'upc': f"{row}.upc",
+        'categoria_id': f"(SELECT id FROM categorias WHERE nombre = {row}.categoria)",
+        'fecha_extraccion': f"COALESCE({row}.fecha_extraccion, CURRENT_TIMESTAMP)",
+        'url_detalle_prefijo': _url_prefix_id_sql(f"{row}.url_detalle"),
+        'url_detalle': _url_suffix_sql(f"{row}.url_detalle"),
+        'fecha_verificacion': f"{row}.fecha_verificacion",
+        'cambios': f"COALESCE({row}.cambios, 0)",
+        'ejecucion_id': f"{row}.ejecucion_id",
+        'unidades': f"{row}.unidades",
+    }
+
+
+def _units_from_text_sql(text: str) -> str:
+    """
+    Genera la expresión SQL con las unidades de un texto de disponibilidad
+    ('In stock (22 available)' -> 22), como parse_stock_units.
+    
+    Args:
+        text: Expresión SQL del texto de disponibilidad
+    
+    Returns:
+        Expresión SQL (NULL si el texto no indica unidades)
+    """
+    return f"""CASE WHEN {text} LIKE '%(% available)%'
+        THEN CAST(substr({text}, instr({text}, '(') + 1) AS INTEGER) END"""
+
+
+def _lookup_inserts_sql(row: str) -> str:
+    """
+    Genera el SQL que da de alta la categoría y la disponibilidad de una fila.
+    
+    Args:
+        row: Alias de la fila de origen
+    
+    Returns:
+        Sentencias SQL
+    """
+    return f"""
+        INSERT OR IGNORE INTO categorias (nombre)
+            SELECT {row}.categoria WHERE {row}.categoria IS NOT NULL;
+        INSERT OR IGNORE INTO disponibilidades (texto)
+            SELECT {row}.disponibilidad WHERE {row}.disponibilidad IS NOT NULL;
+    """
+
+
+CREATE_STORAGE_SQL = f"""
+CREATE TABLE IF NOT EXISTS categorias (
+    id INTEGER PRIMARY KEY,
+    nombre TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS disponibilidades (
+    id INTEGER PRIMARY KEY,
+    texto TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS prefijos_url (
+    id INTEGER PRIMARY KEY,
+    prefijo TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS {STORAGE_TABLE} (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    titulo TEXT NOT NULL,
+    precio_peniques INTEGER,
+    disponibilidad_id INTEGER REFERENCES disponibilidades (id),
+    rating INTEGER,
+    url_imagen_prefijo INTEGER REFERENCES prefijos_url (id),
+    url_imagen TEXT,
+    descripcion,  -- TEXT, o BLOB zlib si COMPRESS_DESCRIPTIONS está activo
+    upc TEXT UNIQUE,
+    categoria_id INTEGER REFERENCES categorias (id),
+    fecha_extraccion TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    url_detalle_prefijo INTEGER REFERENCES prefijos_url (id),
+    url_detalle TEXT,
+    fecha_verificacion TIMESTAMP,
+    cambios INTEGER NOT NULL DEFAULT 0,
+    ejecucion_id INTEGER,  -- Ejecución que insertó o modificó por última vez el libro
+    unidades INTEGER  -- Unidades en stock ('In stock (22 available)'), solo desde páginas de detalle
+);
+CREATE INDEX IF NOT EXISTS idx_libros_datos_titulo ON {STORAGE_TABLE} (titulo);
+CREATE INDEX IF NOT EXISTS idx_libros_datos_categoria ON {STORAGE_TABLE} (categoria_id);
+CREATE INDEX IF NOT EXISTS idx_libros_datos_rating ON {STORAGE_TABLE} (rating);
+CREATE INDEX IF NOT EXISTS idx_libros_datos_categoria_precio ON {STORAGE_TABLE} (categoria_id, precio_peniques);
+CREATE INDEX IF NOT EXISTS idx_libros_datos_ejecucion ON {STORAGE_TABLE} (ejecucion_id);
+"""
+
+
+def _view_sql(compress: bool) -> str:
+    """
+    Genera la vista 'libros' con las columnas y valores de la tabla original.
+    
+    Args:
+        compress: Si las descripciones se guardan comprimidas
+    
+    Returns:
+        Sentencia CREATE VIEW
+    """
+    descripcion = "descomprimir_texto(d.descripcion)" if compress else "d.descripcion"
+    return f"""
+    CREATE VIEW libros AS
+    SELECT
+        d.id AS id,
+        d.titulo AS titulo,
+        d.precio_peniques / 100.0 AS precio,
+        disp.texto AS disponibilidad,
+        d.rating AS rating,
+        COALESCE(pi.prefijo, '') || d.url_imagen AS url_imagen,
+        {descripcion} AS descripcion,
+        d.upc AS upc,
+        c.nombre AS categoria,
+        d.fecha_extraccion AS fecha_extraccion,
+        COALESCE(pd.prefijo, '') || d.url_detalle AS url_detalle,
+        d.fecha_verificacion AS fecha_verificacion,
+        d.cambios AS cambios,
+        d.ejecucion_id AS ejecucion_id,
+        d.unidades AS unidades
+    FROM {STORAGE_TABLE} AS d
+    LEFT JOIN categorias AS c ON c.id = d.categoria_id
+    LEFT JOIN disponibilidades AS disp ON disp.id = d.disponibilidad_id
+    LEFT JOIN prefijos_url AS pi ON pi.id = d.url_imagen_prefijo
+    LEFT JOIN prefijos_url AS pd ON pd.id = d.url_detalle_prefijo
+    """
+
+
+def _view_triggers_sql(compress: bool) -> List[str]:
+    """
+    Genera los triggers INSTEAD OF que convierten las escrituras sobre la vista
+    'libros' en escrituras sobre la tabla de almacenamiento.
+    
+    Args:
+        compress: Si las descripciones se guardan comprimidas
+    
+    Returns:
+        Lista de sentencias CREATE TRIGGER
+    """
+    values = _storage_values_sql('NEW', compress)
+    assignments = ',\n            '.join(f"{column} = {expression}" for column, expression in values.items())
+    return [
+        f"""
+        CREATE TRIGGER trg_libros_insert INSTEAD OF INSERT ON libros
+        BEGIN
+            {_lookup_inserts_sql('NEW')}
+            INSERT INTO {STORAGE_TABLE} (id, {', '.join(values)})
+            VALUES (NEW.id, {', '.join(values.values())});
+        END
+        """,
+        f"""
+        CREATE TRIGGER trg_libros_update INSTEAD OF UPDATE ON libros
+        BEGIN
+            {_lookup_inserts_sql('NEW')}
+            UPDATE {STORAGE_TABLE} SET
+            {assignments}
+            WHERE id = OLD.id;
+        END
+        """,
+        f"""
+        CREATE TRIGGER trg_libros_delete INSTEAD OF DELETE ON libros
+        BEGIN
+            DELETE FROM {STORAGE_TABLE} WHERE id = OLD.id;
+        END
+        """
+    ]
+
+
+def _create_view(cursor: sqlite3.Cursor, compress: bool) -> None:
+    """
+    (Re)crea la vista 'libros' y sus triggers INSTEAD OF.
+    
+    Args:
+        cursor: Cursor de la conexión activa
+        compress: Si las descripciones se guardan comprimidas
+    """
+    cursor.execute("DROP VIEW IF EXISTS libros")
+    cursor.execute(_view_sql(compress))
+    for statement in _view_triggers_sql(compress):
+        cursor.execute(statement)
+
+
+def _create_storage(cursor: sqlite3.Cursor) -> None:
+    """
+    Crea las tablas de almacenamiento y búsqueda y registra los prefijos de URL.
+    
+    Args:
+        cursor: Cursor de la conexión activa
+    """
+    for statement in CREATE_STORAGE_SQL.split(';'):
+        if statement.strip():
+            cursor.execute(statement)
+    cursor.executemany(
+        "INSERT OR IGNORE INTO prefijos_url (prefijo) VALUES (?)",
+        [(prefix,) for prefix in URL_PREFIXES]
+    )
+
+
+def schema_version(cursor: sqlite3.Cursor) -> int:
+    """
+    Obtiene la versión del esquema de libros de la base de datos.
+    
+    Args:
+        cursor: Cursor de la conexión activa
+    
+    Returns:
+        SCHEMA_VERSION si 'libros' es la vista compacta, 1 si es la tabla original
+        y 0 si la base de datos está vacía
+    """
+    cursor.execute("SELECT type FROM sqlite_master WHERE name = 'libros'")
+    row = cursor.fetchone()
+    if row is None:
+        return 0
+    if row[0] == 'table':
+        return 1
+    cursor.execute("PRAGMA user_version")
+    return cursor.fetchone()[0] or SCHEMA_VERSION
+
+
+def create_compact_schema(cursor: sqlite3.Cursor, compress: bool) -> None:
+    """
+    Crea el esquema compacto en una base de datos vacía.
+    
+    Args:
+        cursor: Cursor de la conexión activa
+        compress: Si las descripciones se guardan comprimidas
+    """
+    _create_storage(cursor)
+    _create_view(cursor, compress)
+    cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+
+def migrate_to_compact(cursor: sqlite3.Cursor, compress: bool) -> int:
+    """
+    Migra la tabla libros original al esquema compacto conservando los ids.
+    La tabla original se elimina (con sus índices y triggers) y su nombre pasa a
+    la vista de compatibilidad. Debe ejecutarse dentro de una transacción.
+    
+    Args:
+        cursor: Cursor de la conexión activa
+        compress: Si las descripciones se guardan comprimidas
+    
+    Returns:
+        Número de libros migrados
+    """
+    _create_storage(cursor)
+    cursor.execute("""
+        INSERT OR IGNORE INTO categorias (nombre)
+        SELECT DISTINCT categoria FROM libros WHERE categoria IS NOT NULL
+    """)
+    cursor.execute("""
+        INSERT OR IGNORE INTO disponibilidades (texto)
+        SELECT DISTINCT disponibilidad FROM libros WHERE disponibilidad IS NOT NULL
+    """)
+    
+    # La tabla original no tiene ejecuciones asociadas y guarda las unidades
+    # dentro del texto de disponibilidad ('In stock (22 available)')
+    values = _storage_values_sql('l', compress)
+    del values['ejecucion_id']
+    values['unidades'] = _units_from_text_sql('l.disponibilidad')
+    cursor.execute(f"""
+        INSERT INTO {STORAGE_TABLE} (id, {', '.join(values)})
+        SELECT l.id, {', '.join(values.values())}
+        FROM libros AS l
+        ORDER BY l.id
+    """)
+    cursor.execute(f"SELECT COUNT(*) FROM {STORAGE_TABLE}")
+    migrated = cursor.fetchone()[0]
+    
+    cursor.execute("DROP TABLE libros")
+    _create_view(cursor, compress)
+    cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    return migrated
+
+
+def _view_compressed(cursor: sqlite3.Cursor) -> bool:
+    """
+    Indica si la vista 'libros' actual descomprime las descripciones.
+    
+    Args:
+        cursor: Cursor de la conexión activa
+    
+    Returns:
+        True si la vista usa descomprimir_texto
+    """
+    cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'view' AND name = 'libros'")
+    return 'descomprimir_texto' in cursor.fetchone()[0]
+
+
+def upgrade_compact_schema(cursor: sqlite3.Cursor, version: int) -> bool:
+    """
+    Actualiza un esquema compacto anterior a SCHEMA_VERSION.
+    
+    Args:
+        cursor: Cursor de la conexión activa
+        version: Versión actual del esquema (ver schema_version)
+    
+    Returns:
+        True si se actualizó el esquema
+    """
+    if version >= SCHEMA_VERSION:
+        return False
+    if version < 3:
+        cursor.execute(f"ALTER TABLE {STORAGE_TABLE} ADD COLUMN ejecucion_id INTEGER")
+        cursor.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_libros_datos_ejecucion ON {STORAGE_TABLE} (ejecucion_id)"
+        )
+    if version < 4:
+        cursor.execute(f"ALTER TABLE {STORAGE_TABLE} ADD COLUMN unidades INTEGER")
+        cursor.execute(f"""
+            UPDATE {STORAGE_TABLE} SET unidades = {_units_from_text_sql(
+                '(SELECT texto FROM disponibilidades WHERE id = disponibilidad_id)'
+            )}
+        """)
+    _create_view(cursor, _view_compressed(cursor))
+    cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    return True
+
+
+def set_description_compression(cursor: sqlite3.Cursor, compress: bool) -> Optional[int]:
+    """
+    Ajusta la vista y las descripciones guardadas a la configuración de compresión.
+    Si la vista ya corresponde a la configuración no hace nada.
+    
+    Args:
+        cursor: Cursor de la conexión activa
+        compress: Si las descripciones deben guardarse comprimidas
+    
+    Returns:
+        Número de descripciones convertidas, o None si no hubo cambios
+    """
+    if _view_compressed(cursor) == compress:
+        return None
+    
+    _create_view(cursor, compress)
+    if compress:
+        cursor.execute(f"""
+            UPDATE {STORAGE_TABLE} SET descripcion = comprimir_texto(descripcion)
+            WHERE typeof(descripcion) = 'text'
+        """)
+    else:
+        cursor.execute(f"""
+            UPDATE {STORAGE_TABLE} SET descripcion = descomprimir_texto(descripcion)
+            WHERE typeof(descripcion) = 'blob'
+        """)
+    return cursor.rowcount
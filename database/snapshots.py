@@ -0,0 +1,125 @@
+"""
+Módulo de snapshots de la base de datos.
+Nombres, checksums SHA-256 y rotación de las copias consistentes que genera
+DatabaseManager.create_snapshot() para los consumidores externos.
+"""
+
+import glob
+import hashlib
+import os
+from datetime import datetime
+from typing import List, Optional
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Patrón de nombre de los snapshots y extensión de su checksum
+SNAPSHOT_PREFIX = 'libros_'
+SNAPSHOT_SUFFIX = '.db'
+CHECKSUM_SUFFIX = '.sha256'
+
+# Tamaño de bloque al calcular checksums
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def snapshot_path(snapshot_dir: str, now: Optional[datetime] = None) -> str:
+    """
+    Genera la ruta de un snapshot nuevo. Los nombres llevan la fecha con
+    microsegundos y ancho fijo, así que el orden alfabético es el cronológico.
+    
+    Args:
+        snapshot_dir: Directorio de snapshots
+        now: Fecha del snapshot (por defecto, ahora)
+    
+    Returns:
+        Ruta del snapshot
+    """
+    stamp = f"{now or datetime.now():%Y%m%d_%H%M%S_%f}"
+    return os.path.join(snapshot_dir, f"{SNAPSHOT_PREFIX}{stamp}{SNAPSHOT_SUFFIX}")
+
+
+def file_sha256(path: str) -> str:
+    """
+    Calcula el SHA-256 de un archivo leyéndolo por bloques.
+    
+    Args:
+        path: Ruta del archivo
+    
+    Returns:
+        Checksum en hexadecimal
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def write_checksum(path: str) -> str:
+    """
+    Escribe el checksum de un snapshot junto a él, con el formato de sha256sum
+    (se puede comprobar con 'sha256sum -c').
+    
+    Args:
+        path: Ruta del snapshot
+    
+    Returns:
+        Checksum en hexadecimal
+    """
+    checksum = file_sha256(path)
+    with open(path + CHECKSUM_SUFFIX, 'w', encoding='utf-8') as f:
+        f.write(f"{checksum}  {os.path.basename(path)}\n")
+    return checksum
+
+
+def verify_snapshot(path: str) -> bool:
+    """
+    Comprueba un snapshot contra su archivo de checksum.
+    
+    Args:
+        path: Ruta del snapshot
+    
+    Returns:
+        True si el checksum coincide, False si no coincide o falta el archivo
+    """
+    try:
+        with open(path + CHECKSUM_SUFFIX, encoding='utf-8') as f:
+            expected = f.read().split()[0]
+    except (OSError, IndexError):
+        logger.warning(f"Snapshot sin checksum: {path}")
+        return False
+    return file_sha256(path) == expected
+
+
+def list_snapshots(snapshot_dir: str) -> List[str]:
+    """
+    Lista los snapshots de un directorio, del más antiguo al más reciente.
+    
+    Args:
+        snapshot_dir: Directorio de snapshots
+    
+    Returns:
+        Rutas de los snapshots
+    """
+    return sorted(glob.glob(os.path.join(snapshot_dir, f"{SNAPSHOT_PREFIX}*{SNAPSHOT_SUFFIX}")))
+
+
+def rotate_snapshots(snapshot_dir: str, keep: int) -> List[str]:
+    """
+    Elimina los snapshots más antiguos (y sus checksums) dejando los 'keep' más recientes.
+    
+    Args:
+        snapshot_dir: Directorio de snapshots
+        keep: Número de snapshots a conservar
+    
+    Returns:
+        Rutas de los snapshots eliminados
+    """
+    snapshots = list_snapshots(snapshot_dir)
+    removed = snapshots[:max(0, len(snapshots) - keep)]
+    for path in removed:
+        for file_path in (path, path + CHECKSUM_SUFFIX):
+            if os.path.exists(file_path):
+                os.remove(file_path)
+        logger.info(f"Snapshot antiguo eliminado: {path}")
+    return removed
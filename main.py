@@ -3,22 +3,423 @@ Script principal de ejecución del web scraper standalone.
 Orquesta el proceso de scraping y almacenamiento en base de datos.
 """
 
+import argparse
 import sys
-from database.db_manager import DatabaseManager
+from api.server import create_server
+from database.book_writer import BookWriter
+from database.db_manager import (
+    DatabaseManager,
+    INSERT_DUPLICATE,
+    RUN_COMPLETED,
+    RUN_FAILED,
+    RUN_INTERRUPTED,
+    UPSERT_ERROR,
+    UPSERT_INSERTED
+)
+from database.merge import merge_databases
+from database.page_archive import PageArchive
+from config import (
+    API_PORT,
+    BACKFILL_MAX_BOOKS,
+    DETAIL_BOOKS_LIMIT,
+    MAX_PAGES,
+    PROFILE_STAGES,
+    RUN_HISTORY_LIMIT,
+    RUN_RETENTION_DAYS,
+    SNAPSHOT_KEEP
+)
+from scraper.backfill import BackfillRunner
 from scraper.book_scraper import BookScraper
+from scraper.parse_pool import ParsePool, parse_workers_for
+from scraper.reparse import reparse_archive
+from scraper.scheduler import CrawlScheduler
 from utils.logger import setup_logger
+from utils.profiler import PROFILE_MODES, STAGE_TARGETS, RunProfiler
 
 logger = setup_logger(__name__)
 
 
-def main():
-    """Función principal que ejecuta el proceso de scraping."""
+def parse_args(argv=None) -> argparse.Namespace:
+    """
+    Procesa los argumentos de línea de comandos.
+    
+    Args:
+        argv: Lista de argumentos (por defecto sys.argv)
+    
+    Returns:
+        Namespace con las opciones seleccionadas
+    """
+    parser = argparse.ArgumentParser(description="Web scraper de Books to Scrape (Standalone)")
+    parser.add_argument(
+        '--recalcular-resumenes',
+        action='store_true',
+        help="Recalcula desde cero las tablas de resumen por categoría y termina"
+    )
+    parser.add_argument(
+        '--daemon',
+        action='store_true',
+        help="Ejecuta ciclos de crawl continuos con el navegador siempre abierto"
+    )
+    parser.add_argument(
+        '--ciclos',
+        type=int,
+        default=None,
+        help="Número máximo de ciclos en modo daemon (por defecto, indefinido)"
+    )
+    parser.add_argument(
+        '--backfill',
+        action='store_true',
+        help="Completa en lotes los libros sin descripción, UPC o categoría"
+    )
+    parser.add_argument(
+        '--limite',
+        type=int,
+        default=BACKFILL_MAX_BOOKS,
+        help=f"Máximo de libros a completar en el backfill (por defecto {BACKFILL_MAX_BOOKS})"
+    )
+    parser.add_argument(
+        '--reparsear',
+        action='store_true',
+        help="Re-parsea las páginas archivadas sin red ni navegador y actualiza la base de datos"
+    )
+    parser.add_argument(
+        '--fusionar',
+        nargs='+',
+        metavar='BD',
+        help="Fusiona en la base de datos principal las bases de otros nodos de scraping"
+    )
+    parser.add_argument(
+        '--casi-duplicados',
+        action='store_true',
+        help="Muestra el informe de libros casi duplicados (MinHash/LSH) y termina"
+    )
+    parser.add_argument(
+        '--api',
+        action='store_true',
+        help="Inicia la API HTTP de consultas de solo lectura"
+    )
+    parser.add_argument(
+        '--puerto',
+        type=int,
+        default=API_PORT,
+        help=f"Puerto de la API de consultas (por defecto {API_PORT})"
+    )
+    parser.add_argument(
+        '--snapshot',
+        action='store_true',
+        help="Crea una copia consistente de la base de datos (backup online) y termina"
+    )
+    parser.add_argument(
+        '--compactar',
+        action='store_true',
+        help="Con --snapshot, genera la copia compactada con VACUUM INTO"
+    )
+    parser.add_argument(
+        '--conservar',
+        type=int,
+        default=SNAPSHOT_KEEP,
+        help=f"Snapshots conservados con --snapshot (por defecto {SNAPSHOT_KEEP})"
+    )
+    parser.add_argument(
+        '--ejecuciones',
+        type=int,
+        nargs='?',
+        const=RUN_HISTORY_LIMIT,
+        default=None,
+        metavar='N',
+        help=f"Muestra las últimas N ejecuciones con su rendimiento y termina (por defecto {RUN_HISTORY_LIMIT})"
+    )
+    parser.add_argument(
+        '--retencion',
+        type=int,
+        nargs='?',
+        const=RUN_RETENTION_DAYS,
+        default=None,
+        metavar='DIAS',
+        help=f"Elimina el historial de más de DIAS días y compacta las bases de datos (por defecto {RUN_RETENTION_DAYS})"
+    )
+    parser.add_argument(
+        '--perfil',
+        choices=PROFILE_MODES,
+        default=None,
+        help="Perfila la ejecución completa o solo las etapas indicadas; los informes se escriben en logs/"
+    )
+    parser.add_argument(
+        '--etapas',
+        nargs='+',
+        choices=sorted(STAGE_TARGETS),
+        default=list(PROFILE_STAGES),
+        metavar='ETAPA',
+        help=f"Etapas perfiladas con --perfil etapas (por defecto: {' '.join(PROFILE_STAGES)})"
+    )
+    return parser.parse_args(argv)
+
+
+def rebuild_summaries() -> None:
+    """Recalcula las tablas de resumen y muestra el resumen global."""
+    logger.info("Recalculando tablas de resumen...")
+    db_manager = DatabaseManager()
+    categories = db_manager.rebuild_summaries()
+    summary = db_manager.get_global_summary()
+    logger.info(f"Categorías: {categories}")
+    logger.info(f"Total de libros: {summary.get('total', 0)}")
+    logger.info(f"Distribución de ratings: {summary.get('ratings', {})}")
+
+
+def run_daemon(max_cycles=None) -> None:
+    """
+    Ejecuta el scraper en modo daemon.
+    
+    Args:
+        max_cycles: Número máximo de ciclos (None = indefinido)
+    """
+    logger.info("=" * 80)
+    logger.info("Iniciando modo daemon - Books to Scrape (Standalone)")
+    logger.info("=" * 80)
+    
+    try:
+        scheduler = CrawlScheduler(DatabaseManager())
+        scheduler.run(max_cycles=max_cycles)
+    except KeyboardInterrupt:
+        logger.warning("Daemon detenido por el usuario")
+    except Exception as e:
+        logger.error(f"Error crítico en el daemon: {e}", exc_info=True)
+        sys.exit(1)
+    logger.info("Daemon finalizado")
+
+
+def run_backfill(max_books: int) -> None:
+    """
+    Completa los detalles de los libros incompletos.
+    
+    Args:
+        max_books: Máximo de libros a procesar en esta ejecución
+    """
+    logger.info("=" * 80)
+    logger.info("Iniciando backfill de detalles - Books to Scrape (Standalone)")
+    logger.info("=" * 80)
+    
+    try:
+        db_manager = DatabaseManager()
+        with db_manager.track_run('backfill', {'limite': max_books}) as run_stats:
+            stats = BackfillRunner(db_manager, max_books=max_books).run()
+            run_stats.update({
+                'extraidos': stats['procesados'],
+                'actualizados': stats['completados'],
+                'errores': stats['fallidos']
+            })
+        logger.info(f"Libros procesados: {stats['procesados']}")
+        logger.info(f"Libros completados: {stats['completados']}")
+        logger.info(f"Fallidos: {stats['fallidos']}")
+        logger.info(f"Sin URL de detalle: {stats['sin_url']}")
+    except KeyboardInterrupt:
+        logger.warning("Backfill interrumpido por el usuario")
+        sys.exit(1)
+    except Exception as e:
+        logger.error(f"Error crítico en el backfill: {e}", exc_info=True)
+        sys.exit(1)
+
+
+def run_reparse() -> None:
+    """Re-parsea el archivo de páginas y muestra las estadísticas."""
+    logger.info("=" * 80)
+    logger.info("Re-parseando páginas archivadas (sin red ni navegador)")
+    logger.info("=" * 80)
+    
+    db_manager = DatabaseManager()
+    archive = PageArchive()
+    logger.info(f"Páginas archivadas: {archive.get_page_count()}")
+    with db_manager.track_run('reparseo', {'archivo': archive.db_path}) as run_stats:
+        run_stats.update(reparse_archive(db_manager, archive))
+    logger.info(f"Total en base de datos: {db_manager.get_book_count()}")
+
+
+def run_merge(source_paths) -> None:
+    """
+    Fusiona las bases de datos indicadas en la base de datos principal.
+    
+    Args:
+        source_paths: Rutas a las bases de datos de origen
+    """
+    logger.info("=" * 80)
+    logger.info(f"Fusionando {len(source_paths)} bases de datos")
+    logger.info("=" * 80)
+    
+    db_manager = DatabaseManager()
+    with db_manager.track_run('fusion', {'fuentes': list(source_paths)}) as run_stats:
+        stats = merge_databases(db_manager, source_paths)
+        run_stats.update({
+            'extraidos': stats['leidos'],
+            'insertados': stats['insertados'],
+            'actualizados': stats['actualizados'],
+            'duplicados': stats['omitidos'],
+            'errores': stats['errores']
+        })
+    logger.info(f"Bases fusionadas: {stats['fuentes']} (errores: {stats['errores']})")
+    logger.info(f"Filas leídas: {stats['leidos']}")
+    logger.info(f"Libros insertados: {stats['insertados']}")
+    logger.info(f"Libros actualizados: {stats['actualizados']}")
+    logger.info(f"Filas omitidas (duplicadas sin datos nuevos): {stats['omitidos']}")
+    logger.info(f"Total en base de datos: {db_manager.get_book_count()}")
+    if stats['errores']:
+        sys.exit(1)
+
+
+def report_near_duplicates() -> None:
+    """Muestra el informe de pares de libros casi duplicados."""
+    logger.info("=" * 80)
+    logger.info("Informe de libros casi duplicados")
+    logger.info("=" * 80)
+    
+    db_manager = DatabaseManager()
+    if not db_manager.near_duplicates:
+        logger.warning("El índice de casi duplicados está desactivado (NEAR_DUP_ENABLED)")
+        return
+    
+    pairs = db_manager.near_duplicates.report()
+    for pair in pairs:
+        logger.info(
+            f"{pair['similitud']:.2f} [{pair['campo']}] "
+            f"#{pair['id_a']} '{pair['titulo_a']}' ~ #{pair['id_b']} '{pair['titulo_b']}'"
+        )
+    logger.info(f"Pares de casi duplicados: {len(pairs)}")
+
+
+def create_snapshot(vacuum: bool, keep: int) -> None:
+    """
+    Crea un snapshot consistente de la base de datos.
+    
+    Args:
+        vacuum: Si se genera una copia compactada con VACUUM INTO
+        keep: Número de snapshots a conservar
+    """
+    try:
+        snapshot = DatabaseManager().create_snapshot(keep=keep, vacuum=vacuum)
+    except Exception as e:
+        logger.error(f"Error al crear el snapshot: {e}", exc_info=True)
+        sys.exit(1)
+    logger.info(f"Snapshot: {snapshot['ruta']}")
+    logger.info(f"SHA-256: {snapshot['sha256']}")
+    logger.info(f"Snapshots eliminados por rotación: {len(snapshot['eliminados'])}")
+
+
+def show_runs(limit: int) -> None:
+    """
+    Muestra las ejecuciones más recientes con sus contadores y rendimiento.
+    
+    Args:
+        limit: Número de ejecuciones a mostrar
+    """
+    runs = DatabaseManager().get_runs(limit)
+    for run in reversed(runs):
+        duration = f"{run['duracion']:.1f}s" if run['duracion'] is not None else '-'
+        throughput = f"{run['libros_por_segundo']:.2f}" if run['libros_por_segundo'] is not None else '-'
+        logger.info(
+            f"#{run['id']} {run['inicio']} {run['modo']} [{run['estado']}] {duration}, "
+            f"páginas: {run['paginas']}, extraídos: {run['extraidos']}, insertados: {run['insertados']}, "
+            f"actualizados: {run['actualizados']}, errores: {run['errores']}, {throughput} libros/s"
+        )
+    logger.info(f"Ejecuciones mostradas: {len(runs)}")
+
+
+def apply_retention(days: int) -> None:
+    """
+    Elimina el historial antiguo (ejecuciones y descargas archivadas) y compacta
+    las bases de datos.
+    
+    Args:
+        days: Días de historial conservados
+    """
+    try:
+        result = DatabaseManager().prune_history(days)
+        pages = PageArchive().prune(days)
+    except Exception as e:
+        logger.error(f"Error al aplicar la retención: {e}", exc_info=True)
+        sys.exit(1)
+    logger.info(f"Ejecuciones eliminadas: {result['ejecuciones']}")
+    logger.info(f"Descargas archivadas eliminadas: {pages}")
+    logger.info(f"Tamaño de la base de datos: {result['bytes_antes'] / 1024:.1f} KiB -> {result['bytes_despues'] / 1024:.1f} KiB")
+
+
+def run_api(port: int) -> None:
+    """
+    Sirve la API de consultas hasta que el usuario la detenga.
+    
+    Args:
+        port: Puerto en el que escuchar
+    """
+    server = create_server(DatabaseManager(), port=port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.warning("API detenida por el usuario")
+    finally:
+        server.server_close()
+        server.service.close()
+
+
+def run(args: argparse.Namespace) -> None:
+    """
+    Ejecuta el modo seleccionado en la línea de comandos.
+    
+    Args:
+        args: Opciones de la línea de comandos
+    """
+    if args.recalcular_resumenes:
+        rebuild_summaries()
+        return
+    
+    if args.daemon:
+        run_daemon(max_cycles=args.ciclos)
+        return
+    
+    if args.backfill:
+        run_backfill(max_books=args.limite)
+        return
+    
+    if args.reparsear:
+        run_reparse()
+        return
+    
+    if args.fusionar:
+        run_merge(args.fusionar)
+        return
+    
+    if args.casi_duplicados:
+        report_near_duplicates()
+        return
+    
+    if args.api:
+        run_api(port=args.puerto)
+        return
+    
+    if args.snapshot:
+        create_snapshot(vacuum=args.compactar, keep=args.conservar)
+        return
+    
+    if args.ejecuciones is not None:
+        show_runs(args.ejecuciones)
+        return
+    
+    if args.retencion is not None:
+        apply_retention(args.retencion)
+        return
+    
+    run_scrape()
+
+
+def run_scrape() -> None:
+    """Ejecuta el proceso de scraping y almacenamiento."""
     logger.info("=" * 80)
     logger.info("Iniciando proceso de web scraping - Books to Scrape (Standalone)")
     logger.info("=" * 80)
     
     scraper = None
     db_manager = None
+    writer = None
+    parse_pool = None
+    run_stats = {}
+    run_status = RUN_FAILED
     
     try:
         # Inicializar base de datos
@@ -26,34 +427,37 @@ def main():
         db_manager = DatabaseManager()
         initial_count = db_manager.get_book_count()
         logger.info(f"Libros en base de datos antes del scraping: {initial_count}")
+        db_manager.start_run('scraping', {'max_paginas': MAX_PAGES, 'libros_con_detalle': DETAIL_BOOKS_LIMIT})
         
         # Inicializar scraper
         logger.info("Inicializando scraper con Chromium...")
         scraper = BookScraper()
         
+        # Escritor en segundo plano: los libros se guardan mientras continúa el scraping
+        failed_titles = []
+        
+        def record_outcome(book, outcome: str) -> None:
+            """Anota los libros que no se pudieron guardar."""
+            if outcome == UPSERT_ERROR:
+                failed_titles.append(book.get('titulo') or '(sin título)')
+        
+        writer = BookWriter(db_manager, on_outcome=record_outcome)
+        
         # Ejecutar scraping
         logger.info("Iniciando extracción de libros...")
         logger.info("Estrategia: Info básica de 3 páginas + detalles completos de 5 libros")
-        books = scraper.scrape_books()
-        
-        # Guardar en base de datos
-        logger.info(f"Guardando {len(books)} libros en la base de datos...")
-        inserted_count = 0
-        duplicate_count = 0
-        error_count = 0
-        books_with_details = 0
+        # Pool de parseo del proceso: sin procesos hijos si el crawl es pequeño
+        parse_pool = ParsePool(workers=parse_workers_for(MAX_PAGES + DETAIL_BOOKS_LIMIT))
+        books = scraper.scrape_books(on_books=writer.submit_many, parse_pool=parse_pool)
+        run_stats['extraidos'] = len(books)
         
-        for book in books:
-            try:
-                if db_manager.insert_book(book):
-                    inserted_count += 1
-                    if book.get('descripcion') and book.get('upc') and book.get('categoria'):
-                        books_with_details += 1
-                else:
-                    duplicate_count += 1
-            except Exception as e:
-                logger.error(f"Error al insertar libro '{book.get('titulo')}': {e}")
-                error_count += 1
+        # Esperar a que se guarden los libros pendientes
+        logger.info(f"Esperando a que se guarden los {len(books)} libros en la base de datos...")
+        stats = writer.close()
+        inserted_count = stats[UPSERT_INSERTED]
+        duplicate_count = stats[INSERT_DUPLICATE]
+        error_count = stats[UPSERT_ERROR]
+        books_with_details = writer.with_details
         
         # Estadísticas finales
         final_count = db_manager.get_book_count()
@@ -65,22 +469,53 @@ def main():
         logger.info(f"Libros con detalles completos: {books_with_details}")
         logger.info(f"Libros duplicados: {duplicate_count}")
         logger.info(f"Errores: {error_count}")
+        if failed_titles:
+            logger.warning(f"Libros no guardados: {', '.join(failed_titles)}")
         logger.info(f"Total en base de datos: {final_count}")
         logger.info("=" * 80)
-        
+        run_status = RUN_COMPLETED
+    
     except KeyboardInterrupt:
+        run_status = RUN_INTERRUPTED
         logger.warning("Proceso interrumpido por el usuario")
         sys.exit(1)
     except Exception as e:
         logger.error(f"Error crítico en el proceso de scraping: {e}", exc_info=True)
         sys.exit(1)
     finally:
-        # Cerrar recursos
+        # Cerrar recursos; la ejecución se registra cuando el escritor ya guardó todo
+        if writer:
+            # Un error del escritor no debe impedir registrar la ejecución ni cerrar el
+            # navegador, ni ocultar la excepción original
+            try:
+                if writer.thread.is_alive():
+                    writer.close()
+            except Exception as e:
+                logger.error(f"Error al cerrar el escritor de libros: {e}", exc_info=True)
+                run_status = RUN_FAILED
+            run_stats.update(writer.stats)
+        if parse_pool:
+            parse_pool.close()
+        if scraper:
+            run_stats['paginas'] = scraper.pages_loaded
+        if db_manager:
+            db_manager.finish_run(run_stats, run_status)
         if scraper:
             logger.info("Cerrando scraper...")
             scraper.close()
         logger.info("Proceso finalizado")
 
 
+def main():
+    """Función principal que ejecuta el proceso de scraping."""
+    args = parse_args()
+    
+    if args.perfil:
+        with RunProfiler(mode=args.perfil, stages=args.etapas):
+            run(args)
+    else:
+        run(args)
+
+
 if __name__ == "__main__":
     main()
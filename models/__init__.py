@@ -0,0 +1 @@
+"""Módulo de modelos de datos del scraper."""
@@ -0,0 +1,321 @@
+"""
+Módulo del modelo de datos de libro.
+Define un registro compacto basado en __slots__ que reemplaza los diccionarios por libro,
+manteniendo una vista tipo diccionario para compatibilidad.
+"""
+
+import re
+from enum import IntEnum
+from typing import Any, Dict, Optional, Tuple
+
+from config import RATING_MAP
+
+# Orden de los campos, igual al de las columnas del INSERT en la tabla libros
+BOOK_FIELDS = (
+    'titulo',
+    'precio',
+    'disponibilidad',
+    'rating',
+    'url_imagen',
+    'descripcion',
+    'upc',
+    'categoria',
+    'url_detalle',
+    'unidades'
+)
+
+
+class Disponibilidad(IntEnum):
+    """Estado de disponibilidad de un libro."""
+    
+    DESCONOCIDA = 0
+    EN_STOCK = 1
+    AGOTADO = 2
+
+
+# Texto de cada estado de disponibilidad (vista de compatibilidad). El número de
+# unidades de 'In stock (22 available)' se conserva aparte, en Book.unidades
+DISPONIBILIDAD_TEXTO = {
+    Disponibilidad.DESCONOCIDA: None,
+    Disponibilidad.EN_STOCK: 'In stock',
+    Disponibilidad.AGOTADO: 'Out of stock'
+}
+
+# Unidades disponibles dentro del texto de disponibilidad ('In stock (22 available)')
+_UNITS_PATTERN = re.compile(r'\((\d+) available\)')
+
+
+def parse_price_pence(price_text: Optional[str]) -> Optional[int]:
+    """
+    Convierte un precio en texto (por ejemplo '£51.77') a peniques enteros.
+    Evita la conversión intermedia a float y sus errores de redondeo.
+    
+    Args:
+        price_text: Precio en texto, con o sin símbolo de moneda
+    
+    Returns:
+        Precio en peniques o None si el texto no es un precio válido
+    """
+    if not price_text:
+        return None
+    
+    cleaned = ''.join(char for char in price_text if char.isdigit() or char == '.')
+    if not cleaned:
+        return None
+    
+    pounds, _, pence = cleaned.partition('.')
+    try:
+        return int(pounds or '0') * 100 + int((pence + '00')[:2])
+    except ValueError:
+        return None
+
+
+def parse_rating(rating_class: Optional[str]) -> Optional[int]:
+    """
+    Obtiene el rating numérico a partir del atributo class ('star-rating Three').
+    
+    Args:
+        rating_class: Valor del atributo class del elemento de rating
+    
+    Returns:
+        Rating numérico (1-5) o None si no se reconoce
+    """
+    if not rating_class:
+        return None
+    
+    for token in rating_class.split():
+        rating = RATING_MAP.get(token)
+        if rating is not None:
+            return rating
+    return None
+
+
+def parse_availability(availability_text: Optional[str]) -> Disponibilidad:
+    """
+    Convierte el texto de disponibilidad a su valor enumerado.
+    Las unidades disponibles se obtienen con parse_stock_units. Un texto que no
+    empieza por 'In stock' ni 'Out of stock' (el sitio no usa otros) se pierde y
+    queda como DESCONOCIDA.
+    
+    Args:
+        availability_text: Texto de disponibilidad ('In stock', 'Out of stock', ...)
+    
+    Returns:
+        Valor de Disponibilidad correspondiente
+    """
+    if not availability_text:
+        return Disponibilidad.DESCONOCIDA
+    
+    text = availability_text.strip()
+    if text.startswith('In stock'):
+        return Disponibilidad.EN_STOCK
+    if text.startswith('Out of stock'):
+        return Disponibilidad.AGOTADO
+    return Disponibilidad.DESCONOCIDA
+
+
+def parse_stock_units(availability_text: Optional[str]) -> Optional[int]:
+    """
+    Obtiene las unidades disponibles del texto de disponibilidad.
+    Solo las páginas de detalle las indican; en los listados el texto es 'In stock'.
+    
+    Args:
+        availability_text: Texto de disponibilidad ('In stock (22 available)', ...)
+    
+    Returns:
+        Número de unidades o None si el texto no las indica
+    """
+    if not availability_text:
+        return None
+    
+    match = _UNITS_PATTERN.search(availability_text)
+    return int(match.group(1)) if match else None
+
+
+class Book:
+    """
+    Registro compacto de un libro.
+    
+    El precio se guarda en peniques enteros, el rating como entero pequeño, la
+    disponibilidad como Disponibilidad y las unidades en stock (solo en páginas de
+    detalle) como entero. Los métodos get() y __getitem__ ofrecen
+    la vista de diccionario usada por el código existente ('precio' en libras,
+    'disponibilidad' como texto).
+    """
+    
+    __slots__ = (
+        'titulo',
+        'precio_peniques',
+        'disponibilidad',
+        'rating',
+        'url_imagen',
+        'descripcion',
+        'upc',
+        'categoria',
+        'url_detalle',
+        'unidades'
+    )
+    
+    def __init__(
+        self,
+        titulo: str,
+        precio_peniques: Optional[int] = None,
+        disponibilidad: Disponibilidad = Disponibilidad.DESCONOCIDA,
+        rating: Optional[int] = None,
+        url_imagen: Optional[str] = None,
+        descripcion: Optional[str] = None,
+        upc: Optional[str] = None,
+        categoria: Optional[str] = None,
+        url_detalle: Optional[str] = None,
+        unidades: Optional[int] = None
+    ):
+        """
+        Inicializa el registro del libro.
+        
+        Args:
+            titulo: Título del libro
+            precio_peniques: Precio en peniques (opcional)
+            disponibilidad: Estado de disponibilidad
+            rating: Rating numérico 1-5 (opcional)
+            url_imagen: URL de la imagen de portada (opcional)
+            descripcion: Descripción del producto (opcional)
+            upc: Código UPC (opcional)
+            categoria: Categoría del libro (opcional)
+            url_detalle: URL de la página de detalle (opcional)
+            unidades: Unidades en stock (opcional)
+        """
+        self.titulo = titulo
+        self.precio_peniques = precio_peniques
+        self.disponibilidad = disponibilidad
+        self.rating = rating
+        self.url_imagen = url_imagen
+        self.descripcion = descripcion
+        self.upc = upc
+        self.categoria = categoria
+        self.url_detalle = url_detalle
+        self.unidades = unidades
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Book':
+        """
+        Crea un registro a partir de un diccionario con el formato antiguo.
+        
+        Args:
+            data: Diccionario con las claves de BOOK_FIELDS
+        
+        Returns:
+            Registro Book equivalente
+        """
+        precio = data.get('precio')
+        if precio is None:
+            precio_peniques = None
+        elif isinstance(precio, str):
+            precio_peniques = parse_price_pence(precio)
+        else:
+            precio_peniques = int(round(precio * 100))
+        
+        unidades = data.get('unidades')
+        if unidades is None:
+            unidades = parse_stock_units(data.get('disponibilidad'))
+        
+        return cls(
+            titulo=data.get('titulo'),
+            precio_peniques=precio_peniques,
+            disponibilidad=parse_availability(data.get('disponibilidad')),
+            rating=data.get('rating'),
+            url_imagen=data.get('url_imagen'),
+            descripcion=data.get('descripcion'),
+            upc=data.get('upc'),
+            categoria=data.get('categoria'),
+            url_detalle=data.get('url_detalle'),
+            unidades=unidades
+        )
+    
+    @property
+    def precio(self) -> Optional[float]:
+        """Precio en libras (vista de compatibilidad)."""
+        if self.precio_peniques is None:
+            return None
+        return self.precio_peniques / 100
+    
+    @property
+    def has_details(self) -> bool:
+        """True si el libro tiene descripción, UPC y categoría."""
+        return bool(self.descripcion and self.upc and self.categoria)
+    
+    def update_details(self, details: Dict) -> None:
+        """
+        Actualiza los campos de detalle (descripcion, upc, categoria).
+        
+        Args:
+            details: Diccionario con los detalles extraídos
+        """
+        self.descripcion = details.get('descripcion', self.descripcion)
+        self.upc = details.get('upc', self.upc)
+        self.categoria = details.get('categoria', self.categoria)
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        """
+        Acceso tipo diccionario a los campos del libro.
+        
+        Args:
+            key: Nombre del campo (ver BOOK_FIELDS)
+            default: Valor a retornar si el campo no existe
+        
+        Returns:
+            Valor del campo en el formato del diccionario antiguo
+        """
+        if key not in BOOK_FIELDS:
+            return default
+        return self[key]
+    
+    def __getitem__(self, key: str) -> Any:
+        if key == 'precio':
+            return self.precio
+        if key == 'disponibilidad':
+            return DISPONIBILIDAD_TEXTO[self.disponibilidad]
+        if key not in BOOK_FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+    
+    def to_dict(self) -> Dict:
+        """
+        Retorna la vista de diccionario del libro.
+        
+        Returns:
+            Diccionario con las claves de BOOK_FIELDS
+        """
+        return {field: self[field] for field in BOOK_FIELDS}
+    
+    def to_row(self) -> Tuple:
+        """
+        Retorna la fila para INSERT/executemany en el orden de BOOK_FIELDS.
+        
+        Returns:
+            Tupla con los valores de las columnas de la tabla libros
+        """
+        return (
+            self.titulo,
+            self.precio,
+            DISPONIBILIDAD_TEXTO[self.disponibilidad],
+            self.rating,
+            self.url_imagen,
+            self.descripcion,
+            self.upc,
+            self.categoria,
+            self.url_detalle,
+            self.unidades
+        )
+    
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Book):
+            return NotImplemented
+        return all(getattr(self, slot) == getattr(other, slot) for slot in self.__slots__)
+    
+    def __hash__(self) -> int:
+        # Consistente con __eq__: los libros iguales tienen el mismo título y UPC. No
+        # modificar titulo ni upc mientras el libro esté en un set o sea clave de un dict
+        return hash((self.titulo, self.upc))
+    
+    def __repr__(self) -> str:
+        return f"Book(titulo={self.titulo!r}, upc={self.upc!r}, precio_peniques={self.precio_peniques!r})"
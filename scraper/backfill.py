@@ -0,0 +1,174 @@
+"""
+Módulo de backfill de detalles.
+Completa en lotes los libros sin descripción, UPC o categoría, descargando sus
+páginas de detalle con varios navegadores en paralelo y guardando cada lote en
+una única transacción.
+"""
+
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from config import (
+    CATALOGUE_URL,
+    BACKFILL_MAX_BOOKS,
+    BACKFILL_BATCH_SIZE,
+    BACKFILL_WORKERS,
+    BACKFILL_LISTING_PAGES
+)
+from database.db_manager import DatabaseManager
+from scraper.book_scraper import BookScraper, DETAIL_READY_SELECTOR, LISTING_READY_SELECTOR
+from scraper.html_parser import parse_book_details
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class BackfillRunner:
+    """Completa los detalles de libros incompletos en lotes concurrentes."""
+    
+    def __init__(
+        self,
+        db_manager: DatabaseManager,
+        max_books: int = BACKFILL_MAX_BOOKS,
+        batch_size: int = BACKFILL_BATCH_SIZE,
+        workers: int = BACKFILL_WORKERS,
+        listing_pages: int = BACKFILL_LISTING_PAGES
+    ):
+        """
+        Inicializa el backfill.
+        
+        Args:
+            db_manager: Gestor de base de datos
+            max_books: Máximo de libros a procesar en esta ejecución
+            batch_size: Libros por lote
+            workers: Número de navegadores en paralelo
+            listing_pages: Páginas de listado para reconstruir URLs faltantes
+        """
+        self.db_manager = db_manager
+        self.max_books = max_books
+        self.batch_size = batch_size
+        self.workers = max(1, workers)
+        self.listing_pages = listing_pages
+        self.scrapers: List[BookScraper] = []
+        self.available: queue.Queue = queue.Queue()
+    
+    def start_scrapers(self) -> None:
+        """Inicia un navegador por worker."""
+        for _ in range(self.workers):
+            scraper = BookScraper()
+            self.scrapers.append(scraper)
+            self.available.put(scraper)
+        logger.info(f"Backfill: {self.workers} navegadores iniciados")
+    
+    def close(self) -> None:
+        """Cierra todos los navegadores del backfill."""
+        for scraper in self.scrapers:
+            scraper.close()
+        self.scrapers = []
+    
+    def fetch_details(self, book: Dict) -> Optional[Dict]:
+        """
+        Descarga los detalles de un libro usando un navegador libre del pool.
+        
+        Args:
+            book: Diccionario con id, titulo y url_detalle
+        
+        Returns:
+            Detalles del libro o None si la página no se pudo cargar
+        """
+        scraper = self.available.get()
+        try:
+            scraper.wait_between_requests()
+            if not scraper.get_page(book['url_detalle'], ready_selector=DETAIL_READY_SELECTOR):
+                return None
+            return parse_book_details(scraper.page_html, scraper.page_url)
+        finally:
+            self.available.put(scraper)
+    
+    def resolve_missing_urls(self, books: List[Dict]) -> None:
+        """
+        Reconstruye la URL de detalle de los libros que no la tienen, recorriendo
+        el listado y emparejando por título. Las URLs encontradas se guardan en la BD.
+        
+        Args:
+            books: Libros incompletos; se actualiza 'url_detalle' en cada diccionario
+        """
+        missing = {book['titulo']: book for book in books if not book['url_detalle']}
+        if not missing:
+            return
+        
+        logger.info(f"Reconstruyendo URL de detalle de {len(missing)} libros desde el listado...")
+        scraper = self.scrapers[0]
+        found = {}
+        
+        for page_num in range(1, self.listing_pages + 1):
+            url = f"{CATALOGUE_URL}/page-{page_num}.html"
+            if not scraper.get_page(url, ready_selector=LISTING_READY_SELECTOR):
+                # Sin más páginas de listado (o error persistente): no seguir buscando
+                break
+            
+            for listed in scraper.extract_books_from_page(extract_details=False):
+                book = missing.pop(listed.titulo, None)
+                if book is not None:
+                    book['url_detalle'] = listed.url_detalle
+                    found[book['id']] = listed.url_detalle
+            
+            if not missing:
+                break
+            scraper.wait_between_requests()
+        
+        self.db_manager.set_detail_urls(found)
+        logger.info(f"URLs reconstruidas: {len(found)}, sin encontrar: {len(missing)}")
+    
+    def run(self) -> Dict[str, int]:
+        """
+        Ejecuta el backfill hasta completar max_books o agotar los libros incompletos.
+        
+        Returns:
+            Diccionario con contadores (procesados, completados, fallidos, sin_url)
+        """
+        stats = {'procesados': 0, 'completados': 0, 'fallidos': 0, 'sin_url': 0}
+        books = self.db_manager.get_incomplete_books(self.max_books)
+        if not books:
+            logger.info("Backfill: no hay libros incompletos")
+            return stats
+        
+        logger.info(f"Backfill: {len(books)} libros incompletos a procesar")
+        started = time.monotonic()
+        
+        try:
+            self.start_scrapers()
+            self.resolve_missing_urls(books)
+            
+            pending = [book for book in books if book['url_detalle']]
+            stats['sin_url'] = len(books) - len(pending)
+            
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                for start in range(0, len(pending), self.batch_size):
+                    batch = pending[start:start + self.batch_size]
+                    results = list(executor.map(self.fetch_details, batch))
+                    
+                    completed = self.db_manager.update_book_details(
+                        {book['id']: details for book, details in zip(batch, results)}
+                    )
+                    stats['procesados'] += len(batch)
+                    stats['completados'] += completed
+                    stats['fallidos'] += len(batch) - completed
+                    
+                    elapsed = time.monotonic() - started
+                    logger.info(
+                        f"Backfill: {stats['procesados']}/{len(pending)} "
+                        f"({stats['procesados'] * 100 // len(pending)}%), "
+                        f"completados: {stats['completados']}, "
+                        f"{stats['procesados'] / elapsed:.2f} libros/s"
+                    )
+        finally:
+            self.close()
+        
+        logger.info(
+            f"Backfill finalizado. Completados: {stats['completados']}, "
+            f"Fallidos: {stats['fallidos']}, Sin URL: {stats['sin_url']}"
+        )
+        return stats
@@ -5,36 +5,52 @@ Extrae información de libros desde books.toscrape.com usando Chromium del siste
 
 import time
 import os
-from typing import Dict, List, Optional
+from collections import deque
+from typing import Callable, Dict, List, Optional
 from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import (
     TimeoutException, 
-    NoSuchElementException, 
     WebDriverException
 )
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 
 from config import (
-    BASE_URL, 
     CATALOGUE_URL,
     MAX_PAGES, 
     DETAIL_BOOKS_LIMIT,
     REQUEST_DELAY, 
     PAGE_LOAD_TIMEOUT,
     IMPLICIT_WAIT,
+    ELEMENT_TIMEOUT,
     HEADLESS_MODE,
     WINDOW_SIZE,
-    RATING_MAP,
+    LEAN_BROWSER,
+    PAGE_LOAD_STRATEGY,
+    BLOCKED_URL_PATTERNS,
+    ARCHIVE_PAGES,
     CHROMIUM_DRIVER_PATH
 )
+from database.page_archive import PageArchive, PAGE_DETAIL, PAGE_LISTING
+from models.book import Book
+from scraper.element_lookup import wait_for_selector
+from scraper.html_parser import parse_book_details, parse_book_page, parse_listing_page
+from scraper.parse_pool import ParsePool, parse_details_bytes, parse_listing_bytes
 from utils.logger import setup_logger
+from utils.profiler import page_boundary
 
 logger = setup_logger(__name__)
 
+# Selectores que indican que cada tipo de página tiene el contenido que necesitan los extractores
+LISTING_READY_SELECTOR = 'article.product_pod'
+DETAIL_READY_SELECTOR = 'article.product_page'
+
+# Tipo de página archivada según el selector de espera usado al cargarla
+PAGE_TYPES = {
+    LISTING_READY_SELECTOR: PAGE_LISTING,
+    DETAIL_READY_SELECTOR: PAGE_DETAIL
+}
+
 
 class BookScraper:
     """Scraper de libros usando Selenium WebDriver con Chromium standalone."""
@@ -42,6 +58,12 @@ class BookScraper:
     def __init__(self):
         """Inicializa el scraper y configura el WebDriver."""
         self.driver = None
+        # HTML y URL de la última página cargada con éxito por get_page()
+        self.page_html: Optional[str] = None
+        self.page_url: Optional[str] = None
+        # Páginas cargadas con éxito (contador de la ejecución registrada)
+        self.pages_loaded = 0
+        self.archive = PageArchive() if ARCHIVE_PAGES else None
         self.setup_driver()
     
     def setup_driver(self) -> None:
@@ -59,6 +81,9 @@ class BookScraper:
             chrome_options.add_argument('--disable-blink-features=AutomationControlled')
             chrome_options.add_experimental_option('excludeSwitches', ['enable-logging'])
             
+            if LEAN_BROWSER:
+                self.apply_lean_options(chrome_options)
+            
             # Usar Chromium driver del sistema (standalone)
             if os.path.exists(CHROMIUM_DRIVER_PATH):
                 service = Service(CHROMIUM_DRIVER_PATH)
@@ -69,7 +94,12 @@ class BookScraper:
                 logger.info("Usando chromedriver desde PATH del sistema")
             
             self.driver = webdriver.Chrome(service=service, options=chrome_options)
+            # Sin espera implícita: las esperas son explícitas por selector (element_lookup)
             self.driver.implicitly_wait(IMPLICIT_WAIT)
+            self.driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
+            
+            if LEAN_BROWSER:
+                self.block_resources()
             
             logger.info("WebDriver de Chromium inicializado correctamente")
         except WebDriverException as e:
@@ -79,6 +109,31 @@ class BookScraper:
             logger.error("  Fedora: sudo dnf install chromium chromedriver")
             raise
     
+    def apply_lean_options(self, chrome_options: Options) -> None:
+        """
+        Configura el perfil ligero: estrategia de carga y bloqueo de imágenes por preferencias.
+        Las hojas de estilo y fuentes se bloquean vía CDP en block_resources().
+        
+        Args:
+            chrome_options: Opciones de Chromium a modificar
+        """
+        chrome_options.page_load_strategy = PAGE_LOAD_STRATEGY
+        chrome_options.add_argument('--blink-settings=imagesEnabled=false')
+        chrome_options.add_experimental_option('prefs', {
+            'profile.managed_default_content_settings.images': 2
+        })
+        logger.info(f"Perfil de navegador ligero activado (page load strategy: {PAGE_LOAD_STRATEGY})")
+    
+    def block_resources(self) -> None:
+        """Bloquea vía CDP las peticiones a recursos que no son HTML (imágenes, CSS, fuentes)."""
+        try:
+            self.driver.execute_cdp_cmd('Network.enable', {})
+            self.driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': BLOCKED_URL_PATTERNS})
+            logger.info(f"Bloqueo de recursos vía CDP activado ({len(BLOCKED_URL_PATTERNS)} patrones)")
+        except WebDriverException as e:
+            # El bloqueo por preferencias sigue activo aunque CDP no esté disponible
+            logger.warning(f"No se pudo activar el bloqueo de recursos vía CDP: {e}")
+    
     def close(self) -> None:
         """Cierra el WebDriver y libera recursos."""
         if self.driver:
@@ -93,25 +148,37 @@ class BookScraper:
         time.sleep(REQUEST_DELAY)
         logger.debug(f"Esperando {REQUEST_DELAY} segundos entre requests")
     
-    def get_page(self, url: str, retries: int = 3) -> bool:
+    def get_page(self, url: str, retries: int = 3, ready_selector: str = 'body') -> bool:
         """
         Navega a una URL con reintentos en caso de error.
+        Si la carga es exitosa, guarda el HTML en page_html y lo archiva (ARCHIVE_PAGES).
         
         Args:
             url: URL a la que navegar
             retries: Número de reintentos en caso de error
+            ready_selector: Selector CSS que indica que el contenido necesario ya está cargado
         
         Returns:
             True si la navegación fue exitosa, False en caso contrario
         """
+        self.page_html = None
+        self.page_url = None
+        
         for attempt in range(retries):
             try:
                 self.driver.get(url)
-                WebDriverWait(self.driver, PAGE_LOAD_TIMEOUT).until(
-                    EC.presence_of_element_located((By.TAG_NAME, "body"))
+                if wait_for_selector(self.driver, ready_selector, ELEMENT_TIMEOUT):
+                    self.page_html = self.driver.page_source
+                    self.page_url = url
+                    self.pages_loaded += 1
+                    if self.archive:
+                        self.archive.store(url, self.page_html, PAGE_TYPES.get(ready_selector))
+                    logger.info(f"Página cargada exitosamente: {url}")
+                    return True
+                logger.warning(
+                    f"Selector '{ready_selector}' no disponible tras {ELEMENT_TIMEOUT}s "
+                    f"(intento {attempt + 1}/{retries}): {url}"
                 )
-                logger.info(f"Página cargada exitosamente: {url}")
-                return True
             except TimeoutException:
                 logger.warning(f"Timeout al cargar página (intento {attempt + 1}/{retries}): {url}")
             except WebDriverException as e:
@@ -123,85 +190,42 @@ class BookScraper:
         logger.error(f"No se pudo cargar la página después de {retries} intentos: {url}")
         return False
     
-    def extract_rating(self, book_element) -> Optional[int]:
+    def extract_book_details(self, book_url: str) -> Dict:
         """
-        Extrae el rating de un libro.
+        Extrae detalles completos de un libro desde su página individual.
         
         Args:
-            book_element: Elemento Selenium del libro
+            book_url: URL de la página del libro
         
         Returns:
-            Rating numérico (1-5) o None si no se encuentra
+            Diccionario con los detalles del libro (descripcion, upc, categoria)
         """
-        try:
-            rating_element = book_element.find_element(By.CSS_SELECTOR, 'p.star-rating')
-            rating_class = rating_element.get_attribute('class')
-            
-            for rating_text, rating_value in RATING_MAP.items():
-                if rating_text in rating_class:
-                    return rating_value
-            
-            logger.warning("Rating no reconocido en las clases CSS")
-            return None
-        except NoSuchElementException:
-            logger.warning("Elemento de rating no encontrado")
-            return None
+        if not self.get_page(book_url, ready_selector=DETAIL_READY_SELECTOR):
+            return {
+                'descripcion': None,
+                'upc': None,
+                'categoria': None
+            }
+        
+        return parse_book_details(self.page_html, book_url)
     
-    def extract_book_details(self, book_url: str) -> Dict:
+    def extract_book(self, book_url: str) -> Optional[Book]:
         """
-        Extrae detalles completos de un libro desde su página individual.
+        Extrae un libro completo (info básica y detalles) desde su página individual.
+        Se usa para recrawls de libros ya conocidos sin pasar por el listado.
         
         Args:
             book_url: URL de la página del libro
         
         Returns:
-            Diccionario con los detalles del libro (descripcion, upc, categoria)
+            Registro Book o None si la página no se pudo cargar o no tiene título
         """
-        details = {
-            'descripcion': None,
-            'upc': None,
-            'categoria': None
-        }
-        
-        if not self.get_page(book_url):
-            return details
-        
-        try:
-            # Extraer descripción
-            try:
-                description_element = self.driver.find_element(
-                    By.CSS_SELECTOR, 
-                    'article.product_page > p'
-                )
-                details['descripcion'] = description_element.text.strip()
-            except NoSuchElementException:
-                logger.warning(f"Descripción no encontrada para: {book_url}")
-            
-            # Extraer UPC de la tabla de información del producto
-            try:
-                table_rows = self.driver.find_elements(By.CSS_SELECTOR, 'table.table tr')
-                for row in table_rows:
-                    header = row.find_element(By.TAG_NAME, 'th').text
-                    if header == 'UPC':
-                        details['upc'] = row.find_element(By.TAG_NAME, 'td').text.strip()
-                        break
-            except NoSuchElementException:
-                logger.warning(f"UPC no encontrado para: {book_url}")
-            
-            # Extraer categoría del breadcrumb
-            try:
-                breadcrumb = self.driver.find_elements(By.CSS_SELECTOR, 'ul.breadcrumb li')
-                if len(breadcrumb) >= 3:
-                    details['categoria'] = breadcrumb[2].text.strip()
-            except (NoSuchElementException, IndexError):
-                logger.warning(f"Categoría no encontrada para: {book_url}")
-        
-        except Exception as e:
-            logger.error(f"Error al extraer detalles del libro: {e}")
+        if not self.get_page(book_url, ready_selector=DETAIL_READY_SELECTOR):
+            return None
         
-        return details
+        return parse_book_page(self.page_html, book_url)
     
-    def extract_books_from_page(self, extract_details: bool = False, detail_limit: int = 0) -> List[Dict]:
+    def extract_books_from_page(self, extract_details: bool = False, detail_limit: int = 0) -> List[Book]:
         """
         Extrae información de todos los libros en la página actual.
         
@@ -210,130 +234,93 @@ class BookScraper:
             detail_limit: Límite de libros para extraer detalles (0 = todos)
         
         Returns:
-            Lista de diccionarios con información de cada libro
+            Lista de registros Book con información de cada libro
         """
-        books = []
+        if not self.page_html:
+            logger.error("No hay página cargada de la que extraer libros")
+            return []
         
-        try:
-            book_elements = self.driver.find_elements(By.CSS_SELECTOR, 'article.product_pod')
-            logger.info(f"Encontrados {len(book_elements)} libros en la página")
-            
-            for idx, book_element in enumerate(book_elements, 1):
-                try:
-                    # Extraer información básica
-                    title_element = book_element.find_element(By.CSS_SELECTOR, 'h3 a')
-                    titulo = title_element.get_attribute('title')
-                    book_relative_url = title_element.get_attribute('href')
-                    
-                    # Construir URL completa del libro
-                    if book_relative_url.startswith('catalogue/'):
-                        book_url = f"{BASE_URL}/{book_relative_url}"
-                    elif book_relative_url.startswith('../../../'):
-                        book_url = f"{CATALOGUE_URL}/{book_relative_url.replace('../../../', '')}"
-                    else:
-                        book_url = book_relative_url
-                    
-                    # Precio
-                    price_element = book_element.find_element(By.CSS_SELECTOR, 'p.price_color')
-                    precio_text = price_element.text.strip().replace('£', '')
-                    precio = float(precio_text) if precio_text else None
-                    
-                    # Disponibilidad
-                    availability_element = book_element.find_element(By.CSS_SELECTOR, 'p.availability')
-                    disponibilidad = availability_element.text.strip()
-                    
-                    # Rating
-                    rating = self.extract_rating(book_element)
-                    
-                    # URL de imagen
-                    img_element = book_element.find_element(By.CSS_SELECTOR, 'img')
-                    img_relative_url = img_element.get_attribute('src')
-                    url_imagen = f"{BASE_URL}/{img_relative_url.replace('../', '')}"
-                    
-                    # Inicializar datos del libro con info básica
-                    book_data = {
-                        'titulo': titulo,
-                        'precio': precio,
-                        'disponibilidad': disponibilidad,
-                        'rating': rating,
-                        'url_imagen': url_imagen,
-                        'descripcion': None,
-                        'upc': None,
-                        'categoria': None
-                    }
-                    
-                    # Extraer detalles solo si está habilitado y no se ha alcanzado el límite
-                    if extract_details and (detail_limit == 0 or len(books) < detail_limit):
-                        logger.info(f"Extrayendo detalles del libro {len(books) + 1}: {titulo}")
-                        self.wait_between_requests()
-                        details = self.extract_book_details(book_url)
-                        book_data.update(details)
-                        
-                        # Volver a la página de listado
-                        self.driver.back()
-                        time.sleep(1)
-                    
-                    books.append(book_data)
-                    logger.info(f"Libro extraído: {titulo} (detalles: {extract_details and len(books) <= detail_limit})")
-                
-                except Exception as e:
-                    logger.error(f"Error al extraer libro {idx}: {e}")
-                    continue
+        # Info básica de todos los libros a partir del HTML ya descargado
+        books = parse_listing_page(self.page_html, self.page_url)
+        logger.info(f"Encontrados {len(books)} libros en la página")
         
-        except NoSuchElementException:
-            logger.error("No se encontraron libros en la página")
-        except Exception as e:
-            logger.error(f"Error al extraer libros de la página: {e}")
+        # Detalles solo si está habilitado y hasta el límite
+        for position, book in enumerate(books, 1):
+            with_details = extract_details and (detail_limit == 0 or position <= detail_limit)
+            if with_details and book.url_detalle:
+                logger.info(f"Extrayendo detalles del libro {position}: {book.titulo}")
+                self.wait_between_requests()
+                book.update_details(self.extract_book_details(book.url_detalle))
+            logger.info(f"Libro extraído: {book.titulo} (detalles: {with_details})")
         
         return books
     
-    def scrape_books(self, max_pages: int = MAX_PAGES, detail_limit: int = DETAIL_BOOKS_LIMIT) -> List[Dict]:
+    def scrape_books(
+        self,
+        max_pages: int = MAX_PAGES,
+        detail_limit: int = DETAIL_BOOKS_LIMIT,
+        on_books: Optional[Callable[[List[Book]], None]] = None,
+        parse_pool: Optional[ParsePool] = None
+    ) -> List[Book]:
         """
         Extrae libros de múltiples páginas del catálogo.
         Extrae info básica de todas las páginas, pero detalles completos solo de los primeros N libros.
+        La descarga usa el navegador y el parseo del HTML se delega al pool de procesos.
         
         Args:
             max_pages: Número máximo de páginas a extraer
             detail_limit: Número de libros para extraer detalles completos
+            on_books: Callback que recibe los libros en cuanto están completos (por ejemplo,
+                para encolarlos en el escritor de base de datos mientras sigue el scraping)
+            parse_pool: Pool de parseo del llamador, que se reutiliza entre crawls
+                (por defecto se parsea en el proceso actual)
         
         Returns:
             Lista de todos los libros extraídos
         """
         all_books = []
-        books_with_details = 0
+        listing_jobs = deque()
+        detail_jobs = []
         
+        def collect_listing(page_num: int, job) -> None:
+            """Agrega los libros de un listado parseado y emite los que no esperan detalles."""
+            try:
+                books = job.result()
+            except Exception as e:
+                logger.error(f"Error al parsear página {page_num}: {e}")
+                return
+            
+            first_position = len(all_books)
+            all_books.extend(books)
+            logger.info(f"Página {page_num} completada. Libros: {len(books)}")
+            
+            ready = books[max(0, detail_limit - first_position):]
+            if on_books and ready:
+                on_books(ready)
+        
+        if parse_pool is None:
+            parse_pool = ParsePool(workers=0)
+        
+        # Fase 1: descargar listados; cada página se parsea en el pool mientras se descarga la siguiente
         for page_num in range(1, max_pages + 1):
             try:
                 url = f"{CATALOGUE_URL}/page-{page_num}.html"
                 
                 logger.info(f"Procesando página {page_num}/{max_pages}: {url}")
                 
-                if not self.get_page(url):
+                if not self.get_page(url, ready_selector=LISTING_READY_SELECTOR):
                     logger.error(f"No se pudo cargar la página {page_num}, continuando...")
                     continue
                 
-                # Determinar si extraer detalles en esta página
-                remaining_details = detail_limit - books_with_details
-                extract_details = remaining_details > 0
-                
-                # Extraer libros de la página actual
-                books = self.extract_books_from_page(
-                    extract_details=extract_details,
-                    detail_limit=remaining_details
+                listing_jobs.append(
+                    (page_num, parse_pool.submit(parse_listing_bytes, self.page_html, url))
                 )
                 
-                # Contar cuántos libros tienen detalles completos
-                for book in books:
-                    if book.get('upc') is not None:
-                        books_with_details += 1
+                # Recoger en orden los listados ya parseados
+                while listing_jobs and listing_jobs[0][1].done():
+                    collect_listing(*listing_jobs.popleft())
                 
-                all_books.extend(books)
-                
-                logger.info(f"Página {page_num} completada. Libros: {len(books)}, Con detalles: {books_with_details}/{detail_limit}")
-                
-                # Si ya tenemos suficientes libros con detalles, solo extraer info básica
-                if books_with_details >= detail_limit:
-                    logger.info(f"Alcanzado límite de {detail_limit} libros con detalles completos")
+                page_boundary(f"pagina {page_num}")
                 
                 # Esperar antes de la siguiente página
                 if page_num < max_pages:
@@ -343,5 +330,30 @@ class BookScraper:
                 logger.error(f"Error al procesar página {page_num}: {e}")
                 continue
         
+        while listing_jobs:
+            collect_listing(*listing_jobs.popleft())
+        
+        # Fase 2: descargar detalles de los primeros N libros, parseando en el pool
+        detail_books = all_books[:detail_limit]
+        for book in detail_books:
+            if not book.url_detalle:
+                continue
+            logger.info(f"Extrayendo detalles del libro: {book.titulo}")
+            self.wait_between_requests()
+            if self.get_page(book.url_detalle, ready_selector=DETAIL_READY_SELECTOR):
+                detail_jobs.append(
+                    (book, parse_pool.submit(parse_details_bytes, self.page_html, book.url_detalle))
+                )
+        
+        for book, job in detail_jobs:
+            try:
+                book.update_details(job.result())
+            except Exception as e:
+                logger.error(f"Error al parsear detalles de '{book.titulo}': {e}")
+        
+        if on_books and detail_books:
+            on_books(detail_books)
+        
+        books_with_details = sum(1 for book in all_books if book.upc is not None)
         logger.info(f"Scraping completado. Total: {len(all_books)} libros, Con detalles: {books_with_details}")
         return all_books
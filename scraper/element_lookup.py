@@ -0,0 +1,34 @@
+"""
+Módulo de esperas explícitas sin espera implícita.
+El driver trabaja con espera implícita 0; cada página espera solo al selector que
+necesita su extractor, con timeout propio. La extracción de campos se hace sobre el
+HTML descargado (scraper/html_parser.py), por lo que un campo ausente se reporta al instante.
+"""
+
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
+
+from config import ELEMENT_TIMEOUT
+
+
+def wait_for_selector(driver, selector: str, timeout: float = ELEMENT_TIMEOUT) -> bool:
+    """
+    Espera explícitamente a que exista un elemento que coincide con el selector.
+    
+    Args:
+        driver: WebDriver activo
+        selector: Selector CSS que indica que el contenido está listo
+        timeout: Segundos máximos de espera para este selector
+    
+    Returns:
+        True si el elemento apareció antes del timeout, False en caso contrario
+    """
+    try:
+        WebDriverWait(driver, timeout).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, selector))
+        )
+        return True
+    except TimeoutException:
+        return False
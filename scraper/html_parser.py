@@ -0,0 +1,254 @@
+"""
+Módulo de extracción de libros a partir del HTML de las páginas.
+Usa solo la librería estándar (html.parser), por lo que funciona igual sobre el HTML
+descargado por Chromium que sobre páginas archivadas, sin navegador ni red.
+"""
+
+from html.parser import HTMLParser
+from typing import Dict, Iterator, List, Optional, Union
+from urllib.parse import urljoin
+
+from models.book import Book, parse_availability, parse_price_pence, parse_rating, parse_stock_units
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Elementos HTML sin etiqueta de cierre
+VOID_TAGS = {
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input',
+    'link', 'meta', 'param', 'source', 'track', 'wbr'
+}
+
+
+class Node:
+    """Nodo mínimo del árbol HTML (etiqueta, atributos e hijos)."""
+    
+    __slots__ = ('tag', 'attrs', 'children')
+    
+    def __init__(self, tag: str, attrs: Dict[str, str]):
+        self.tag = tag
+        self.attrs = attrs
+        self.children: List[Union['Node', str]] = []
+    
+    def has_class(self, class_name: str) -> bool:
+        """True si el nodo tiene la clase CSS indicada."""
+        return class_name in self.attrs.get('class', '').split()
+    
+    def iter(self, tag: str, class_name: Optional[str] = None) -> Iterator['Node']:
+        """
+        Recorre los descendientes con la etiqueta (y clase opcional) indicada.
+        
+        Args:
+            tag: Nombre de la etiqueta
+            class_name: Clase CSS requerida (opcional)
+        
+        Yields:
+            Nodos que coinciden, en orden de documento
+        """
+        for child in self.children:
+            if isinstance(child, Node):
+                if child.tag == tag and (class_name is None or child.has_class(class_name)):
+                    yield child
+                yield from child.iter(tag, class_name)
+    
+    def find(self, tag: str, class_name: Optional[str] = None) -> Optional['Node']:
+        """Retorna el primer descendiente que coincide o None."""
+        return next(self.iter(tag, class_name), None)
+    
+    def child_nodes(self, tag: str) -> List['Node']:
+        """Retorna los hijos directos con la etiqueta indicada."""
+        return [child for child in self.children if isinstance(child, Node) and child.tag == tag]
+    
+    def text(self) -> str:
+        """Texto de todos los descendientes, con espacios normalizados."""
+        parts: List[str] = []
+        self._collect_text(parts)
+        return ' '.join(''.join(parts).split())
+    
+    def _collect_text(self, parts: List[str]) -> None:
+        for child in self.children:
+            if isinstance(child, Node):
+                child._collect_text(parts)
+            else:
+                parts.append(child)
+
+
+class _TreeBuilder(HTMLParser):
+    """Construye un árbol de Node tolerante a etiquetas sin cerrar."""
+    
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root = Node('document', {})
+        self.stack = [self.root]
+    
+    def handle_starttag(self, tag, attrs):
+        node = Node(tag, {name: value or '' for name, value in attrs})
+        self.stack[-1].children.append(node)
+        if tag not in VOID_TAGS:
+            self.stack.append(node)
+    
+    def handle_startendtag(self, tag, attrs):
+        self.stack[-1].children.append(Node(tag, {name: value or '' for name, value in attrs}))
+    
+    def handle_endtag(self, tag):
+        # Cerrar hasta la etiqueta abierta correspondiente; ignorar cierres huérfanos
+        for index in range(len(self.stack) - 1, 0, -1):
+            if self.stack[index].tag == tag:
+                del self.stack[index:]
+                return
+    
+    def handle_data(self, data):
+        self.stack[-1].children.append(data)
+
+
+def parse_html(html: str) -> Node:
+    """
+    Convierte HTML en un árbol de Node.
+    
+    Args:
+        html: Contenido HTML de la página
+    
+    Returns:
+        Nodo raíz del documento
+    """
+    builder = _TreeBuilder()
+    builder.feed(html)
+    builder.close()
+    return builder.root
+
+
+def _text_of(root: Node, tag: str, class_name: Optional[str] = None) -> Optional[str]:
+    """Texto del primer descendiente que coincide o None si no existe."""
+    node = root.find(tag, class_name)
+    return node.text() if node is not None else None
+
+
+def parse_listing_page(html: str, page_url: str) -> List[Book]:
+    """
+    Extrae la información básica de todos los libros de una página de listado.
+    
+    Args:
+        html: HTML de la página de listado
+        page_url: URL de la página (para resolver URLs relativas)
+    
+    Returns:
+        Lista de registros Book con info básica y url_detalle
+    """
+    books = []
+    
+    for idx, article in enumerate(parse_html(html).iter('article', 'product_pod'), 1):
+        heading = article.find('h3')
+        link = heading.find('a') if heading is not None else None
+        if link is None or not link.attrs.get('title'):
+            logger.warning(f"Título no encontrado para el libro {idx} de {page_url}, omitiendo")
+            continue
+        titulo = link.attrs['title']
+        
+        precio_peniques = parse_price_pence(_text_of(article, 'p', 'price_color'))
+        if precio_peniques is None:
+            logger.warning(f"Precio no encontrado para: {titulo}")
+        
+        rating_node = article.find('p', 'star-rating')
+        rating = parse_rating(rating_node.attrs.get('class')) if rating_node is not None else None
+        if rating is None:
+            logger.warning(f"Rating no encontrado para: {titulo}")
+        
+        image = article.find('img')
+        books.append(Book(
+            titulo=titulo,
+            precio_peniques=precio_peniques,
+            disponibilidad=parse_availability(_text_of(article, 'p', 'availability')),
+            rating=rating,
+            url_imagen=urljoin(page_url, image.attrs['src']) if image is not None and image.attrs.get('src') else None,
+            url_detalle=urljoin(page_url, link.attrs['href']) if link.attrs.get('href') else None
+        ))
+    
+    if not books:
+        logger.error(f"No se encontraron libros en la página: {page_url}")
+    return books
+
+
+def _details_from_tree(root: Node, page_url: str) -> Dict:
+    """Extrae descripción, UPC y categoría de una página de detalle ya parseada."""
+    details = {
+        'descripcion': None,
+        'upc': None,
+        'categoria': None
+    }
+    
+    # Descripción: párrafo hijo directo de article.product_page
+    article = root.find('article', 'product_page')
+    paragraphs = article.child_nodes('p') if article is not None else []
+    if paragraphs:
+        details['descripcion'] = paragraphs[0].text()
+    else:
+        logger.warning(f"Descripción no encontrada para: {page_url}")
+    
+    # UPC de la tabla de información del producto
+    table = root.find('table', 'table')
+    for row in table.iter('tr') if table is not None else []:
+        if _text_of(row, 'th') == 'UPC':
+            details['upc'] = _text_of(row, 'td')
+            break
+    if details['upc'] is None:
+        logger.warning(f"UPC no encontrado para: {page_url}")
+    
+    # Categoría: tercer elemento del breadcrumb
+    breadcrumb = root.find('ul', 'breadcrumb')
+    items = breadcrumb.child_nodes('li') if breadcrumb is not None else []
+    if len(items) >= 3:
+        details['categoria'] = items[2].text()
+    else:
+        logger.warning(f"Categoría no encontrada para: {page_url}")
+    
+    return details
+
+
+def parse_book_details(html: str, page_url: str) -> Dict:
+    """
+    Extrae descripción, UPC y categoría de una página de detalle.
+    
+    Args:
+        html: HTML de la página de detalle
+        page_url: URL de la página (para los mensajes de log)
+    
+    Returns:
+        Diccionario con los detalles del libro (descripcion, upc, categoria)
+    """
+    return _details_from_tree(parse_html(html), page_url)
+
+
+def parse_book_page(html: str, page_url: str) -> Optional[Book]:
+    """
+    Extrae un libro completo (info básica y detalles) de su página de detalle.
+    La URL de la imagen solo se toma de los listados (miniatura), así que aquí queda vacía.
+    
+    Args:
+        html: HTML de la página de detalle
+        page_url: URL de la página
+    
+    Returns:
+        Registro Book o None si la página no tiene título
+    """
+    root = parse_html(html)
+    main = root.find('div', 'product_main')
+    titulo = _text_of(main, 'h1') if main is not None else None
+    if not titulo:
+        logger.warning(f"Título no encontrado para: {page_url}")
+        return None
+    
+    rating_node = main.find('p', 'star-rating')
+    availability = _text_of(main, 'p', 'availability')
+    
+    # Sin url_imagen: la imagen de la galería no es la miniatura del listado y
+    # alternarlas contaría como cambio en cada recrawl (ver CONTENT_FIELDS)
+    book = Book(
+        titulo=titulo,
+        precio_peniques=parse_price_pence(_text_of(main, 'p', 'price_color')),
+        disponibilidad=parse_availability(availability),
+        rating=parse_rating(rating_node.attrs.get('class')) if rating_node is not None else None,
+        url_detalle=page_url,
+        unidades=parse_stock_units(availability)
+    )
+    book.update_details(_details_from_tree(root, page_url))
+    return book
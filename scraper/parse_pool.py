@@ -0,0 +1,127 @@
+"""
+Módulo de parseo en procesos separados.
+Los fetchers entregan los bytes del HTML a un pool de procesos que ejecuta los
+extractores de scraper/html_parser.py y retorna registros Book compactos. Un
+semáforo limita las páginas pendientes de parsear para que los fetchers no se
+adelanten indefinidamente a los parsers (backpressure).
+"""
+
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from config import PARSE_WORKERS, PARSE_MAX_PENDING, PARSE_POOL_MIN_PAGES
+from models.book import Book
+from scraper.html_parser import parse_book_details, parse_listing_page
+from utils.logger import setup_logger
+from utils.profiler import submit_profiled
+
+logger = setup_logger(__name__)
+
+
+def parse_listing_bytes(html: bytes, page_url: str) -> List[Book]:
+    """Parsea una página de listado recibida como bytes UTF-8 (ejecutado en el pool)."""
+    return parse_listing_page(html.decode('utf-8'), page_url)
+
+
+def parse_details_bytes(html: bytes, page_url: str) -> Dict:
+    """Parsea una página de detalle recibida como bytes UTF-8 (ejecutado en el pool)."""
+    return parse_book_details(html.decode('utf-8'), page_url)
+
+
+def parse_workers_for(pages: int) -> int:
+    """
+    Calcula los procesos de parseo adecuados para un crawl.
+    Cada proceso (spawn) vuelve a importar el proyecto al iniciarse, lo que cuesta
+    más que parsear un crawl pequeño: por debajo de PARSE_POOL_MIN_PAGES se parsea
+    en el proceso principal.
+    
+    Args:
+        pages: Páginas (listados y detalles) que se van a parsear
+    
+    Returns:
+        Número de procesos: 0 o min(PARSE_WORKERS, pages)
+    """
+    if pages < PARSE_POOL_MIN_PAGES:
+        return 0
+    return min(PARSE_WORKERS, pages)
+
+
+# Etapa del profiler de cada parser (ver STAGE_TARGETS en utils/profiler.py)
+PARSER_STAGES = {
+    parse_listing_bytes: 'parse_listing',
+    parse_details_bytes: 'parse_details'
+}
+
+
+class ParsePool:
+    """
+    Pool de procesos de parseo con límite de trabajos pendientes.
+    Se crea una vez por proceso (run_scrape) y se reutiliza en cada crawl.
+    """
+    
+    def __init__(self, workers: int = PARSE_WORKERS, max_pending: int = PARSE_MAX_PENDING):
+        """
+        Inicializa el pool.
+        
+        Args:
+            workers: Número de procesos de parseo (0 = parsear en el proceso actual)
+            max_pending: Máximo de páginas enviadas y aún no parseadas
+        """
+        self.workers = workers
+        # 'spawn' en lugar de 'fork': el proceso tiene hilos (escritor, muestreo del
+        # profiler, logging) cuyos locks heredados podrían bloquear a los procesos hijos
+        self.executor: Optional[ProcessPoolExecutor] = (
+            ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+            if workers > 0 else None
+        )
+        self.slots = threading.BoundedSemaphore(max(1, max_pending))
+        if self.executor:
+            logger.info(f"Pool de parseo iniciado con {workers} procesos (máx. pendientes: {max_pending})")
+    
+    def submit(self, parser: Callable, html: str, page_url: str) -> Future:
+        """
+        Envía una página a parsear. Bloquea si ya hay max_pending páginas pendientes.
+        
+        Args:
+            parser: parse_listing_bytes o parse_details_bytes
+            html: HTML de la página
+            page_url: URL de la página
+        
+        Returns:
+            Future con el resultado del parser
+        """
+        html_bytes = html.encode('utf-8')
+        
+        if self.executor is None:
+            future: Future = Future()
+            try:
+                future.set_result(parser(html_bytes, page_url))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+        
+        self.slots.acquire()
+        try:
+            # Con perfilado activo, cada proceso hijo perfila su trabajo y lo envía al profiler
+            stage = PARSER_STAGES.get(parser, parser.__name__)
+            future = submit_profiled(self.executor.submit, stage, parser, html_bytes, page_url)
+        except Exception:
+            # Pool roto o cerrado: el callback nunca liberará el hueco
+            self.slots.release()
+            raise
+        future.add_done_callback(lambda _: self.slots.release())
+        return future
+    
+    def close(self) -> None:
+        """Espera a los trabajos pendientes y cierra los procesos del pool."""
+        if self.executor:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+    
+    def __enter__(self) -> 'ParsePool':
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
@@ -0,0 +1,71 @@
+"""
+Módulo de re-parseo offline.
+Aplica los extractores de scraper/html_parser.py sobre las páginas archivadas,
+sin red ni navegador, y actualiza la base de datos con el resultado.
+"""
+
+import time
+from typing import Dict
+
+from database.db_manager import (
+    DatabaseManager,
+    UPSERT_INSERTED,
+    UPSERT_UPDATED,
+    UPSERT_UNCHANGED,
+    UPSERT_ERROR
+)
+from database.page_archive import PageArchive, PAGE_DETAIL, PAGE_LISTING
+from scraper.html_parser import parse_book_page, parse_listing_page
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+def reparse_archive(db_manager: DatabaseManager, archive: PageArchive) -> Dict[str, int]:
+    """
+    Re-parsea la última versión archivada de cada página y guarda los libros.
+    Primero se procesan los listados y después los detalles, para que la
+    información completa de las páginas de detalle prevalezca. Todo el re-parseo
+    se guarda en una única transacción.
+    
+    Args:
+        db_manager: Gestor de base de datos destino
+        archive: Archivo de páginas de origen
+    
+    Returns:
+        Diccionario con contadores de páginas y resultados de upsert
+    """
+    stats = {
+        'paginas': 0,
+        UPSERT_INSERTED: 0,
+        UPSERT_UPDATED: 0,
+        UPSERT_UNCHANGED: 0,
+        UPSERT_ERROR: 0
+    }
+    started = time.monotonic()
+    
+    # Una sola transacción para todo el archivo: un commit por libro limitaría el
+    # re-parseo a la velocidad de fsync en lugar de la del parseo
+    with db_manager.get_connection() as conn:
+        cursor = conn.cursor()
+        for page_type in (PAGE_LISTING, PAGE_DETAIL):
+            for url, _, fetched_at, html in archive.iter_pages(tipo=page_type):
+                stats['paginas'] += 1
+                if page_type == PAGE_LISTING:
+                    books = parse_listing_page(html, url)
+                else:
+                    book = parse_book_page(html, url)
+                    books = [book] if book is not None else []
+                    if not books:
+                        stats[UPSERT_ERROR] += 1
+                
+                for outcome in db_manager.upsert_batch(cursor, books, verified_at=fetched_at):
+                    stats[outcome] += 1
+    
+    elapsed = time.monotonic() - started
+    logger.info(
+        f"Re-parseo completado en {elapsed:.1f}s. Páginas: {stats['paginas']}, "
+        f"Nuevos: {stats[UPSERT_INSERTED]}, Actualizados: {stats[UPSERT_UPDATED]}, "
+        f"Sin cambios: {stats[UPSERT_UNCHANGED]}, Errores: {stats[UPSERT_ERROR]}"
+    )
+    return stats
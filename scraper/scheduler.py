@@ -0,0 +1,162 @@
+"""
+Módulo del modo daemon del scraper.
+Mantiene el navegador abierto entre ciclos y prioriza los recrawls por antigüedad
+y frecuencia de cambio, dentro de un presupuesto de páginas por ciclo.
+"""
+
+import time
+from typing import Dict, Optional
+from selenium.common.exceptions import WebDriverException
+
+from config import (
+    CATALOGUE_URL,
+    DAEMON_INTERVAL,
+    DAEMON_REQUEST_BUDGET,
+    DAEMON_LISTING_PAGES,
+    RECRAWL_MIN_AGE_HOURS
+)
+from database.db_manager import (
+    DatabaseManager,
+    UPSERT_INSERTED,
+    UPSERT_UPDATED,
+    UPSERT_UNCHANGED,
+    UPSERT_ERROR
+)
+from scraper.book_scraper import BookScraper, LISTING_READY_SELECTOR
+from utils.logger import setup_logger
+from utils.profiler import page_boundary
+
+logger = setup_logger(__name__)
+
+
+class CrawlScheduler:
+    """Planificador de ciclos de crawl con navegador persistente."""
+    
+    def __init__(
+        self,
+        db_manager: DatabaseManager,
+        interval: float = DAEMON_INTERVAL,
+        request_budget: int = DAEMON_REQUEST_BUDGET,
+        listing_pages: int = DAEMON_LISTING_PAGES,
+        min_age_hours: float = RECRAWL_MIN_AGE_HOURS
+    ):
+        """
+        Inicializa el planificador.
+        
+        Args:
+            db_manager: Gestor de base de datos
+            interval: Segundos entre el inicio de dos ciclos
+            request_budget: Máximo de páginas descargadas por ciclo
+            listing_pages: Páginas de listado revisadas en cada ciclo
+            min_age_hours: Antigüedad mínima para volver a verificar un libro
+        """
+        self.db_manager = db_manager
+        self.interval = interval
+        self.request_budget = request_budget
+        self.listing_pages = listing_pages
+        self.min_age_hours = min_age_hours
+        self.scraper: Optional[BookScraper] = None
+    
+    def ensure_scraper(self) -> BookScraper:
+        """
+        Retorna el scraper activo, iniciándolo si aún no existe.
+        
+        Returns:
+            Instancia de BookScraper con el navegador abierto
+        """
+        if self.scraper is None:
+            logger.info("Iniciando navegador persistente para el daemon...")
+            self.scraper = BookScraper()
+        return self.scraper
+    
+    def close_scraper(self) -> None:
+        """Cierra el navegador actual; el siguiente ensure_scraper() lo reinicia."""
+        if self.scraper:
+            self.scraper.close()
+        self.scraper = None
+    
+    def run_cycle(self) -> Dict[str, int]:
+        """
+        Ejecuta un ciclo: listado para descubrir libros nuevos y recrawl de los
+        libros más prioritarios hasta agotar el presupuesto de páginas.
+        
+        Returns:
+            Diccionario con contadores del ciclo
+        """
+        stats = {
+            'paginas': 0,
+            UPSERT_INSERTED: 0,
+            UPSERT_UPDATED: 0,
+            UPSERT_UNCHANGED: 0,
+            UPSERT_ERROR: 0
+        }
+        
+        parameters = {
+            'presupuesto': self.request_budget,
+            'paginas_listado': self.listing_pages,
+            'antiguedad_minima_horas': self.min_age_hours
+        }
+        with self.db_manager.track_run('daemon', parameters, stats):
+            try:
+                scraper = self.ensure_scraper()
+                
+                # Descubrimiento: primeras páginas del listado (sin detalles)
+                for page_num in range(1, min(self.listing_pages, self.request_budget) + 1):
+                    url = f"{CATALOGUE_URL}/page-{page_num}.html"
+                    stats['paginas'] += 1
+                    if not scraper.get_page(url, ready_selector=LISTING_READY_SELECTOR):
+                        continue
+                    for book in scraper.extract_books_from_page(extract_details=False):
+                        stats[self.db_manager.upsert_book(book)] += 1
+                    page_boundary(f"pagina {page_num}")
+                    scraper.wait_between_requests()
+                
+                # Recrawl: libros priorizados por antigüedad y frecuencia de cambio
+                remaining = self.request_budget - stats['paginas']
+                stale_books = self.db_manager.get_stale_books(remaining, self.min_age_hours) if remaining > 0 else []
+                logger.info(f"Libros a verificar en este ciclo: {len(stale_books)}")
+                
+                for stale in stale_books:
+                    stats['paginas'] += 1
+                    book = scraper.extract_book(stale['url_detalle'])
+                    if book is None:
+                        stats[UPSERT_ERROR] += 1
+                    else:
+                        stats[self.db_manager.upsert_book(book)] += 1
+                    scraper.wait_between_requests()
+            
+            except WebDriverException as e:
+                # El navegador se reinicia en el siguiente ciclo
+                logger.error(f"Error del navegador durante el ciclo, se reiniciará: {e}")
+                self.close_scraper()
+        
+        logger.info(
+            f"Ciclo completado. Páginas: {stats['paginas']}, "
+            f"Nuevos: {stats[UPSERT_INSERTED]}, Actualizados: {stats[UPSERT_UPDATED]}, "
+            f"Sin cambios: {stats[UPSERT_UNCHANGED]}, Errores: {stats[UPSERT_ERROR]}"
+        )
+        return stats
+    
+    def run(self, max_cycles: Optional[int] = None) -> None:
+        """
+        Ejecuta ciclos de forma continua respetando el intervalo configurado.
+        
+        Args:
+            max_cycles: Número máximo de ciclos (None = indefinido)
+        """
+        cycle = 0
+        try:
+            while max_cycles is None or cycle < max_cycles:
+                cycle += 1
+                started = time.monotonic()
+                logger.info(f"Iniciando ciclo {cycle} del daemon")
+                self.run_cycle()
+                
+                if max_cycles is not None and cycle >= max_cycles:
+                    break
+                
+                wait = max(0.0, self.interval - (time.monotonic() - started))
+                logger.info(f"Próximo ciclo en {wait:.0f} segundos")
+                time.sleep(wait)
+        finally:
+            self.close_scraper()
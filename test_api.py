@@ -0,0 +1,132 @@
+"""
+Script de prueba para verificar la API HTTP de consultas de solo lectura.
+"""
+
+import sys
+import os
+import json
+import tempfile
+import threading
+import urllib.error
+import urllib.request
+
+# Agregar el directorio padre al path para importar módulos
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from api.server import create_server
+from database.db_manager import DatabaseManager
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+def _get(base_url, path, etag=None):
+    """Realiza un GET y retorna (estado, cuerpo, ETag)."""
+    request = urllib.request.Request(base_url + path)
+    if etag:
+        request.add_header('If-None-Match', etag)
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, json.loads(response.read()), response.headers['ETag']
+    except urllib.error.HTTPError as e:
+        body = e.read()
+        return e.code, json.loads(body) if body else None, e.headers['ETag']
+
+
+def test_query_api():
+    """Prueba la paginación keyset, los filtros, el ETag y la invalidación de la caché."""
+    
+    print("=" * 80)
+    print("PRUEBA DE LA API DE CONSULTAS")
+    print("=" * 80)
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_manager = DatabaseManager(os.path.join(tmp_dir, 'api.db'))
+        db_manager.insert_books([
+            {'titulo': f'Libro {i}', 'precio': 10.0 + i, 'rating': i % 5 + 1, 'upc': f'UPC-{i}',
+             'categoria': 'Poetry' if i % 2 else 'Fiction'}
+            for i in range(25)
+        ])
+        
+        server = create_server(db_manager, host='127.0.0.1', port=0)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+        
+        try:
+            # Test 1: Paginación keyset
+            print("\n" + "-" * 80)
+            print("TEST 1: Paginación por id")
+            print("-" * 80)
+            
+            ids = []
+            path = '/libros?limite=10'
+            while True:
+                status, body, _ = _get(base_url, path)
+                assert status == 200
+                ids.extend(book['id'] for book in body['libros'])
+                if body['siguiente'] is None:
+                    break
+                path = f"/libros?limite=10&despues={body['siguiente']}"
+            assert ids == list(range(1, 26))
+            print("✅ 25 libros recorridos en 3 páginas sin repetidos")
+            
+            # Test 2: Filtros y búsqueda por UPC
+            print("\n" + "-" * 80)
+            print("TEST 2: Filtros y UPC")
+            print("-" * 80)
+            
+            status, body, _ = _get(base_url, '/libros?categoria=Poetry&precio_min=20&precio_max=30')
+            precios = [book['precio'] for book in body['libros']]
+            assert precios == [21.0, 23.0, 25.0, 27.0, 29.0]
+            status, body, _ = _get(base_url, '/libros?rating=1')
+            assert all(book['rating'] == 1 for book in body['libros']) and len(body['libros']) == 5
+            
+            status, body, _ = _get(base_url, '/libros/UPC-3')
+            assert status == 200 and body['titulo'] == 'Libro 3'
+            status, _, _ = _get(base_url, '/libros/NO-EXISTE')
+            assert status == 404
+            status, body, _ = _get(base_url, '/libros?rating=9')
+            assert status == 400 and 'rating' in body['error']
+            print("✅ Filtros, UPC y errores correctos")
+            
+            # Test 3: ETag y caché invalidada al confirmar nuevas inserciones
+            print("\n" + "-" * 80)
+            print("TEST 3: ETag y caché")
+            print("-" * 80)
+            
+            status, body, etag = _get(base_url, '/libros?categoria=Fiction')
+            assert len(body['libros']) == 13
+            status, body, same_etag = _get(base_url, '/libros?categoria=Fiction', etag=etag)
+            assert status == 304 and same_etag == etag
+            
+            db_manager.insert_book({'titulo': 'Libro nuevo', 'upc': 'UPC-N', 'categoria': 'Fiction'})
+            status, body, new_etag = _get(base_url, '/libros?categoria=Fiction', etag=etag)
+            assert status == 200 and new_etag != etag
+            assert len(body['libros']) == 14
+            
+            # El ETag no enmascara rutas desconocidas, libros inexistentes ni parámetros inválidos
+            status, body, _ = _get(base_url, '/desconocida', etag=new_etag)
+            assert status == 404 and 'Ruta no encontrada' in body['error']
+            status, body, _ = _get(base_url, '/libros/NO-EXISTE', etag=new_etag)
+            assert status == 404 and 'UPC' in body['error']
+            status, body, _ = _get(base_url, '/libros?rating=9', etag=new_etag)
+            assert status == 400 and 'rating' in body['error']
+            status, _, _ = _get(base_url, '/libros/UPC-3', etag=new_etag)
+            assert status == 304
+            print("✅ 304 sin cambios, respuesta nueva tras el commit y errores antes del ETag")
+        finally:
+            server.shutdown()
+            server.server_close()
+            server.service.close()
+    
+    print("\n" + "=" * 80)
+
+
+if __name__ == "__main__":
+    try:
+        test_query_api()
+        sys.exit(0)
+    except AssertionError as e:
+        logger.error(f"Prueba fallida: {e}", exc_info=True)
+        sys.exit(1)
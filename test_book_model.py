@@ -0,0 +1,109 @@
+"""
+Script de prueba para verificar el registro compacto Book.
+Prueba el parseo de precio, rating y disponibilidad, y la vista de compatibilidad.
+"""
+
+import sys
+import os
+import tempfile
+
+# Agregar el directorio padre al path para importar módulos
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from database.db_manager import DatabaseManager
+from models.book import (
+    Book,
+    Disponibilidad,
+    parse_availability,
+    parse_price_pence,
+    parse_rating,
+    parse_stock_units
+)
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+def test_book_model():
+    """Prueba el parseo de campos y la vista tipo diccionario de Book."""
+    
+    print("=" * 80)
+    print("PRUEBA DEL REGISTRO BOOK")
+    print("=" * 80)
+    
+    # Test 1: Parseo de campos
+    print("\n" + "-" * 80)
+    print("TEST 1: Parseo de precio, rating y disponibilidad")
+    print("-" * 80)
+    
+    assert parse_price_pence('£51.77') == 5177
+    assert parse_price_pence('£0.5') == 50
+    assert parse_price_pence('') is None
+    assert parse_rating('star-rating Three') == 3
+    assert parse_rating('star-rating') is None
+    assert parse_availability('In stock (22 available)') == Disponibilidad.EN_STOCK
+    assert parse_availability(' Out of stock ') == Disponibilidad.AGOTADO
+    assert parse_stock_units('In stock (22 available)') == 22
+    assert parse_stock_units('In stock') is None
+    # Un texto no reconocido se pierde a propósito (el sitio solo usa los dos anteriores)
+    assert parse_availability('Pre-order') == Disponibilidad.DESCONOCIDA
+    assert Book.from_dict({'titulo': 'X', 'disponibilidad': 'Pre-order'})['disponibilidad'] is None
+    print("✅ Parseo correcto")
+    
+    # Test 2: Vista de compatibilidad
+    print("\n" + "-" * 80)
+    print("TEST 2: Vista tipo diccionario")
+    print("-" * 80)
+    
+    book = Book(
+        titulo='A Light in the Attic',
+        precio_peniques=5177,
+        disponibilidad=Disponibilidad.EN_STOCK,
+        rating=3
+    )
+    assert not hasattr(book, '__dict__')
+    assert book.get('precio') == 51.77
+    assert book['disponibilidad'] == 'In stock'
+    assert book.get('upc') is None
+    assert book.get('inexistente', 'x') == 'x'
+    assert Book.from_dict(book.to_dict()) == book
+    
+    # Las unidades del texto original se conservan en su propio campo
+    detailed = Book.from_dict({'titulo': 'Sharp Objects', 'disponibilidad': 'In stock (22 available)'})
+    assert detailed.disponibilidad == Disponibilidad.EN_STOCK and detailed.unidades == 22
+    assert detailed['disponibilidad'] == 'In stock' and detailed.get('unidades') == 22
+    
+    # Hashable de forma consistente con __eq__ (deduplicación con sets y dicts)
+    copy = Book.from_dict(book.to_dict())
+    assert hash(copy) == hash(book) and len({book, copy, detailed}) == 2
+    print(f"Vista: {book.to_dict()}")
+    print("✅ Vista de compatibilidad correcta")
+    
+    # Test 3: Inserción por lotes con Book y diccionarios mezclados
+    print("\n" + "-" * 80)
+    print("TEST 3: Inserción por lotes")
+    print("-" * 80)
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_manager = DatabaseManager(os.path.join(tmp_dir, 'book.db'))
+        duplicate = {'titulo': 'A Light in the Attic', 'precio': 10.0, 'upc': None}
+        results = db_manager.insert_books([book, duplicate, Book(titulo='Otro libro'), detailed])
+        assert results == [True, False, True, True]
+        
+        with db_manager.get_connection() as conn:
+            row = conn.execute("SELECT precio, disponibilidad FROM libros WHERE rating = 3").fetchone()
+            assert row['precio'] == 51.77 and row['disponibilidad'] == 'In stock'
+            row = conn.execute("SELECT disponibilidad, unidades FROM libros WHERE titulo = 'Sharp Objects'").fetchone()
+        assert tuple(row) == ('In stock', 22)
+    print("✅ Inserción por lotes correcta")
+    
+    print("\n" + "=" * 80)
+
+
+if __name__ == "__main__":
+    try:
+        test_book_model()
+        sys.exit(0)
+    except AssertionError as e:
+        logger.error(f"Prueba fallida: {e}", exc_info=True)
+        sys.exit(1)
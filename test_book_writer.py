@@ -0,0 +1,102 @@
+"""
+Script de prueba para verificar el escritor en segundo plano (group commit).
+"""
+
+import sys
+import os
+import sqlite3
+import tempfile
+
+# Agregar el directorio padre al path para importar módulos
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from database.book_writer import BookWriter
+from database.db_manager import DatabaseManager, INSERT_DUPLICATE, UPSERT_ERROR, UPSERT_INSERTED
+from models.book import Book
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+def test_book_writer():
+    """Prueba el group commit, la barrera flush, los contadores y los errores del hilo."""
+    
+    print("=" * 80)
+    print("PRUEBA DEL ESCRITOR EN SEGUNDO PLANO")
+    print("=" * 80)
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_manager = DatabaseManager(os.path.join(tmp_dir, 'writer.db'))
+        outcomes = []
+        writer = BookWriter(
+            db_manager, batch_size=10, flush_interval=60,
+            on_outcome=lambda book, outcome: outcomes.append((book.get('titulo'), outcome))
+        )
+        
+        # Test 1: flush actúa como barrera aunque el grupo no esté lleno
+        print("\n" + "-" * 80)
+        print("TEST 1: Barrera flush")
+        print("-" * 80)
+        
+        writer.submit_many([Book(titulo=f'Libro {i}', upc=f'UPC-{i}') for i in range(3)])
+        writer.flush()
+        assert db_manager.get_book_count() == 3
+        assert outcomes == [(f'Libro {i}', UPSERT_INSERTED) for i in range(3)]
+        print("✅ Libros visibles tras flush")
+        
+        # Test 2: Resultados por libro (insertado, duplicado, error)
+        print("\n" + "-" * 80)
+        print("TEST 2: Resultados por libro")
+        print("-" * 80)
+        
+        writer.submit(Book(titulo='Libro 0', upc='UPC-0'))
+        writer.submit({'titulo': None})
+        writer.submit(Book(titulo='Libro nuevo'))
+        writer.submit(Book(titulo='Completo', upc='UPC-C', descripcion='Texto', categoria='Poetry'))
+        stats = writer.close()
+        print(f"Estadísticas: {stats}")
+        assert stats == {UPSERT_INSERTED: 5, INSERT_DUPLICATE: 1, UPSERT_ERROR: 1}
+        assert outcomes[3:] == [
+            ('Libro 0', INSERT_DUPLICATE),
+            (None, UPSERT_ERROR),
+            ('Libro nuevo', UPSERT_INSERTED),
+            ('Completo', UPSERT_INSERTED)
+        ]
+        assert writer.with_details == 1
+        assert writer.commits == 2
+        assert db_manager.get_book_count() == 5
+        print("✅ Resultados correctos con un commit por grupo")
+        
+        # Test 3: Un error que detiene el hilo se relanza en lugar de bloquear
+        print("\n" + "-" * 80)
+        print("TEST 3: Errores del hilo escritor")
+        print("-" * 80)
+        
+        writer = BookWriter(db_manager, batch_size=10, flush_interval=60, queue_size=1)
+        writer.submit(42)  # No es un libro: insert_batch lanza AttributeError
+        for action in (writer.flush, lambda: writer.submit_many([Book(titulo='Tarde')] * 3), writer.close):
+            try:
+                action()
+                assert False, "Se esperaba AttributeError"
+            except AttributeError:
+                pass
+        
+        db_manager.db_path = os.path.join(tmp_dir, 'no_existe', 'writer.db')
+        writer = BookWriter(db_manager)
+        try:
+            writer.flush()
+            assert False, "Se esperaba sqlite3.OperationalError"
+        except sqlite3.OperationalError:
+            pass
+        print("✅ Errores del hilo relanzados sin bloquear")
+    
+    print("\n" + "=" * 80)
+
+
+if __name__ == "__main__":
+    try:
+        test_book_writer()
+        sys.exit(0)
+    except AssertionError as e:
+        logger.error(f"Prueba fallida: {e}", exc_info=True)
+        sys.exit(1)
@@ -0,0 +1,208 @@
+"""
+Script de prueba para verificar los extractores basados en HTML.
+Usa fragmentos con la estructura de books.toscrape.com, sin navegador ni red.
+"""
+
+import sys
+import os
+import tempfile
+
+# Agregar el directorio padre al path para importar módulos
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from config import PARSE_POOL_MIN_PAGES, PARSE_WORKERS
+from database.db_manager import DatabaseManager, UPSERT_UNCHANGED, UPSERT_UPDATED
+from database.page_archive import PageArchive, PAGE_DETAIL, PAGE_LISTING
+from models.book import Disponibilidad
+from scraper.html_parser import parse_book_page, parse_listing_page
+from scraper.parse_pool import ParsePool, parse_details_bytes, parse_listing_bytes, parse_workers_for
+from scraper.reparse import reparse_archive
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+LISTING_URL = 'https://books.toscrape.com/catalogue/page-1.html'
+LISTING_HTML = """
+<html><body><section><ol class="row">
+<li><article class="product_pod">
+    <div class="image_container">
+        <a href="a-light-in-the-attic_1000/index.html"><img src="../media/cache/2c/da/2cdad67c.jpg" alt="A Light in the Attic" class="thumbnail"></a>
+    </div>
+    <p class="star-rating Three"><i class="icon-star"></i></p>
+    <h3><a href="a-light-in-the-attic_1000/index.html" title="A Light in the Attic">A Light in the ...</a></h3>
+    <div class="product_price">
+        <p class="price_color">£51.77</p>
+        <p class="instock availability"><i class="icon-ok"></i> In stock</p>
+    </div>
+</article></li>
+<li><article class="product_pod">
+    <p class="star-rating One"></p>
+    <h3><a href="tipping-the-velvet_999/index.html" title="Tipping the Velvet">Tipping the Velvet</a></h3>
+    <p class="price_color">£53.74</p>
+    <p class="availability">Out of stock</p>
+</article></li>
+</ol></section></body></html>
+"""
+
+DETAIL_URL = 'https://books.toscrape.com/catalogue/a-light-in-the-attic_1000/index.html'
+DETAIL_HTML = """
+<html><body>
+<ul class="breadcrumb">
+    <li><a href="../../index.html">Home</a></li>
+    <li><a href="../category/books_1/index.html">Books</a></li>
+    <li><a href="../category/books/poetry_23/index.html">Poetry</a></li>
+    <li class="active">A Light in the Attic</li>
+</ul>
+<article class="product_page">
+    <div class="row">
+        <div class="col-sm-6"><div id="product_gallery"><img src="../../media/cache/fe/72/fe72f0532.jpg" alt="A Light in the Attic" /></div></div>
+        <div class="col-sm-6 product_main">
+            <h1>A Light in the Attic</h1>
+            <p class="price_color">£51.77</p>
+            <p class="instock availability"><i class="icon-ok"></i> In stock (22 available)</p>
+            <p class="star-rating Three"></p>
+        </div>
+    </div>
+    <div id="product_description" class="sub-header"><h2>Product Description</h2></div>
+    <p>It&#39;s hard to imagine a world without A Light in the Attic.</p>
+    <table class="table table-striped">
+        <tr><th>UPC</th><td>a897fe39b1053632</td></tr>
+        <tr><th>Product Type</th><td>Books</td></tr>
+    </table>
+</article>
+</body></html>
+"""
+
+
+def test_html_extractors():
+    """Prueba la extracción de listado y detalle desde HTML."""
+    
+    print("=" * 80)
+    print("PRUEBA DE EXTRACTORES HTML")
+    print("=" * 80)
+    
+    # Test 1: Página de listado
+    print("\n" + "-" * 80)
+    print("TEST 1: Página de listado")
+    print("-" * 80)
+    
+    books = parse_listing_page(LISTING_HTML, LISTING_URL)
+    assert [book.titulo for book in books] == ['A Light in the Attic', 'Tipping the Velvet']
+    assert books[0].precio_peniques == 5177 and books[0].rating == 3
+    assert books[0].url_detalle == DETAIL_URL
+    assert books[0].url_imagen == 'https://books.toscrape.com/media/cache/2c/da/2cdad67c.jpg'
+    assert books[1].disponibilidad == Disponibilidad.AGOTADO and books[1].url_imagen is None
+    print("✅ Listado extraído correctamente")
+    
+    # Test 2: Página de detalle
+    print("\n" + "-" * 80)
+    print("TEST 2: Página de detalle")
+    print("-" * 80)
+    
+    book = parse_book_page(DETAIL_HTML, DETAIL_URL)
+    print(f"Libro: {book.to_dict()}")
+    assert book.titulo == 'A Light in the Attic'
+    assert book.upc == 'a897fe39b1053632'
+    assert book.categoria == 'Poetry'
+    assert book.descripcion == "It's hard to imagine a world without A Light in the Attic."
+    assert book.disponibilidad == Disponibilidad.EN_STOCK and book.unidades == 22
+    assert book.url_imagen is None
+    print("✅ Detalle extraído correctamente")
+    
+    print("\n" + "=" * 80)
+
+
+def test_parse_pool():
+    """Prueba el parseo en procesos separados con backpressure."""
+    
+    print("=" * 80)
+    print("PRUEBA DEL POOL DE PARSEO")
+    print("=" * 80)
+    
+    with ParsePool(workers=2, max_pending=1) as parse_pool:
+        listing_jobs = [parse_pool.submit(parse_listing_bytes, LISTING_HTML, LISTING_URL) for _ in range(4)]
+        detail_job = parse_pool.submit(parse_details_bytes, DETAIL_HTML, DETAIL_URL)
+        
+        for job in listing_jobs:
+            assert [book.titulo for book in job.result()] == ['A Light in the Attic', 'Tipping the Velvet']
+        assert detail_job.result()['upc'] == 'a897fe39b1053632'
+    
+    # Un envío fallido (pool cerrado) no consume el hueco de pendientes
+    parse_pool = ParsePool(workers=1, max_pending=1)
+    parse_pool.executor.shutdown(wait=True)
+    for _ in range(2):
+        try:
+            parse_pool.submit(parse_listing_bytes, LISTING_HTML, LISTING_URL)
+            assert False, "Se esperaba RuntimeError"
+        except RuntimeError:
+            pass
+    assert parse_pool.slots.acquire(blocking=False)
+    
+    # Los crawls pequeños se parsean en el proceso principal
+    assert parse_workers_for(8) == 0
+    assert parse_workers_for(PARSE_POOL_MIN_PAGES) == min(PARSE_WORKERS, PARSE_POOL_MIN_PAGES)
+    print("✅ Pool de parseo correcto")
+    
+    print("\n" + "=" * 80)
+
+
+def test_reparse_archive():
+    """Prueba el archivo de páginas y el re-parseo offline."""
+    
+    print("=" * 80)
+    print("PRUEBA DE RE-PARSEO DEL ARCHIVO")
+    print("=" * 80)
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        archive = PageArchive(os.path.join(tmp_dir, 'paginas.db'))
+        archive.store(LISTING_URL, LISTING_HTML, PAGE_LISTING)
+        archive.store(DETAIL_URL, DETAIL_HTML, PAGE_DETAIL)
+        archive.store(DETAIL_URL, DETAIL_HTML, PAGE_DETAIL)
+        assert archive.get_page_count() == 3
+        assert len(list(archive.iter_pages())) == 2
+        
+        db_manager = DatabaseManager(os.path.join(tmp_dir, 'libros.db'))
+        stats = reparse_archive(db_manager, archive)
+        print(f"Estadísticas: {stats}")
+        assert stats['paginas'] == 2
+        assert db_manager.get_book_count() == 2
+        
+        with db_manager.get_connection() as conn:
+            row = conn.execute("SELECT upc, categoria FROM libros WHERE titulo = 'A Light in the Attic'").fetchone()
+        assert row['upc'] == 'a897fe39b1053632' and row['categoria'] == 'Poetry'
+        
+        # Re-parsear el mismo archivo no registra cambios ni mueve la versión de los datos
+        with db_manager.get_connection() as conn:
+            changes = dict(conn.execute("SELECT titulo, cambios FROM libros").fetchall())
+        version = db_manager.get_data_version()
+        for _ in range(3):
+            stats = reparse_archive(db_manager, archive)
+            assert stats[UPSERT_UPDATED] == 0 and stats[UPSERT_UNCHANGED] == 3
+        with db_manager.get_connection() as conn:
+            assert dict(conn.execute("SELECT titulo, cambios FROM libros").fetchall()) == changes
+        assert db_manager.get_data_version() == version
+        
+        # Un archivo más antiguo que la última verificación no la hace retroceder
+        with archive.get_connection() as conn:
+            conn.execute("UPDATE paginas SET fecha_descarga = '2020-01-01 00:00:00'")
+        with db_manager.get_connection() as conn:
+            conn.execute("UPDATE libros SET fecha_verificacion = '2030-01-01 00:00:00' WHERE titulo = 'Tipping the Velvet'")
+        reparse_archive(db_manager, archive)
+        with db_manager.get_connection() as conn:
+            dates = dict(conn.execute("SELECT titulo, fecha_verificacion FROM libros").fetchall())
+        assert dates['Tipping the Velvet'] == '2030-01-01 00:00:00'
+        assert dates['A Light in the Attic'] > '2020-01-01 00:00:00'
+    print("✅ Re-parseo correcto")
+    
+    print("\n" + "=" * 80)
+
+
+if __name__ == "__main__":
+    try:
+        test_html_extractors()
+        test_parse_pool()
+        test_reparse_archive()
+        sys.exit(0)
+    except AssertionError as e:
+        logger.error(f"Prueba fallida: {e}", exc_info=True)
+        sys.exit(1)
@@ -0,0 +1,117 @@
+"""
+Script de prueba para verificar la fusión de bases de datos de varios nodos.
+"""
+
+import sys
+import os
+import tempfile
+
+# Agregar el directorio padre al path para importar módulos
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from database.db_manager import DatabaseManager
+from database.merge import merge_databases
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+def test_merge_databases():
+    """Prueba la deduplicación por UPC y título y la preferencia por la fila más completa."""
+    
+    print("=" * 80)
+    print("PRUEBA DE FUSIÓN DE BASES DE DATOS")
+    print("=" * 80)
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        target = DatabaseManager(os.path.join(tmp_dir, 'destino.db'))
+        nodo_a = DatabaseManager(os.path.join(tmp_dir, 'nodo_a.db'))
+        nodo_b = DatabaseManager(os.path.join(tmp_dir, 'nodo_b.db'))
+        
+        target.insert_book({'titulo': 'Libro A', 'precio': 10.0, 'upc': 'UPC-A', 'categoria': 'Fiction'})
+        target.insert_book({'titulo': 'Libro B', 'precio': 20.0, 'categoria': 'Poetry'})
+        
+        # Nodo A: versión más completa de A, versión básica de C y libro nuevo D
+        nodo_a.insert_book({'titulo': 'Libro A', 'precio': 10.0, 'upc': 'UPC-A', 'categoria': 'Fiction',
+                            'descripcion': 'Descripción A', 'rating': 4})
+        nodo_a.insert_book({'titulo': 'Libro C', 'precio': 30.0})
+        nodo_a.insert_book({'titulo': 'Libro D', 'precio': 40.0, 'upc': 'UPC-D'})
+        
+        # Nodo B: B con UPC (completa la fila sin UPC), C completo y D repetido
+        nodo_b.insert_book({'titulo': 'Libro B', 'precio': 20.0, 'upc': 'UPC-B', 'categoria': 'Poetry'})
+        nodo_b.insert_book({'titulo': 'Libro C', 'precio': 30.0, 'upc': 'UPC-C', 'categoria': 'Fiction'})
+        nodo_b.insert_book({'titulo': 'Libro D', 'precio': 40.0, 'upc': 'UPC-D'})
+        
+        # Test 1: Fusión de varios nodos
+        print("\n" + "-" * 80)
+        print("TEST 1: Fusión por UPC y título")
+        print("-" * 80)
+        
+        stats = merge_databases(target, [nodo_a.db_path, nodo_b.db_path])
+        print(f"Estadísticas: {stats}")
+        assert stats['fuentes'] == 2 and stats['errores'] == 0
+        assert stats['leidos'] == 6
+        assert target.get_book_count() == 4
+        
+        with target.get_connection() as conn:
+            rows = {row['titulo']: row for row in conn.execute("SELECT * FROM libros")}
+        assert rows['Libro A']['descripcion'] == 'Descripción A'
+        assert rows['Libro A']['rating'] == 4
+        assert rows['Libro B']['upc'] == 'UPC-B'
+        assert rows['Libro C']['upc'] == 'UPC-C' and rows['Libro C']['categoria'] == 'Fiction'
+        print("✅ Duplicados fusionados conservando la fila más completa")
+        
+        # Test 2: Volver a fusionar no cambia nada
+        print("\n" + "-" * 80)
+        print("TEST 2: Fusión idempotente")
+        print("-" * 80)
+        
+        stats = merge_databases(target, [nodo_a.db_path, nodo_b.db_path])
+        assert stats['insertados'] == 0 and stats['actualizados'] == 0
+        assert target.get_book_count() == 4
+        print("✅ Segunda fusión sin cambios")
+        
+        # Test 3: Los resúmenes siguen siendo consistentes y las rutas inválidas se omiten
+        print("\n" + "-" * 80)
+        print("TEST 3: Resúmenes y rutas inexistentes")
+        print("-" * 80)
+        
+        incremental = target.get_category_summary()
+        target.rebuild_summaries()
+        assert incremental == target.get_category_summary()
+        
+        stats = merge_databases(target, [os.path.join(tmp_dir, 'no_existe.db')])
+        assert stats['leidos'] == 0
+        assert not os.path.exists(os.path.join(tmp_dir, 'no_existe.db'))
+        print("✅ Resúmenes consistentes tras la fusión")
+        
+        # Test 4: Un libro que modifican las dos actualizaciones cuenta una sola vez
+        print("\n" + "-" * 80)
+        print("TEST 4: Coincidencia por UPC y por título")
+        print("-" * 80)
+        
+        target.insert_book({'titulo': 'Libro E', 'upc': 'UPC-E', 'rating': 3, 'categoria': 'Poetry'})
+        nodo_c = DatabaseManager(os.path.join(tmp_dir, 'nodo_c.db'))
+        # Mismo UPC con otro título (rellena el precio) y mismo título sin UPC (rellena la descripción)
+        nodo_c.insert_book({'titulo': 'Libro E (reedición)', 'upc': 'UPC-E', 'precio': 5.0})
+        nodo_c.insert_book({'titulo': 'Libro E', 'descripcion': 'Descripción E'})
+        
+        stats = merge_databases(target, [nodo_c.db_path])
+        print(f"Estadísticas: {stats}")
+        with target.get_connection() as conn:
+            row = conn.execute("SELECT * FROM libros WHERE upc = 'UPC-E'").fetchone()
+        assert row['precio'] == 5.0 and row['descripcion'] == 'Descripción E'
+        assert stats['leidos'] == 2 and stats['insertados'] == 0
+        assert stats['actualizados'] == 1 and stats['omitidos'] == 1
+        print("✅ Libro actualizado por UPC y por título contado una vez")
+    
+    print("\n" + "=" * 80)
+
+
+if __name__ == "__main__":
+    try:
+        test_merge_databases()
+        sys.exit(0)
+    except AssertionError as e:
+        logger.error(f"Prueba fallida: {e}", exc_info=True)
+        sys.exit(1)
@@ -0,0 +1,96 @@
+"""
+Script de prueba para verificar el índice de casi duplicados (MinHash/LSH).
+"""
+
+import sys
+import os
+import tempfile
+
+# Agregar el directorio padre al path para importar módulos
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from database.db_manager import DatabaseManager
+from database.near_duplicates import FIELD_TITLE, normalize_text, shingles
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+DESCRIPCION = (
+    "A thrilling story about a young woman who discovers that the quiet town she grew up in "
+    "hides a secret society of forgers, and that her own family has been part of it for generations."
+)
+
+
+def test_near_duplicates():
+    """Prueba la normalización, el índice incremental y el informe de pares."""
+    
+    print("=" * 80)
+    print("PRUEBA DE CASI DUPLICADOS")
+    print("=" * 80)
+    
+    # Test 1: Normalización de títulos
+    print("\n" + "-" * 80)
+    print("TEST 1: Normalización")
+    print("-" * 80)
+    
+    assert normalize_text("Pretending (The Fine Art of Pretending #2)", FIELD_TITLE) == 'pretending'
+    assert normalize_text("Café, Society!") == 'cafe society'
+    assert shingles(None, FIELD_TITLE) == frozenset()
+    print("✅ Títulos normalizados sin puntuación ni sufijo de serie")
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_manager = DatabaseManager(os.path.join(tmp_dir, 'casi.db'))
+        index = db_manager.near_duplicates
+        
+        # Test 2: El índice se actualiza al insertar
+        print("\n" + "-" * 80)
+        print("TEST 2: Índice incremental")
+        print("-" * 80)
+        
+        db_manager.insert_book({'titulo': 'The Art of Forgery', 'upc': 'UPC-1', 'descripcion': DESCRIPCION})
+        db_manager.insert_books([
+            {'titulo': 'The Art of Forgery (Forgers #2)', 'upc': 'UPC-2'},
+            {'titulo': 'A Light in the Attic', 'upc': 'UPC-3'},
+            {'titulo': 'Silent Town', 'upc': 'UPC-4', 'descripcion': DESCRIPCION + " A sequel follows."},
+        ])
+        
+        with db_manager.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT COUNT(*) FROM minhash_pendientes")
+            assert cursor.fetchone()[0] == 0
+            cursor.execute("SELECT COUNT(*) FROM minhash_firmas")
+            assert cursor.fetchone()[0] == 6
+            
+            similar = index.find_similar(cursor, 'The Art of Forgery!')
+            print(f"Similares: {similar}")
+            assert {match['id'] for match in similar} == {1, 2}
+        print("✅ Libros indexados al insertarlos y encontrados por LSH")
+        
+        # Test 3: Informe de pares del catálogo
+        print("\n" + "-" * 80)
+        print("TEST 3: Informe de pares")
+        print("-" * 80)
+        
+        pairs = index.report()
+        print(f"Pares: {pairs}")
+        found = {(pair['id_a'], pair['id_b'], pair['campo']) for pair in pairs}
+        assert (1, 2, 'titulo') in found
+        assert (1, 4, 'descripcion') in found
+        assert not any(3 in (pair['id_a'], pair['id_b']) for pair in pairs)
+        
+        # Los libros borrados salen del índice
+        with db_manager.get_connection() as conn:
+            conn.execute("DELETE FROM libros WHERE id = 2")
+        assert not any(2 in (pair['id_a'], pair['id_b']) for pair in index.report())
+        print("✅ Informe con los pares esperados")
+    
+    print("\n" + "=" * 80)
+
+
+if __name__ == "__main__":
+    try:
+        test_near_duplicates()
+        sys.exit(0)
+    except AssertionError as e:
+        logger.error(f"Prueba fallida: {e}", exc_info=True)
+        sys.exit(1)
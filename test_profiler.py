@@ -0,0 +1,266 @@
+"""
+Script de prueba para verificar el modo de perfilado.
+"""
+
+import sys
+import os
+import pstats
+import tempfile
+
+# Agregar el directorio padre al path para importar módulos
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import scraper.book_scraper as book_scraper_module
+from config import CATALOGUE_URL, PROFILE_STAGES
+from database.book_writer import BookWriter
+from database.db_manager import DatabaseManager
+from scraper.book_scraper import BookScraper
+from scraper.parse_pool import ParsePool, parse_details_bytes, parse_listing_bytes
+from utils.logger import setup_logger
+from utils.profiler import PROFILE_FULL, PROFILE_STAGE, RunProfiler, page_boundary
+
+logger = setup_logger(__name__)
+
+LISTING_HTML = """
+<html><body><ol class="row">{items}</ol></body></html>
+"""
+
+LISTING_ITEM_HTML = """
+<li><article class="product_pod">
+    <p class="star-rating Three"></p>
+    <h3><a href="libro-{n}_{n}/index.html" title="Libro {n}">Libro {n}</a></h3>
+    <p class="price_color">£1{n}.00</p>
+    <p class="instock availability">In stock</p>
+</article></li>
+"""
+
+DETAIL_HTML = """
+<html><body>
+<ul class="breadcrumb"><li><a href="#">Home</a></li><li><a href="#">Books</a></li>
+<li><a href="#">Poetry</a></li><li class="active">Libro {n}</li></ul>
+<article class="product_page">
+    <div class="col-sm-6 product_main"><h1>Libro {n}</h1></div>
+    <div id="product_description"><h2>Product Description</h2></div>
+    <p>Descripción del libro {n}.</p>
+    <table class="table table-striped"><tr><th>UPC</th><td>UPC-{n}</td></tr></table>
+</article>
+</body></html>
+"""
+
+
+class _FakeDriver:
+    """Navegador simulado que sirve HTML fijo por URL."""
+    
+    def __init__(self, pages):
+        self.pages = pages
+        self.page_source = ''
+    
+    def get(self, url):
+        self.page_source = self.pages[url]
+    
+    def find_element(self, by, value):
+        return object()
+    
+    def quit(self):
+        pass
+
+
+class _OfflineScraper(BookScraper):
+    """BookScraper sin navegador real ni esperas entre peticiones."""
+    
+    def setup_driver(self):
+        pages = {}
+        for page in range(1, 4):
+            numbers = range(page * 10, page * 10 + 2)
+            pages[f"{CATALOGUE_URL}/page-{page}.html"] = LISTING_HTML.format(
+                items=''.join(LISTING_ITEM_HTML.format(n=n) for n in numbers)
+            )
+            for n in numbers:
+                pages[f"{CATALOGUE_URL}/libro-{n}_{n}/index.html"] = DETAIL_HTML.format(n=n)
+        self.driver = _FakeDriver(pages)
+    
+    def wait_between_requests(self):
+        pass
+
+
+def _insert_pages(db_manager, pages):
+    """Inserta libros por páginas, notificando cada límite de página."""
+    for page in range(pages):
+        for i in range(5):
+            db_manager.insert_book({'titulo': f'Libro {page}-{i}', 'upc': f'UPC-{page}-{i}', 'precio': 10.0 + i})
+        page_boundary(f"pagina {page + 1}")
+
+
+def test_profiler():
+    """Prueba los informes del perfilado por etapas y de la ejecución completa."""
+    
+    print("=" * 80)
+    print("PRUEBA DEL MODO DE PERFILADO")
+    print("=" * 80)
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_manager = DatabaseManager(os.path.join(tmp_dir, 'perfil.db'))
+        original_insert = DatabaseManager.insert_book
+        
+        # Test 1: Perfilado por etapas
+        print("\n" + "-" * 80)
+        print("TEST 1: Perfilado de la etapa insert_book")
+        print("-" * 80)
+        
+        profiler = RunProfiler(mode=PROFILE_STAGE, stages=['insert_book'], output_dir=tmp_dir, sample_interval=0.001)
+        with profiler:
+            assert DatabaseManager.insert_book is not original_insert
+            _insert_pages(db_manager, 3)
+            db_manager.get_book_count()
+        reports = profiler.reports
+        
+        assert DatabaseManager.insert_book is original_insert
+        assert profiler.stage_calls['insert_book'] == 15
+        functions = {function for _, _, function in pstats.Stats(reports['pstats']).stats}
+        assert 'insert_book' in functions and 'get_book_count' not in functions
+        
+        with open(reports['memoria'], encoding='utf-8') as f:
+            memory_report = f.read()
+        labels = [row[0] for row in profiler.memory_rows]
+        assert labels == ['inicio', 'pagina 1', 'pagina 2', 'pagina 3', 'fin']
+        assert 'pagina 3' in memory_report and 'Principales asignaciones' in memory_report
+        
+        if 'pilas' in reports:
+            with open(reports['pilas'], encoding='utf-8') as f:
+                for line in f:
+                    stack, count = line.rsplit(' ', 1)
+                    assert int(count) > 0 and 'insert_book' in stack
+        print(f"✅ Etapa perfilada: {sorted(reports)}")
+        
+        # Test 2: Ejecución completa sin profiler activo después
+        print("\n" + "-" * 80)
+        print("TEST 2: Perfilado completo")
+        print("-" * 80)
+        
+        profiler = RunProfiler(mode=PROFILE_FULL, output_dir=tmp_dir, sample_interval=0, memory=False)
+        with profiler:
+            _insert_pages(db_manager, 1)
+            db_manager.get_book_count()
+        reports = profiler.reports
+        functions = {function for _, _, function in pstats.Stats(reports['pstats']).stats}
+        assert {'insert_book', 'get_book_count'} <= functions
+        assert set(reports) == {'pstats'}
+        
+        # Sin profiler activo los límites de página no hacen nada
+        page_boundary('ignorada')
+        assert [row[0] for row in profiler.memory_rows] == []
+        print("✅ Ejecución completa perfilada")
+        
+        # Test 3: El hilo escritor también tiene su cProfile en modo completo
+        print("\n" + "-" * 80)
+        print("TEST 3: Perfilado completo del hilo escritor")
+        print("-" * 80)
+        
+        profiler = RunProfiler(mode=PROFILE_FULL, output_dir=tmp_dir, sample_interval=0, memory=False)
+        with profiler:
+            with BookWriter(db_manager, batch_size=5) as writer:
+                writer.submit_many({'titulo': f'Escrito {i}', 'upc': f'UPC-W{i}'} for i in range(10))
+        functions = {function for _, _, function in pstats.Stats(profiler.reports['pstats']).stats}
+        assert {'_run', '_write', 'insert_batch'} <= functions
+        print("✅ insert_batch del hilo escritor aparece en el perfil")
+        
+        try:
+            RunProfiler(mode=PROFILE_STAGE, stages=['no_existe'])
+            assert False, "Se esperaba ValueError"
+        except ValueError:
+            pass
+    
+    print("\n" + "=" * 80)
+
+
+def test_profile_scrape_books():
+    """Perfila scrape_books de principio a fin con las etapas por defecto."""
+    
+    print("=" * 80)
+    print("PRUEBA DEL PERFILADO DE scrape_books")
+    print("=" * 80)
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_manager = DatabaseManager(os.path.join(tmp_dir, 'perfil.db'))
+        archive_pages = book_scraper_module.ARCHIVE_PAGES
+        try:
+            book_scraper_module.ARCHIVE_PAGES = False
+            scraper = _OfflineScraper()
+        finally:
+            book_scraper_module.ARCHIVE_PAGES = archive_pages
+        
+        profiler = RunProfiler(mode=PROFILE_STAGE, stages=PROFILE_STAGES, output_dir=tmp_dir,
+                               sample_interval=0, memory=False)
+        with profiler:
+            books = scraper.scrape_books(max_pages=3, detail_limit=2, on_books=db_manager.insert_books)
+        
+        print(f"Llamadas por etapa: {dict(profiler.stage_calls)}")
+        assert len(books) == 6 and db_manager.get_book_count() == 6
+        assert [book.upc for book in books if book.upc] == ['UPC-10', 'UPC-11']
+        assert all(profiler.stage_calls[stage] > 0 for stage in PROFILE_STAGES)
+        assert profiler.stage_calls['get_page'] == 5
+        assert profiler.stage_calls['parse_listing'] == 3 and profiler.stage_calls['parse_details'] == 2
+        functions = {function for _, _, function in pstats.Stats(profiler.reports['pstats']).stats}
+        assert {'parse_listing_page', 'parse_book_details'} <= functions
+        
+        # Fuera del perfilado las funciones originales vuelven a su sitio
+        from scraper import html_parser, parse_pool
+        assert parse_pool.parse_listing_page is html_parser.parse_listing_page
+        assert html_parser.parse_listing_page.__module__ == 'scraper.html_parser'
+        assert not hasattr(html_parser.parse_listing_page, '__wrapped__')
+        print("✅ Todas las etapas configuradas registran llamadas")
+    
+    print("\n" + "=" * 80)
+
+
+def test_profile_parse_pool():
+    """Perfila el pool de parseo sin renunciar a sus procesos."""
+    
+    print("=" * 80)
+    print("PRUEBA DEL PERFILADO DEL POOL DE PARSEO")
+    print("=" * 80)
+    
+    listing = LISTING_HTML.format(items=''.join(LISTING_ITEM_HTML.format(n=n) for n in range(10, 12)))
+    detail = DETAIL_HTML.format(n=10)
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for mode in (PROFILE_STAGE, PROFILE_FULL):
+            profiler = RunProfiler(mode=mode, stages=PROFILE_STAGES, output_dir=tmp_dir,
+                                   sample_interval=0, memory=False)
+            with profiler:
+                with ParsePool(workers=2) as pool:
+                    assert pool.executor is not None
+                    listings = [pool.submit(parse_listing_bytes, listing, f"{CATALOGUE_URL}/page-{page}.html")
+                                for page in range(3)]
+                    details = pool.submit(parse_details_bytes, detail, f"{CATALOGUE_URL}/libro-10_10/index.html")
+                    assert all(len(job.result()) == 2 for job in listings)
+                    assert details.result()['upc'] == 'UPC-10'
+            
+            print(f"Modo {mode}: {dict(profiler.worker_calls)}")
+            assert profiler.worker_calls == {'parse_listing': 3, 'parse_details': 1}
+            assert profiler.stage_calls['parse_listing'] == 3 and profiler.stage_calls['parse_details'] == 1
+            assert profiler.stage_time['parse_listing'] > 0
+            functions = {function for _, _, function in pstats.Stats(profiler.reports['pstats']).stats}
+            assert {'parse_listing_page', 'parse_book_details'} <= functions
+        
+        # Una etapa no seleccionada se envía al pool sin perfilar
+        profiler = RunProfiler(mode=PROFILE_STAGE, stages=['get_page'], output_dir=tmp_dir,
+                               sample_interval=0, memory=False)
+        with profiler:
+            with ParsePool(workers=1) as pool:
+                assert len(pool.submit(parse_listing_bytes, listing, f"{CATALOGUE_URL}/page-1.html").result()) == 2
+        assert not profiler.worker_calls
+        print("✅ El parseo en procesos hijos se perfila y se fusiona con el proceso principal")
+    
+    print("\n" + "=" * 80)
+
+
+if __name__ == "__main__":
+    try:
+        test_profiler()
+        test_profile_scrape_books()
+        test_profile_parse_pool()
+        sys.exit(0)
+    except AssertionError as e:
+        logger.error(f"Prueba fallida: {e}", exc_info=True)
+        sys.exit(1)
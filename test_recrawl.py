@@ -0,0 +1,132 @@
+"""
+Script de prueba para verificar el upsert y la priorización de recrawls.
+"""
+
+import sys
+import os
+import tempfile
+
+# Agregar el directorio padre al path para importar módulos
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from database.db_manager import (
+    DatabaseManager,
+    UPSERT_INSERTED,
+    UPSERT_UPDATED,
+    UPSERT_UNCHANGED
+)
+from models.book import Book
+from scraper.html_parser import parse_book_page, parse_listing_page
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+LISTING_URL = 'https://books.toscrape.com/catalogue/page-1.html'
+LISTING_HTML = """
+<article class="product_pod">
+    <a href="libro-d_1/index.html"><img src="../media/cache/aa/bb/miniatura.jpg" class="thumbnail"></a>
+    <p class="star-rating Two"></p>
+    <h3><a href="libro-d_1/index.html" title="Libro D">Libro D</a></h3>
+    <p class="price_color">£20.00</p>
+    <p class="instock availability">In stock</p>
+</article>
+"""
+
+DETAIL_URL = 'https://books.toscrape.com/catalogue/libro-d_1/index.html'
+DETAIL_HTML = """
+<ul class="breadcrumb"><li>Home</li><li>Books</li><li>Poetry</li><li>Libro D</li></ul>
+<article class="product_page">
+    <div id="product_gallery"><img src="../../media/cache/cc/dd/galeria.jpg"></div>
+    <div class="product_main">
+        <h1>Libro D</h1>
+        <p class="price_color">£20.00</p>
+        <p class="instock availability">In stock (5 available)</p>
+        <p class="star-rating Two"></p>
+    </div>
+    <p>Descripción del libro D.</p>
+    <table class="table table-striped"><tr><th>UPC</th><td>UPC-D</td></tr></table>
+</article>
+"""
+
+
+def test_upsert_and_staleness():
+    """Prueba la detección de cambios en upsert_book y el orden de get_stale_books."""
+    
+    print("=" * 80)
+    print("PRUEBA DE UPSERT Y PRIORIDAD DE RECRAWL")
+    print("=" * 80)
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_manager = DatabaseManager(os.path.join(tmp_dir, 'recrawl.db'))
+        
+        # Test 1: Upsert detecta inserción, cambio y ausencia de cambios
+        print("\n" + "-" * 80)
+        print("TEST 1: Resultados de upsert_book")
+        print("-" * 80)
+        
+        book = Book(titulo='Libro A', precio_peniques=1000, upc='UPC-A', url_detalle='http://x/a')
+        assert db_manager.upsert_book(book) == UPSERT_INSERTED
+        assert db_manager.upsert_book(book) == UPSERT_UNCHANGED
+        
+        book.precio_peniques = 1200
+        assert db_manager.upsert_book(book) == UPSERT_UPDATED
+        
+        # Un recrawl básico (sin detalles) no borra la descripción existente
+        with db_manager.get_connection() as conn:
+            conn.execute("UPDATE libros SET descripcion = 'Desc' WHERE upc = 'UPC-A'")
+        assert db_manager.upsert_book(Book(titulo='Libro A', precio_peniques=1200, upc='UPC-A')) == UPSERT_UNCHANGED
+        
+        with db_manager.get_connection() as conn:
+            row = conn.execute("SELECT precio, descripcion, cambios FROM libros WHERE upc = 'UPC-A'").fetchone()
+        assert row['precio'] == 12.0 and row['descripcion'] == 'Desc' and row['cambios'] == 1
+        print("✅ Upsert correcto")
+        
+        # Test 2: Prioridad por antigüedad y frecuencia de cambio
+        print("\n" + "-" * 80)
+        print("TEST 2: Prioridad de recrawl")
+        print("-" * 80)
+        
+        db_manager.upsert_book(Book(titulo='Libro B', upc='UPC-B', url_detalle='http://x/b'))
+        db_manager.upsert_book(Book(titulo='Libro C', upc='UPC-C', url_detalle='http://x/c'))
+        with db_manager.get_connection() as conn:
+            conn.execute("UPDATE libros SET fecha_verificacion = datetime('now', '-48 hours')")
+            conn.execute("UPDATE libros SET fecha_verificacion = datetime('now', '-1 hours') WHERE upc = 'UPC-B'")
+            conn.execute("UPDATE libros SET cambios = 5 WHERE upc = 'UPC-C'")
+        
+        stale = db_manager.get_stale_books(limit=10, min_age_hours=24)
+        print(f"Pendientes: {[book['titulo'] for book in stale]}")
+        assert [book['titulo'] for book in stale] == ['Libro C', 'Libro A']
+        print("✅ Prioridad correcta")
+        
+        # Test 3: Un libro sin cambios re-extraído del listado y del detalle no suma cambios
+        print("\n" + "-" * 80)
+        print("TEST 3: Re-extracción de un libro sin cambios")
+        print("-" * 80)
+        
+        listing_book = parse_listing_page(LISTING_HTML, LISTING_URL)[0]
+        listing_book.update_details({'descripcion': 'Descripción del libro D.', 'upc': 'UPC-D', 'categoria': 'Poetry'})
+        listing_book.unidades = 5
+        assert db_manager.upsert_book(listing_book) == UPSERT_INSERTED
+        version = db_manager.get_data_version()
+        for _ in range(3):
+            assert db_manager.upsert_book(parse_book_page(DETAIL_HTML, DETAIL_URL)) == UPSERT_UNCHANGED
+            assert db_manager.upsert_book(parse_listing_page(LISTING_HTML, LISTING_URL)[0]) == UPSERT_UNCHANGED
+        
+        with db_manager.get_connection() as conn:
+            row = conn.execute("SELECT url_imagen, cambios FROM libros WHERE upc = 'UPC-D'").fetchone()
+        assert row['url_imagen'] == 'https://books.toscrape.com/media/cache/aa/bb/miniatura.jpg'
+        assert row['cambios'] == 0
+        # Solo se movió la fecha de verificación: la versión de los datos (ETag) no cambia
+        assert db_manager.get_data_version() == version
+        print("✅ Sin cambios espurios en recrawls")
+    
+    print("\n" + "=" * 80)
+
+
+if __name__ == "__main__":
+    try:
+        test_upsert_and_staleness()
+        sys.exit(0)
+    except AssertionError as e:
+        logger.error(f"Prueba fallida: {e}", exc_info=True)
+        sys.exit(1)
@@ -0,0 +1,153 @@
+"""
+Script de prueba para verificar el historial de ejecuciones y la retención.
+"""
+
+import sys
+import os
+import sqlite3
+import tempfile
+
+# Agregar el directorio padre al path para importar módulos
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from database.db_manager import (
+    DatabaseManager,
+    RUN_COMPLETED,
+    RUN_FAILED,
+    RUN_INTERRUPTED
+)
+from database.merge import merge_database
+from database.page_archive import PageArchive
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+def _run_links(db_manager):
+    """Retorna {título: ejecucion_id} de todos los libros."""
+    with db_manager.get_connection() as conn:
+        return {row['titulo']: row['ejecucion_id'] for row in conn.execute("SELECT titulo, ejecucion_id FROM libros")}
+
+
+def test_runs():
+    """Prueba el registro de ejecuciones, el vínculo de los libros y la retención."""
+    
+    print("=" * 80)
+    print("PRUEBA DEL HISTORIAL DE EJECUCIONES")
+    print("=" * 80)
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_manager = DatabaseManager(os.path.join(tmp_dir, 'libros.db'))
+        
+        # Test 1: Ejecución completada con libros vinculados
+        print("\n" + "-" * 80)
+        print("TEST 1: Ejecución completada")
+        print("-" * 80)
+        
+        with db_manager.track_run('scraping', {'max_paginas': 3}) as stats:
+            first_run = db_manager.run_id
+            outcomes = db_manager.insert_books([
+                {'titulo': f'Libro {i}', 'upc': f'UPC-{i}', 'precio': 10.0 + i} for i in range(4)
+            ] + [{'titulo': 'Libro 0', 'upc': 'UPC-0'}])
+            stats.update({'insertado': sum(outcomes), 'duplicado': outcomes.count(False), 'paginas': 2})
+        
+        assert db_manager.run_id is None
+        run = db_manager.get_runs()[0]
+        assert run['id'] == first_run and run['estado'] == RUN_COMPLETED
+        assert run['parametros'] == {'max_paginas': 3}
+        assert (run['paginas'], run['extraidos'], run['insertados'], run['duplicados']) == (2, 5, 4, 1)
+        assert run['fin'] is not None and run['duracion'] > 0 and run['libros_por_segundo'] > 0
+        assert set(_run_links(db_manager).values()) == {first_run}
+        print(f"✅ Ejecución registrada: {run['extraidos']} libros, {run['libros_por_segundo']:.1f} libros/s")
+        
+        # Test 2: Solo los libros modificados pasan a la nueva ejecución
+        print("\n" + "-" * 80)
+        print("TEST 2: Actualizaciones, detalles y fusión")
+        print("-" * 80)
+        
+        source_path = os.path.join(tmp_dir, 'nodo.db')
+        DatabaseManager(source_path).insert_books([
+            {'titulo': 'Libro 3', 'upc': 'UPC-3', 'categoria': 'Poetry'},
+            {'titulo': 'Libro nodo', 'upc': 'UPC-N'}
+        ])
+        
+        with db_manager.track_run('recrawl') as stats:
+            second_run = db_manager.run_id
+            stats[db_manager.upsert_book({'titulo': 'Libro 0', 'upc': 'UPC-0', 'precio': 99.0})] = 1
+            db_manager.upsert_book({'titulo': 'Libro 1', 'upc': 'UPC-1', 'precio': 11.0})
+            with db_manager.get_connection() as conn:
+                ids = {row['titulo']: row['id'] for row in conn.execute("SELECT id, titulo FROM libros")}
+            db_manager.update_book_details({ids['Libro 2']: {'descripcion': 'Texto'}, ids['Libro 1']: None})
+            merge_database(db_manager, source_path)
+        
+        assert db_manager.get_runs(1)[0]['actualizados'] == 1
+        links = _run_links(db_manager)
+        assert links['Libro 0'] == links['Libro 2'] == second_run
+        assert links['Libro 3'] == links['Libro nodo'] == second_run
+        assert links['Libro 1'] == first_run
+        print("✅ Libros actualizados, completados y fusionados vinculados a su ejecución")
+        
+        # Test 3: Ejecuciones fallidas e interrumpidas
+        print("\n" + "-" * 80)
+        print("TEST 3: Estados de error")
+        print("-" * 80)
+        
+        for error, status in ((RuntimeError, RUN_FAILED), (KeyboardInterrupt, RUN_INTERRUPTED)):
+            try:
+                with db_manager.track_run('daemon') as stats:
+                    stats['paginas'] = 1
+                    raise error()
+            except error:
+                pass
+            run = db_manager.get_runs(1)[0]
+            assert run['estado'] == status and run['paginas'] == 1
+        assert db_manager.run_id is None
+        print("✅ Estados fallida e interrumpida registrados")
+        
+        # Test 4: Retención y compactación
+        print("\n" + "-" * 80)
+        print("TEST 4: Retención")
+        print("-" * 80)
+        
+        with db_manager.get_connection() as conn:
+            conn.execute(
+                "UPDATE ejecuciones SET inicio = datetime('now', '-100 days') WHERE id IN (?, ?)",
+                (first_run, second_run)
+            )
+            conn.execute("CREATE TABLE relleno AS WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 "
+                         "FROM n WHERE i < 5000) SELECT i, hex(randomblob(100)) AS dato FROM n")
+            conn.execute("DROP TABLE relleno")
+        
+        result = db_manager.prune_history(days=30)
+        assert result['ejecuciones'] == 2 and result['desvinculados'] == 5
+        assert result['bytes_despues'] < result['bytes_antes']
+        assert [run['id'] for run in db_manager.get_runs()] == [second_run + 2, second_run + 1]
+        assert set(_run_links(db_manager).values()) == {None}
+        assert db_manager.get_book_count() == 5
+        
+        archive = PageArchive(os.path.join(tmp_dir, 'paginas.db'))
+        for html in ('<html>v1</html>', '<html>v2</html>'):
+            archive.store('http://ejemplo/a', html)
+        archive.store('http://ejemplo/b', '<html>b</html>')
+        with archive.get_connection() as conn:
+            conn.execute("UPDATE paginas SET fecha_descarga = datetime('now', '-100 days')")
+        assert archive.prune(days=30) == 1
+        assert [html for _, _, _, html in archive.iter_pages()] == ['<html>v2</html>', '<html>b</html>']
+        
+        conn = sqlite3.connect(db_manager.db_path)
+        try:
+            assert conn.execute("PRAGMA freelist_count").fetchone()[0] == 0
+        finally:
+            conn.close()
+        print(f"✅ Historial podado: {result['bytes_antes']} -> {result['bytes_despues']} bytes")
+    
+    print("\n" + "=" * 80)
+
+
+if __name__ == "__main__":
+    try:
+        test_runs()
+        sys.exit(0)
+    except AssertionError as e:
+        logger.error(f"Prueba fallida: {e}", exc_info=True)
+        sys.exit(1)
@@ -0,0 +1,175 @@
+"""
+Script de prueba para verificar el esquema compacto y la vista de compatibilidad.
+"""
+
+import sys
+import os
+import sqlite3
+import tempfile
+
+# Agregar el directorio padre al path para importar módulos
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import database.db_manager as db_manager_module
+from config import CATALOGUE_URL, BASE_URL
+from database.db_manager import DatabaseManager
+from database.schema import SCHEMA_VERSION, STORAGE_TABLE
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Tabla libros tal como la creaban las versiones anteriores
+LEGACY_TABLE_SQL = """
+CREATE TABLE libros (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    titulo TEXT NOT NULL,
+    precio REAL,
+    disponibilidad TEXT,
+    rating INTEGER,
+    url_imagen TEXT,
+    descripcion TEXT,
+    upc TEXT UNIQUE,
+    categoria TEXT,
+    fecha_extraccion TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    url_detalle TEXT,
+    fecha_verificacion TIMESTAMP,
+    cambios INTEGER NOT NULL DEFAULT 0
+)
+"""
+
+DESCRIPCION = "It's hard to imagine a world without A Light in the Attic. " * 5
+
+
+def _legacy_rows():
+    """Genera filas con la forma de la tabla original (ids no consecutivos)."""
+    return [
+        (3, 'A Light in the Attic', 51.77, 'In stock (22 available)', 3,
+         f'{BASE_URL}/media/cache/2c/da/2cdad67c.jpg', DESCRIPCION, 'a897fe39b1053632', 'Poetry',
+         '2024-01-01 10:00:00', f'{CATALOGUE_URL}/a-light-in-the-attic_1000/index.html', None, 0),
+        (7, 'Tipping the Velvet', 53.74, 'In stock (20 available)', 1,
+         f'{BASE_URL}/media/cache/26/0c/260c6ae1.jpg', None, '90fa61229261140a', 'Historical Fiction',
+         '2024-01-01 10:00:01', f'{CATALOGUE_URL}/tipping-the-velvet_999/index.html', None, 1),
+        (8, 'Soumission', None, None, None, 'http://otro.example/portada.jpg', None, None, None,
+         '2024-01-01 10:00:02', None, None, 0),
+    ]
+
+
+def test_compact_schema():
+    """Prueba la migración, la vista, las escrituras a través de ella y la compresión."""
+    
+    print("=" * 80)
+    print("PRUEBA DEL ESQUEMA COMPACTO")
+    print("=" * 80)
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, 'legado.db')
+        conn = sqlite3.connect(db_path)
+        conn.execute(LEGACY_TABLE_SQL)
+        conn.executemany(f"INSERT INTO libros VALUES ({', '.join('?' * 13)})", _legacy_rows())
+        conn.commit()
+        conn.close()
+        
+        # Test 1: Migración desde la tabla original
+        print("\n" + "-" * 80)
+        print("TEST 1: Migración de la tabla original")
+        print("-" * 80)
+        
+        db_manager = DatabaseManager(db_path)
+        with db_manager.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT type FROM sqlite_master WHERE name = 'libros'")
+            assert cursor.fetchone()[0] == 'view'
+            cursor.execute("PRAGMA user_version")
+            assert cursor.fetchone()[0] == SCHEMA_VERSION
+            cursor.execute("SELECT * FROM libros ORDER BY id")
+            # Los libros migrados no pertenecen a ninguna ejecución y sus unidades salen
+            # del texto de disponibilidad (dos últimas columnas)
+            units = {3: 22, 7: 20, 8: None}
+            assert [tuple(row) for row in cursor.fetchall()] == [
+                row + (None, units[row[0]]) for row in _legacy_rows()
+            ]
+            
+            cursor.execute(f"SELECT precio_peniques, url_imagen, url_detalle FROM {STORAGE_TABLE} WHERE id = 3")
+            assert tuple(cursor.fetchone()) == (5177, '2c/da/2cdad67c.jpg', 'a-light-in-the-attic_1000/index.html')
+        
+        summary = {row['categoria']: row for row in db_manager.get_category_summary()}
+        assert summary['Poetry']['total'] == 1 and summary['Poetry']['en_stock'] == 1
+        print("✅ Libros migrados con los mismos ids y valores")
+        
+        # Test 2: Escrituras a través de la vista
+        print("\n" + "-" * 80)
+        print("TEST 2: INSERT, UPDATE y DELETE sobre la vista")
+        print("-" * 80)
+        
+        assert db_manager.insert_book({
+            'titulo': 'Sharp Objects', 'precio': 47.82, 'disponibilidad': 'In stock (20 available)',
+            'rating': 4, 'upc': 'e00eb4fd7b871a48', 'categoria': 'Mystery',
+            'url_detalle': f'{CATALOGUE_URL}/sharp-objects_997/index.html'
+        })
+        with db_manager.get_connection() as conn:
+            book = conn.execute("SELECT * FROM libros WHERE upc = 'e00eb4fd7b871a48'").fetchone()
+            assert book['id'] == 9 and book['precio'] == 47.82
+            assert book['url_detalle'] == f'{CATALOGUE_URL}/sharp-objects_997/index.html'
+        
+        assert db_manager.set_detail_urls({8: f'{CATALOGUE_URL}/soumission_998/index.html', 99: 'x'}) == 1
+        assert db_manager.update_book_details({8: {'upc': 'a897fe39b1053632', 'categoria': 'Fiction'}}) == 1
+        with db_manager.get_connection() as conn:
+            row = conn.execute("SELECT upc, categoria FROM libros WHERE id = 8").fetchone()
+            assert tuple(row) == (None, 'Fiction')
+            conn.execute("UPDATE libros SET precio = 10.5, categoria = 'Mystery' WHERE id = 7")
+            conn.execute("DELETE FROM libros WHERE id = 3")
+        
+        summary = {row['categoria']: row for row in db_manager.get_category_summary()}
+        assert 'Poetry' not in summary and 'Historical Fiction' not in summary
+        assert summary['Mystery']['total'] == 2
+        assert summary['Mystery']['precio_min'] == 10.5 and summary['Mystery']['precio_max'] == 47.82
+        before = db_manager.get_category_summary()
+        db_manager.rebuild_summaries()
+        assert db_manager.get_category_summary() == before
+        print("✅ Escrituras redirigidas y resúmenes consistentes")
+    
+    # Test 3: Descripciones comprimidas
+    print("\n" + "-" * 80)
+    print("TEST 3: Compresión de descripciones")
+    print("-" * 80)
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, 'comprimida.db')
+        db_manager = DatabaseManager(db_path)
+        db_manager.insert_books([
+            {'titulo': 'Largo', 'upc': 'UPC-1', 'descripcion': DESCRIPCION},
+            {'titulo': 'Corto', 'upc': 'UPC-2', 'descripcion': 'Breve.'},
+        ])
+        
+        original = db_manager_module.COMPRESS_DESCRIPTIONS
+        try:
+            db_manager_module.COMPRESS_DESCRIPTIONS = True
+            db_manager = DatabaseManager(db_path)
+            db_manager.insert_book({'titulo': 'Nuevo', 'upc': 'UPC-3', 'descripcion': DESCRIPCION})
+            with db_manager.get_connection() as conn:
+                types = conn.execute(
+                    f"SELECT typeof(descripcion) FROM {STORAGE_TABLE} ORDER BY id"
+                ).fetchall()
+                assert [row[0] for row in types] == ['blob', 'text', 'blob']
+                descriptions = conn.execute("SELECT descripcion FROM libros ORDER BY id").fetchall()
+                assert [row[0] for row in descriptions] == [DESCRIPCION, 'Breve.', DESCRIPCION]
+            
+            db_manager_module.COMPRESS_DESCRIPTIONS = False
+            db_manager = DatabaseManager(db_path)
+            with db_manager.get_connection() as conn:
+                types = conn.execute(f"SELECT DISTINCT typeof(descripcion) FROM {STORAGE_TABLE}").fetchall()
+                assert [row[0] for row in types] == ['text']
+        finally:
+            db_manager_module.COMPRESS_DESCRIPTIONS = original
+        print("✅ Descripciones comprimidas y restauradas de forma transparente")
+    
+    print("\n" + "=" * 80)
+
+
+if __name__ == "__main__":
+    try:
+        test_compact_schema()
+        sys.exit(0)
+    except AssertionError as e:
+        logger.error(f"Prueba fallida: {e}", exc_info=True)
+        sys.exit(1)
@@ -0,0 +1,126 @@
+"""
+Script de prueba para verificar los snapshots consistentes de la base de datos.
+"""
+
+import sys
+import os
+import sqlite3
+import tempfile
+import threading
+
+# Agregar el directorio padre al path para importar módulos
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from database.db_manager import DatabaseManager
+from database.snapshots import CHECKSUM_SUFFIX, list_snapshots, verify_snapshot
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+def _query(path, sql):
+    """Ejecuta una consulta sobre un snapshot y retorna la primera columna de la primera fila."""
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute(sql).fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_snapshots():
+    """Prueba el backup por pasos, VACUUM INTO, los checksums y la rotación."""
+    
+    print("=" * 80)
+    print("PRUEBA DE SNAPSHOTS")
+    print("=" * 80)
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        snapshot_dir = os.path.join(tmp_dir, 'snapshots')
+        db_manager = DatabaseManager(os.path.join(tmp_dir, 'libros.db'))
+        db_manager.insert_books([
+            {'titulo': f'Libro {i}', 'upc': f'UPC-{i}', 'precio': 10.0 + i, 'descripcion': 'Texto ' * 50}
+            for i in range(300)
+        ])
+        with db_manager.get_connection() as conn:
+            conn.execute("DELETE FROM libros WHERE id > 150")
+        
+        # Test 1: Backup online por pasos
+        print("\n" + "-" * 80)
+        print("TEST 1: Backup por pasos")
+        print("-" * 80)
+        
+        snapshot = db_manager.create_snapshot(snapshot_dir, keep=5, pages_per_step=4, step_pause=0)
+        print(f"Snapshot: {snapshot}")
+        assert snapshot['pasos'] > 1
+        assert verify_snapshot(snapshot['ruta'])
+        assert _query(snapshot['ruta'], "SELECT COUNT(*) FROM libros") == 150
+        assert _query(snapshot['ruta'], "PRAGMA journal_mode") == 'delete'
+        assert not os.path.exists(snapshot['ruta'] + '.tmp')
+        print("✅ Copia consistente con checksum verificado")
+        
+        # Test 2: Copia compactada con VACUUM INTO
+        print("\n" + "-" * 80)
+        print("TEST 2: VACUUM INTO")
+        print("-" * 80)
+        
+        compacted = db_manager.create_snapshot(snapshot_dir, keep=5, vacuum=True)
+        assert verify_snapshot(compacted['ruta'])
+        assert _query(compacted['ruta'], "SELECT COUNT(*) FROM libros") == 150
+        assert _query(compacted['ruta'], "PRAGMA freelist_count") == 0
+        assert compacted['bytes'] < snapshot['bytes']
+        print(f"✅ Copia compactada: {compacted['bytes']} bytes frente a {snapshot['bytes']}")
+        
+        # Test 3: Checksum alterado y rotación
+        print("\n" + "-" * 80)
+        print("TEST 3: Checksums y rotación")
+        print("-" * 80)
+        
+        with open(compacted['ruta'], 'r+b') as f:
+            f.seek(200)
+            f.write(b'\xff')
+        assert not verify_snapshot(compacted['ruta'])
+        
+        latest = db_manager.create_snapshot(snapshot_dir, keep=2)
+        snapshots = list_snapshots(snapshot_dir)
+        assert snapshots == [compacted['ruta'], latest['ruta']]
+        assert latest['eliminados'] == [snapshot['ruta']]
+        assert not os.path.exists(snapshot['ruta'] + CHECKSUM_SUFFIX)
+        print("✅ Checksum alterado detectado y snapshots antiguos eliminados")
+        
+        # Test 4: Snapshot con escrituras concurrentes
+        print("\n" + "-" * 80)
+        print("TEST 4: Escrituras concurrentes")
+        print("-" * 80)
+        
+        done = threading.Event()
+        
+        def write_books():
+            """Inserta libros sin parar hasta que termine el snapshot."""
+            i = 0
+            while not done.is_set():
+                db_manager.insert_book({'titulo': f'Concurrente {i}', 'upc': f'C-{i}'})
+                i += 1
+        
+        writer = threading.Thread(target=write_books)
+        writer.start()
+        try:
+            concurrent = db_manager.create_snapshot(snapshot_dir, keep=5, pages_per_step=1, step_pause=0.001)
+        finally:
+            done.set()
+            writer.join()
+        assert verify_snapshot(concurrent['ruta'])
+        assert list_snapshots(snapshot_dir)[-1] == concurrent['ruta']
+        assert _query(concurrent['ruta'], "PRAGMA quick_check") == 'ok'
+        assert _query(concurrent['ruta'], "SELECT COUNT(*) FROM libros") >= 150
+        print("✅ Snapshot consistente mientras se escribe")
+    
+    print("\n" + "=" * 80)
+
+
+if __name__ == "__main__":
+    try:
+        test_snapshots()
+        sys.exit(0)
+    except AssertionError as e:
+        logger.error(f"Prueba fallida: {e}", exc_info=True)
+        sys.exit(1)
@@ -0,0 +1,98 @@
+"""
+Script de prueba para verificar las tablas de resumen por categoría.
+Comprueba que los triggers mantienen el resumen incremental igual al recálculo completo.
+"""
+
+import sys
+import os
+import tempfile
+
+# Agregar el directorio padre al path para importar módulos
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from database.db_manager import DatabaseManager
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+def test_summary_tables():
+    """Prueba el mantenimiento incremental y el recálculo de los resúmenes."""
+    
+    print("=" * 80)
+    print("PRUEBA DE TABLAS DE RESUMEN")
+    print("=" * 80)
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_manager = DatabaseManager(os.path.join(tmp_dir, 'resumen.db'))
+        
+        libros = [
+            {'titulo': 'Libro A', 'precio': 10.0, 'disponibilidad': 'In stock', 'rating': 5,
+             'upc': 'UPC-A', 'categoria': 'Fiction'},
+            {'titulo': 'Libro B', 'precio': 30.0, 'disponibilidad': 'In stock', 'rating': 3,
+             'upc': 'UPC-B', 'categoria': 'Fiction'},
+            {'titulo': 'Libro C', 'precio': 20.0, 'disponibilidad': 'Out of stock', 'rating': 3,
+             'upc': 'UPC-C', 'categoria': 'Poetry'},
+            {'titulo': 'Libro D', 'precio': 5.0, 'disponibilidad': 'In stock', 'rating': None,
+             'upc': None, 'categoria': None},
+        ]
+        
+        # Test 1: Resumen incremental tras inserciones
+        print("\n" + "-" * 80)
+        print("TEST 1: Resumen incremental tras inserciones")
+        print("-" * 80)
+        
+        for libro in libros:
+            db_manager.insert_book(libro)
+        
+        fiction = db_manager.get_category_summary('Fiction')[0]
+        print(f"Fiction: {fiction}")
+        assert fiction['total'] == 2
+        assert fiction['precio_promedio'] == 20.0
+        assert fiction['precio_min'] == 10.0 and fiction['precio_max'] == 30.0
+        assert fiction['ratings'][5] == 1 and fiction['ratings'][3] == 1
+        print("✅ Resumen de Fiction correcto")
+        
+        # Test 2: Actualización y borrado ajustan el resumen
+        print("\n" + "-" * 80)
+        print("TEST 2: Actualización y borrado")
+        print("-" * 80)
+        
+        with db_manager.get_connection() as conn:
+            conn.execute("UPDATE libros SET categoria = 'Poetry' WHERE upc = 'UPC-B'")
+            conn.execute("DELETE FROM libros WHERE upc = 'UPC-A'")
+        
+        assert db_manager.get_category_summary('Fiction') == []
+        poetry = db_manager.get_category_summary('Poetry')[0]
+        print(f"Poetry: {poetry}")
+        assert poetry['total'] == 2
+        assert poetry['precio_max'] == 30.0
+        assert poetry['en_stock'] == 1 and poetry['agotados'] == 1
+        print("✅ Resumen ajustado correctamente")
+        
+        # Test 3: El recálculo completo coincide con el incremental
+        print("\n" + "-" * 80)
+        print("TEST 3: Recálculo completo")
+        print("-" * 80)
+        
+        incremental = db_manager.get_category_summary()
+        db_manager.rebuild_summaries()
+        rebuilt = db_manager.get_category_summary()
+        assert incremental == rebuilt
+        
+        summary = db_manager.get_global_summary()
+        print(f"Global: {summary}")
+        assert summary['total'] == 3
+        assert summary['precio_min'] == 5.0
+        print("✅ Recálculo consistente con el resumen incremental")
+    
+    print("\n" + "=" * 80)
+
+
+if __name__ == "__main__":
+    try:
+        test_summary_tables()
+        sys.exit(0)
+    except AssertionError as e:
+        logger.error(f"Prueba fallida: {e}", exc_info=True)
+        sys.exit(1)
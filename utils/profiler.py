@@ -0,0 +1,552 @@
+"""
+Módulo de perfilado de ejecuciones.
+Combina perfilado determinista (cProfile), muestreo periódico de las pilas de
+todos los hilos (pilas colapsadas para flame graphs) y snapshots de memoria con
+tracemalloc en los límites de página. Los trabajos del pool de parseo se perfilan
+dentro de cada proceso hijo y se fusionan con el perfil del proceso principal.
+Los informes se escriben en logs/.
+"""
+
+import cProfile
+import functools
+import importlib
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from concurrent.futures import Future
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from config import (
+    LOGS_DIR,
+    PROFILE_STAGES,
+    PROFILE_SAMPLE_INTERVAL,
+    PROFILE_TRACEMALLOC_FRAMES,
+    PROFILE_TOP_ALLOCATORS
+)
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Modos de perfilado
+PROFILE_FULL = 'completo'
+PROFILE_STAGE = 'etapas'
+PROFILE_MODES = (PROFILE_FULL, PROFILE_STAGE)
+
+# Funciones instrumentadas por cada etapa ('módulo:Clase.método' o 'módulo:función').
+# Las etapas de parseo cubren los extractores de html_parser, que usan el pool de
+# parseo, el modo daemon, el backfill y el re-parseo; insert_book incluye las
+# variantes que usan el escritor en segundo plano y el modo daemon
+STAGE_TARGETS = {
+    'get_page': ('scraper.book_scraper:BookScraper.get_page',),
+    'parse_listing': ('scraper.html_parser:parse_listing_page',),
+    'parse_details': (
+        'scraper.html_parser:parse_book_details',
+        'scraper.html_parser:parse_book_page',
+    ),
+    'insert_book': (
+        'database.db_manager:DatabaseManager.insert_book',
+        'database.db_manager:DatabaseManager.insert_batch',
+        'database.db_manager:DatabaseManager.upsert_book',
+    ),
+}
+
+# Profiler activo (los límites de página se notifican con page_boundary())
+_active_profiler: Optional['RunProfiler'] = None
+
+
+class _WorkerStats:
+    """Estadísticas de cProfile de un proceso hijo, con la interfaz que acepta pstats.Stats."""
+    
+    __slots__ = ('stats',)
+    
+    def __init__(self, stats: Dict):
+        self.stats = stats
+    
+    def create_stats(self) -> None:
+        """Las estadísticas ya vienen creadas por el proceso hijo."""
+
+
+def run_profiled(function: Callable, *args) -> Tuple[Any, float, Dict]:
+    """
+    Ejecuta una función dentro de un proceso del pool con su propio cProfile.
+    
+    Args:
+        function: Función a ejecutar (debe poder enviarse al proceso hijo)
+        *args: Argumentos de la función
+    
+    Returns:
+        Tupla (resultado, segundos de ejecución, estadísticas de cProfile)
+    """
+    profile = cProfile.Profile()
+    started = time.perf_counter()
+    profile.enable()
+    try:
+        result = function(*args)
+    finally:
+        profile.disable()
+    elapsed = time.perf_counter() - started
+    profile.create_stats()
+    return result, elapsed, profile.stats
+
+
+def submit_profiled(submit: Callable[..., Future], stage: str, function: Callable, *args) -> Future:
+    """
+    Envía una función a un pool de procesos. Con un profiler activo que mide la
+    etapa, el proceso hijo la ejecuta con run_profiled y su tiempo y su perfil se
+    registran en el profiler: las funciones instrumentadas y cProfile del proceso
+    principal no ven lo que ocurre en los procesos hijos.
+    
+    Args:
+        submit: Método submit del pool de procesos
+        stage: Etapa a la que se atribuye la llamada
+        function: Función a ejecutar en el pool
+        *args: Argumentos de la función
+    
+    Returns:
+        Future con el resultado de la función
+    """
+    profiler = _active_profiler
+    if profiler is None or not profiler.measures(stage):
+        return submit(function, *args)
+    
+    job = submit(run_profiled, function, *args)
+    future: Future = Future()
+    
+    def record(done: Future) -> None:
+        try:
+            result, elapsed, stats = done.result()
+        except BaseException as e:
+            future.set_exception(e)
+            return
+        profiler.add_worker_call(stage, elapsed, stats)
+        future.set_result(result)
+    
+    job.add_done_callback(record)
+    return future
+
+
+def page_boundary(label: str) -> None:
+    """
+    Notifica al profiler activo que terminó una página. Sin profiler activo no
+    hace nada, así que puede llamarse siempre desde el scraper.
+    
+    Args:
+        label: Identificador de la página (por ejemplo, 'pagina 3')
+    """
+    if _active_profiler is not None:
+        _active_profiler.page_boundary(label)
+
+
+def _frame_label(frame) -> str:
+    """
+    Genera la etiqueta de un frame para las pilas colapsadas.
+    
+    Args:
+        frame: Frame de Python
+    
+    Returns:
+        Etiqueta 'archivo:función'
+    """
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+def _format_size(size: int) -> str:
+    """
+    Formatea un tamaño en bytes como KiB.
+    
+    Args:
+        size: Tamaño en bytes (puede ser negativo)
+    
+    Returns:
+        Tamaño legible
+    """
+    return f"{size / 1024:+.1f} KiB" if size < 0 else f"{size / 1024:.1f} KiB"
+
+
+def _filtered(snapshot: tracemalloc.Snapshot) -> tracemalloc.Snapshot:
+    """
+    Quita de un snapshot las asignaciones del propio tracemalloc y de la importación.
+    
+    Args:
+        snapshot: Snapshot de tracemalloc
+    
+    Returns:
+        Snapshot filtrado
+    """
+    return snapshot.filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap*>'),
+    ))
+
+
+def _enable(profile: cProfile.Profile) -> bool:
+    """
+    Activa un cProfile. Desde Python 3.12 solo puede haber uno activo a la vez en
+    el intérprete; si otro hilo ya tiene el suyo, esta llamada queda sin perfil
+    determinista (el muestreo de pilas sí la cubre).
+    
+    Args:
+        profile: Profiler a activar
+    
+    Returns:
+        True si se activó
+    """
+    try:
+        profile.enable()
+        return True
+    except ValueError:
+        return False
+
+
+class RunProfiler:
+    """Perfilado de una ejecución completa o de etapas concretas."""
+    
+    def __init__(
+        self,
+        mode: str = PROFILE_FULL,
+        stages: Sequence[str] = PROFILE_STAGES,
+        output_dir: str = LOGS_DIR,
+        sample_interval: float = PROFILE_SAMPLE_INTERVAL,
+        memory: bool = True
+    ):
+        """
+        Inicializa el profiler.
+        
+        Args:
+            mode: PROFILE_FULL (toda la ejecución) o PROFILE_STAGE (solo las etapas)
+            stages: Etapas instrumentadas en modo PROFILE_STAGE (claves de STAGE_TARGETS)
+            output_dir: Directorio donde se escriben los informes
+            sample_interval: Segundos entre muestras de pilas (0 = sin muestreo)
+            memory: Si se toman snapshots de memoria con tracemalloc
+        
+        Raises:
+            ValueError: Si el modo o alguna etapa no existen
+        """
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Modo de perfilado desconocido: {mode}")
+        unknown = [stage for stage in stages if stage not in STAGE_TARGETS]
+        if unknown:
+            raise ValueError(f"Etapas desconocidas: {', '.join(unknown)}")
+        
+        self.mode = mode
+        self.stages = tuple(stages)
+        self.output_dir = output_dir
+        self.sample_interval = sample_interval
+        self.memory = memory
+        
+        self.profiles: List[cProfile.Profile] = []
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.originals: List[tuple] = []
+        self.stage_calls: Counter = Counter()
+        self.stage_time: Counter = Counter()
+        # Llamadas ejecutadas en procesos del pool y su perfil fusionado
+        self.worker_calls: Counter = Counter()
+        self.worker_stats: Optional[pstats.Stats] = None
+        
+        # Hilos dentro de una etapa (id -> profundidad) para el muestreo en modo etapas
+        self.active_threads: Dict[int, int] = {}
+        self.samples: Counter = Counter()
+        self.sampler: Optional[threading.Thread] = None
+        self.stop_sampling = threading.Event()
+        
+        self.memory_rows: List[tuple] = []
+        self.first_snapshot = None
+        self.previous_snapshot = None
+        # (crecimiento, página, snapshot anterior, snapshot) de la página que más creció
+        self.largest_growth: tuple = (0, None, None, None)
+        self.started_at = 0.0
+        self.report_prefix = ''
+        self.reports: Dict[str, str] = {}
+    
+    def __enter__(self) -> 'RunProfiler':
+        self.start()
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.stop()
+    
+    def start(self) -> None:
+        """Activa el perfilado, el muestreo y el seguimiento de memoria."""
+        global _active_profiler
+        
+        self.started_at = time.perf_counter()
+        self.report_prefix = os.path.join(self.output_dir, f"perfil_{datetime.now():%Y%m%d_%H%M%S}")
+        
+        if self.memory:
+            tracemalloc.start(PROFILE_TRACEMALLOC_FRAMES)
+            self.page_boundary('inicio')
+        
+        if self.mode == PROFILE_FULL:
+            _enable(self._thread_profile())
+        else:
+            for stage in self.stages:
+                for target in STAGE_TARGETS[stage]:
+                    self._instrument(stage, target)
+        
+        if self.sample_interval > 0:
+            self.stop_sampling.clear()
+            self.sampler = threading.Thread(target=self._sample_loop, name='profiler-muestreo', daemon=True)
+            self.sampler.start()
+        
+        if self.mode == PROFILE_FULL:
+            # Los hilos creados a partir de aquí (escritor en segundo plano, backfill)
+            # activan su propio cProfile al arrancar
+            threading.setprofile(self._start_thread_profile)
+        
+        _active_profiler = self
+        if self.mode == PROFILE_STAGE:
+            logger.info(f"Perfilado activo (modo: {self.mode}, etapas: {', '.join(self.stages)})")
+        else:
+            logger.info(f"Perfilado activo (modo: {self.mode})")
+    
+    def stop(self) -> Dict[str, str]:
+        """
+        Detiene el perfilado y escribe los informes (también quedan en self.reports).
+        
+        Returns:
+            Diccionario {tipo de informe: ruta del archivo}
+        """
+        global _active_profiler
+        _active_profiler = None
+        
+        if self.mode == PROFILE_FULL:
+            threading.setprofile(None)
+            self._thread_profile().disable()
+        for owner, name, original in reversed(self.originals):
+            setattr(owner, name, original)
+        self.originals.clear()
+        
+        if self.sampler:
+            self.stop_sampling.set()
+            self.sampler.join()
+            self.sampler = None
+        
+        if self.memory and tracemalloc.is_tracing():
+            self.page_boundary('fin')
+        
+        self.reports = self.write_reports()
+        if self.memory:
+            tracemalloc.stop()
+        return self.reports
+    
+    def _thread_profile(self) -> cProfile.Profile:
+        """
+        Obtiene el cProfile del hilo actual (cProfile solo mide el hilo que lo activa).
+        
+        Returns:
+            Profiler del hilo actual
+        """
+        profile = getattr(self.local, 'profile', None)
+        if profile is None:
+            profile = cProfile.Profile()
+            self.local.profile = profile
+            with self.lock:
+                self.profiles.append(profile)
+        return profile
+    
+    def _start_thread_profile(self, frame, event, arg) -> None:
+        """
+        Función de perfilado inicial de los hilos nuevos (threading.setprofile):
+        la reemplaza por el cProfile propio del hilo.
+        """
+        sys.setprofile(None)
+        _enable(self._thread_profile())
+    
+    def measures(self, stage: str) -> bool:
+        """
+        Indica si se miden las llamadas de una etapa.
+        
+        Args:
+            stage: Nombre de la etapa
+        
+        Returns:
+            True en modo completo o si la etapa está seleccionada
+        """
+        return self.mode == PROFILE_FULL or stage in self.stages
+    
+    def add_worker_call(self, stage: str, elapsed: float, stats: Dict) -> None:
+        """
+        Registra una llamada ejecutada en un proceso del pool de parseo.
+        
+        Args:
+            stage: Etapa de la llamada
+            elapsed: Segundos de ejecución en el proceso hijo
+            stats: Estadísticas de cProfile del proceso hijo
+        """
+        with self.lock:
+            self.stage_calls[stage] += 1
+            self.stage_time[stage] += elapsed
+            self.worker_calls[stage] += 1
+            if self.worker_stats is None:
+                self.worker_stats = pstats.Stats(_WorkerStats(stats))
+            else:
+                self.worker_stats.add(_WorkerStats(stats))
+    
+    def _instrument(self, stage: str, target: str) -> None:
+        """
+        Reemplaza un método de clase o una función de módulo por una versión que lo
+        perfila. Una función se reemplaza también en los módulos ya cargados que la
+        importaron por nombre ('from módulo import función').
+        
+        Args:
+            stage: Nombre de la etapa
+            target: 'módulo:Clase.método' o 'módulo:función'
+        """
+        module_name, qualified_name = target.split(':')
+        module = importlib.import_module(module_name)
+        if '.' in qualified_name:
+            class_name, method_name = qualified_name.split('.')
+            owners = [getattr(module, class_name)]
+        else:
+            method_name = qualified_name
+            owners = [module]
+        original = getattr(owners[0], method_name)
+        if owners[0] is module:
+            owners += [
+                other for other in list(sys.modules.values())
+                if other is not module and getattr(other, '__dict__', {}).get(method_name) is original
+            ]
+        profiler = self
+        
+        @functools.wraps(original)
+        def wrapper(*args, **kwargs):
+            thread_id = threading.get_ident()
+            depth = profiler.active_threads.get(thread_id, 0)
+            profiler.active_threads[thread_id] = depth + 1
+            profile = profiler._thread_profile() if depth == 0 else None
+            started = time.perf_counter()
+            if profile and not _enable(profile):
+                profile = None
+            try:
+                return original(*args, **kwargs)
+            finally:
+                if profile:
+                    profile.disable()
+                with profiler.lock:
+                    profiler.stage_time[stage] += time.perf_counter() - started
+                    profiler.stage_calls[stage] += 1
+                if depth == 0:
+                    del profiler.active_threads[thread_id]
+                else:
+                    profiler.active_threads[thread_id] = depth
+        
+        for owner in owners:
+            self.originals.append((owner, method_name, original))
+            setattr(owner, method_name, wrapper)
+    
+    def _sample_loop(self) -> None:
+        """Bucle del hilo de muestreo: acumula las pilas colapsadas de los hilos."""
+        own_id = threading.get_ident()
+        while not self.stop_sampling.wait(self.sample_interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                if self.mode == PROFILE_STAGE and thread_id not in self.active_threads:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.samples[';'.join(reversed(stack))] += 1
+    
+    def page_boundary(self, label: str) -> None:
+        """
+        Toma un snapshot de memoria y registra el uso actual, el pico y el
+        crecimiento desde el snapshot anterior.
+        
+        Args:
+            label: Identificador del límite (página, inicio o fin)
+        """
+        if not self.memory or not tracemalloc.is_tracing():
+            return
+        # Los snapshots se filtran al escribir el informe: filtrar en cada página
+        # cuesta mucho más que tomar el snapshot
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        growth = current - self.memory_rows[-1][1] if self.memory_rows else 0
+        self.memory_rows.append((label, current, peak, growth))
+        if self.first_snapshot is None:
+            self.first_snapshot = snapshot
+        elif growth > self.largest_growth[0]:
+            self.largest_growth = (growth, label, self.previous_snapshot, snapshot)
+        self.previous_snapshot = snapshot
+    
+    def write_reports(self) -> Dict[str, str]:
+        """
+        Escribe los informes de la ejecución y muestra un resumen en el log.
+        
+        Returns:
+            Diccionario {tipo de informe: ruta del archivo}
+        """
+        reports = {}
+        elapsed = time.perf_counter() - self.started_at
+        
+        profiles = [profile for profile in self.profiles if profile.getstats()]
+        stats = pstats.Stats(*profiles) if profiles else None
+        if self.worker_stats is not None:
+            stats = self.worker_stats if stats is None else stats.add(self.worker_stats)
+        if stats is not None:
+            reports['pstats'] = f"{self.report_prefix}.pstats"
+            stats.dump_stats(reports['pstats'])
+            
+            top = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:10]
+            logger.info("Funciones con más tiempo acumulado:")
+            for (filename, line, function), (_, calls, _, cumulative, _) in top:
+                logger.info(f"  {cumulative:8.3f}s {calls:8d} llamadas  {os.path.basename(filename)}:{line}({function})")
+        
+        if self.samples:
+            reports['pilas'] = f"{self.report_prefix}.folded"
+            with open(reports['pilas'], 'w', encoding='utf-8') as f:
+                for stack, count in self.samples.most_common():
+                    f.write(f"{stack} {count}\n")
+        
+        if self.memory_rows:
+            reports['memoria'] = f"{self.report_prefix}_memoria.txt"
+            with open(reports['memoria'], 'w', encoding='utf-8') as f:
+                f.write("Memoria por límite de página (tracemalloc)\n")
+                for label, current, peak, growth in self.memory_rows:
+                    f.write(
+                        f"{label:>20}  actual {_format_size(current):>14}  pico {_format_size(peak):>14}  "
+                        f"crecimiento {_format_size(growth):>14}\n"
+                    )
+                
+                first, last = _filtered(self.first_snapshot), _filtered(self.previous_snapshot)
+                f.write(f"\nPrincipales asignaciones al final ({PROFILE_TOP_ALLOCATORS})\n")
+                for stat in last.statistics('lineno')[:PROFILE_TOP_ALLOCATORS]:
+                    f.write(f"{stat}\n")
+                
+                f.write(f"\nMayor crecimiento desde el inicio ({PROFILE_TOP_ALLOCATORS})\n")
+                for stat in last.compare_to(first, 'lineno')[:PROFILE_TOP_ALLOCATORS]:
+                    f.write(f"{stat}\n")
+                
+                growth, label, before, after = self.largest_growth
+                if label is not None:
+                    f.write(f"\nPágina con mayor crecimiento: {label} ({_format_size(growth)})\n")
+                    for stat in _filtered(after).compare_to(_filtered(before), 'lineno')[:PROFILE_TOP_ALLOCATORS]:
+                        f.write(f"{stat}\n")
+        
+        for stage in self.stages:
+            if self.stage_calls[stage]:
+                in_workers = f", {self.worker_calls[stage]} en procesos de parseo" if self.worker_calls[stage] else ''
+                logger.info(
+                    f"Etapa {stage}: {self.stage_calls[stage]} llamadas{in_workers}, "
+                    f"{self.stage_time[stage]:.3f}s ({self.stage_time[stage] / self.stage_calls[stage] * 1000:.1f} ms/llamada)"
+                )
+        if self.worker_calls:
+            logger.info(
+                f"Parseo en procesos del pool: {sum(self.worker_calls.values())} páginas con cProfile fusionado "
+                f"en el informe; el muestreo de pilas y la memoria solo cubren el proceso principal"
+            )
+        logger.info(f"Perfilado de {elapsed:.1f}s, {sum(self.samples.values())} muestras de pilas")
+        for kind, path in reports.items():
+            logger.info(f"Informe de perfilado ({kind}): {path}")
+        return reports